@@ -26,6 +26,12 @@ from configs.shared import (
 
 CHECKPOINT_PATH = ROOT_DIR / "checkpoints" / "phobert_best.pt"
 
+# Cached INT8 model built from CHECKPOINT_PATH (see QUANTIZE_MODE)
+QUANTIZED_CHECKPOINT_PATH = ROOT_DIR / "checkpoints" / "phobert_best.int8.pt"
+
+# ONNX graph exported from CHECKPOINT_PATH (see INFER_BACKEND)
+ONNX_PATH = ROOT_DIR / "checkpoints" / "phobert_best.onnx"
+
 
 # =========================================================
 # Device
@@ -33,6 +39,36 @@ CHECKPOINT_PATH = ROOT_DIR / "checkpoints" / "phobert_best.pt"
 
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Memory-map the checkpoint instead of copying it into each process (CPU only).
+# Worker processes then share the read-only weight pages via the page cache.
+MMAP_WEIGHTS = True
+
+# Weight quantization for CPU inference:
+# - None   : full fp32 model
+# - "int8" : dynamic INT8 on every Linear (encoder + classifier head),
+#            cached at QUANTIZED_CHECKPOINT_PATH. CPU only.
+QUANTIZE_MODE = None
+
+# Execution backend used by NewsInferencer (web service + batch CLI):
+# - "torch"    : PyTorch eager
+# - "compiled" : TorchScript graphs traced per (batch, seq) bucket at startup
+# - "onnx"     : ONNX Runtime on CPU, graph exported to ONNX_PATH
+#                (exported automatically if missing or older than the checkpoint)
+INFER_BACKEND = "torch"
+
+# Buckets of the "compiled" backend: inputs are padded up to the nearest one.
+# The largest sequence bucket must cover MAX_SEQ_LENGTH.
+COMPILE_SEQ_BUCKETS = [32, 64, 128, 256]
+COMPILE_BATCH_BUCKETS = [1, 8, 32]
+
+# Max |logit difference| accepted by the torch vs ONNX parity check
+ONNX_PARITY_ATOL = 1e-3
+
+# Autocast precision of the forward pass (INFER_BACKEND="torch", no QUANTIZE_MODE):
+# - None   : full fp32
+# - "bf16" : bfloat16 autocast, probabilities still returned in fp32
+AUTOCAST_DTYPE = None
+
 
 # =========================================================
 # Inference policy
@@ -45,6 +81,102 @@ CONFIDENCE_MEDIUM = 0.4
 # Top-k predictions
 RETURN_TOP_K = 3
 
+# Only clean + segment the prefix of a document the model can actually see
+# (the tokenizer truncates to MAX_SEQ_LENGTH anyway). The prefix starts at
+# MAX_SEQ_LENGTH * CHARS_PER_TOKEN * MARGIN characters and doubles until it
+# yields the token budget + TOKEN_MARGIN tokens (so the words at the cut
+# cannot change the kept tokens), at most MAX_ROUNDS times before falling
+# back to the whole document.
+TRUNCATION_AWARE_PREPROCESS = True
+PREPROCESS_CHARS_PER_TOKEN = 6
+PREPROCESS_BUDGET_MARGIN = 1.5
+PREPROCESS_TOKEN_MARGIN = 16
+PREPROCESS_MAX_ROUNDS = 3
+
+# Sliding-window inference for documents longer than MAX_SEQ_LENGTH.
+# The text is split into overlapping MAX_SEQ_LENGTH-token windows (start
+# every WINDOW_STRIDE tokens, at most MAX_WINDOWS), all run in one batched
+# forward pass. Window outputs are combined by WINDOW_AGGREGATION:
+# - "max_prob"  : prediction of the most confident window
+# - "mean"      : mean of the window probabilities
+# - "attention" : CLS vectors pooled with softmax(window max logit) weights,
+#                 then classified once (INFER_BACKEND="torch" only)
+CHUNKED_INFERENCE = False
+WINDOW_STRIDE = 128
+MAX_WINDOWS = 4
+WINDOW_AGGREGATION = "max_prob"
+
+# Early exit (INFER_BACKEND="torch"): the encoder stops after an intermediate
+# layer once its exit head is at least EARLY_EXIT_THRESHOLD sure.
+# Heads trained by src/train/early_exit.py for CHECKPOINT_PATH.
+EARLY_EXIT = False
+EARLY_EXIT_HEADS_PATH = ROOT_DIR / "checkpoints" / "phobert_best.exits.pt"
+EARLY_EXIT_THRESHOLD = CONFIDENCE_HIGH
+
+# Max items per forward pass in NewsInferencer.infer_batch
+# (items are grouped by token length, each group padded to its own max)
+INFER_BATCH_SIZE = 32
+
+
+# =========================================================
+# Cascade (cheap first stage)
+# =========================================================
+
+# Hashed word n-grams + linear model run on the cleaned text (no word
+# segmentation, no PhoBERT) before the model. Items whose first-stage
+# probability reaches the threshold of their predicted label are answered
+# directly; the rest are escalated to PhoBERT.
+# Report: python src/infer/cascade.py
+CASCADE_ENABLED = False
+
+# Trained from CASCADE_TRAIN_PATH on first use, retrained when it changes
+CASCADE_MODEL_PATH = ROOT_DIR / "checkpoints" / "cascade_stage1.joblib"
+CASCADE_TRAIN_PATH = ROOT_DIR / "dataset" / "data_processed" / "train.csv"
+
+CASCADE_NGRAM_RANGE = (1, 2)
+CASCADE_N_FEATURES = 2 ** 20
+
+# Minimum first-stage probability to answer without PhoBERT.
+# Per-label overrides, e.g. {"phishing": 0.85}; a value > 1 always escalates that label.
+CASCADE_THRESHOLD = 0.9
+CASCADE_CLASS_THRESHOLDS = {}
+
+
+# =========================================================
+# Vocabulary pruning
+# =========================================================
+
+# Checkpoint whose embedding matrix keeps only the token ids seen in
+# VOCAB_PRUNE_SOURCES (+ optional saved traffic), written by
+# src/infer/vocab_prune.py. Serve it by pointing CHECKPOINT_PATH here:
+# NewsInferencer then maps unseen token ids to <unk>.
+PRUNED_CHECKPOINT_PATH = ROOT_DIR / "checkpoints" / "phobert_best.pruned.pt"
+
+# Processed CSVs ('text' column) scanned with the tokenizer
+VOCAB_PRUNE_SOURCES = sorted((ROOT_DIR / "dataset" / "data_processed").glob("*.csv"))
+
+# Saved raw traffic (CSV / JSONL with 'title' / 'text'), preprocessed like live requests
+VOCAB_PRUNE_TRAFFIC = []
+
+# Token ids seen fewer times are dropped (special tokens are always kept)
+VOCAB_MIN_COUNT = 1
+
+
+# =========================================================
+# Prediction cache
+# =========================================================
+
+# Cache model probabilities keyed by hash(normalized title + text + model
+# identity). Cleared automatically when the checkpoint or keywords.json
+# changes on disk.
+ENABLE_PREDICTION_CACHE = True
+
+# LRU eviction above this many bytes
+PREDICTION_CACHE_MAX_BYTES = 64 * 1024 ** 2
+
+# Entries older than this are recomputed
+PREDICTION_CACHE_TTL_SECONDS = 6 * 3600
+
 
 # =========================================================
 # Explainability
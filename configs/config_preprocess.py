@@ -76,4 +76,17 @@ PROTECT_CRITICAL_TOKENS = True
 # =========================
 
 SYNONYM_MAP_PATH = ROOT_DIR / "json" / "synonyms.json"
-PANIC_WORDS_PATH = ROOT_DIR / "json" / "panic_words.json"
\ No newline at end of file
+PANIC_WORDS_PATH = ROOT_DIR / "json" / "panic_words.json"
+
+
+# =========================
+# Segmentation cache
+# =========================
+
+# Persist clean_text -> segment_vi results (SQLite), shared by
+# preprocessing runs and the inference server
+SEGMENT_CACHE_ENABLED = True
+SEGMENT_CACHE_PATH = ROOT_DIR / "dataset" / "cache" / "segment_cache.sqlite"
+
+# Least-recently-used entries beyond this are removed on compaction
+SEGMENT_CACHE_MAX_ENTRIES = 2_000_000
@@ -23,6 +23,29 @@ from configs.shared import (
 
 DATA_DIR = os.path.join(ROOT_DIR, "dataset", "data_processed")
 OUTPUT_DIR = os.path.join(ROOT_DIR, "checkpoints")
+TOKEN_SHARD_DIR = os.path.join(ROOT_DIR, "dataset", "token_shards")
+
+# Resumable training state (last.pt), see src/train/checkpoint_manager.py
+TRAIN_STATE_DIR = os.path.join(OUTPUT_DIR, "train_state")
+
+
+# =========================
+# Data loading
+# =========================
+
+# Tokenize each split once into memory-mapped shards (TOKEN_SHARD_DIR),
+# keyed by tokenizer, MAX_SEQ_LENGTH and the CSV fingerprint.
+# False: tokenize on the fly in FakeNewsDataset.__getitem__
+USE_TOKEN_SHARDS = True
+
+# CSV rows tokenized per chunk while building shards
+TOKENIZE_CHUNK_ROWS = 10000
+
+# Group samples of similar length in a batch (less padding).
+# Training shuffles, then sorts within chunks of BATCH_SIZE * BUCKET_CHUNK_BATCHES
+# samples and shuffles the batch order; evaluation sorts globally.
+LENGTH_BUCKETING = True
+BUCKET_CHUNK_BATCHES = 50
 
 
 # =========================
@@ -50,6 +73,156 @@ EPOCHS = 3
 LEARNING_RATE = 2e-5
 WEIGHT_DECAY = 0.01
 
+# Micro-batches of BATCH_SIZE accumulated per optimizer step
+# (effective batch = BATCH_SIZE * GRAD_ACCUM_STEPS). The warmup / linear
+# scheduler counts optimizer steps, not micro-batches.
+GRAD_ACCUM_STEPS = 1
+
+# What train() updates:
+# - "full" : every parameter (AdamW keeps two fp32 states per parameter)
+# - "lora" : encoder frozen, low-rank adapters on LORA_TARGETS + classifier
+#            head only (see "Parameter-efficient fine-tuning" below)
+FINETUNE_MODE = "full"
+
+# Recompute encoder layer activations during backward instead of keeping
+# them: less peak memory, ~30% more compute per step
+GRADIENT_CHECKPOINTING = False
+
+# Process group backend of DDP training (launched with torchrun, see
+# src/train/distributed.py). BATCH_SIZE is per process.
+DDP_BACKEND = "gloo"
+
+
+# =========================
+# Parameter-efficient fine-tuning (FINETUNE_MODE = "lora")
+# =========================
+
+# W + (LORA_ALPHA / LORA_RANK) * B @ A on the attention projections of every layer
+LORA_RANK = 8
+LORA_ALPHA = 16
+LORA_DROPOUT = 0.1
+LORA_TARGETS = ["query", "key", "value"]
+
+# Adapters start at zero: a larger learning rate than full fine-tuning
+LORA_LEARNING_RATE = 5e-4
+
+# Best adapters + head (a few MB) are written here; when training ends they
+# are merged into the backbone and saved as a plain checkpoints/phobert_best.pt,
+# so inference cost and loading are the same as after full fine-tuning
+LORA_ADAPTER_PATH = os.path.join(OUTPUT_DIR, "phobert_best.lora.pt")
+
+
+# =========================
+# Checkpointing / resume
+# =========================
+
+# Write the full training state (model, optimizer, scheduler, RNG, sampler
+# position) every N optimizer steps and at the end of every epoch.
+# 0: end of epoch only
+CHECKPOINT_EVERY_STEPS = 500
+
+# Continue from TRAIN_STATE_DIR/last.pt when it exists (mid-epoch included).
+# Refused (error) when last.pt was written with other settings (batch size,
+# LR, epochs, MAX_SEQ_LENGTH, fine-tuning mode, ...) or another train.csv.
+# The file is removed once training finishes.
+RESUME_TRAINING = True
+
+# Write checkpoints from a background thread (training continues meanwhile;
+# costs one transient CPU copy of the state)
+CHECKPOINT_ASYNC = True
+
+
+# =========================
+# Head-only retraining (frozen encoder)
+# =========================
+
+# src/train/head_only.py runs the frozen encoder once per split, stores the
+# CLS embeddings in memory-mapped arrays and trains only the classifier head
+# on them. Cache key: encoder weights + token shard (tokenizer, MAX_SEQ_LENGTH, CSV).
+EMBEDDING_CACHE_DIR = os.path.join(ROOT_DIR, "dataset", "embedding_cache")
+
+# Encoder weights the embeddings come from:
+# - None : pretrained MODEL_NAME backbone
+# - path : fine-tuned checkpoint (e.g. checkpoints/phobert_best.pt)
+HEAD_ENCODER_CHECKPOINT = None
+
+HEAD_EPOCHS = 30
+HEAD_BATCH_SIZE = 256
+HEAD_LEARNING_RATE = 1e-3
+HEAD_PATIENCE = 5
+
+# Per-class loss weights (list of NUM_CLASSES floats) or None
+HEAD_CLASS_WEIGHTS = None
+
+# Full PhoBERTClassifier checkpoint (encoder + new head), loadable by
+# evaluate.py / NewsInferencer like phobert_best.pt
+HEAD_CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "phobert_head_only.pt")
+
+
+# =========================
+# Distillation (src/train/distill.py)
+# =========================
+
+# Fine-tuned teacher; its logits on train are computed once and cached
+# (memory-mapped) under TEACHER_LOGITS_DIR
+TEACHER_CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "phobert_best.pt")
+TEACHER_LOGITS_DIR = os.path.join(ROOT_DIR, "dataset", "teacher_logits")
+
+# Student shape: layers are taken evenly spaced from the teacher (always
+# including the last one). STUDENT_HIDDEN_SIZE = None keeps the teacher width;
+# a smaller value slices every weight matrix to its first dimensions
+# (attention heads and FFN shrink in proportion).
+STUDENT_NUM_LAYERS = 4
+STUDENT_HIDDEN_SIZE = None
+
+# loss = ALPHA * KL(student || teacher at TEMPERATURE) * T^2 + (1 - ALPHA) * CE
+DISTILL_TEMPERATURE = 2.0
+DISTILL_ALPHA = 0.7
+DISTILL_EPOCHS = 3
+DISTILL_LEARNING_RATE = 5e-5
+
+# Written as {"encoder_config", "state_dict"}; load it in NewsInferencer by
+# pointing CHECKPOINT_PATH (configs/config_infer.py) at this file
+STUDENT_CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "phobert_student.pt")
+
+
+# =========================
+# Structured pruning (src/train/prune.py)
+# =========================
+
+# Attention heads and FFN neurons of this checkpoint are scored on val
+# (first-order Taylor estimate of the loss change when removed) and the
+# lowest-ranked ones are cut out of the weight matrices.
+PRUNE_BASE_CHECKPOINT = os.path.join(OUTPUT_DIR, "phobert_best.pt")
+
+# Share of heads and of FFN neurons removed (ranked globally across layers,
+# at least one of each kept per layer); every level is in the report
+PRUNE_SPARSITY_LEVELS = [0.1, 0.2, 0.3, 0.4, 0.5]
+
+# Level written to PRUNE_CHECKPOINT_PATH
+PRUNE_TARGET_SPARSITY = 0.4
+
+# Short fine-tuning on train after pruning (0 = none)
+PRUNE_FINETUNE_EPOCHS = 1
+PRUNE_LEARNING_RATE = 2e-5
+
+# Written as {"encoder_config", "state_dict"} with the kept heads / FFN size
+# of every layer; load it in NewsInferencer by pointing CHECKPOINT_PATH here
+PRUNE_CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "phobert_pruned.pt")
+
+
+# =========================
+# Early exit (src/train/early_exit.py)
+# =========================
+
+# Exit heads on the CLS state after these encoder layers (1-based), trained
+# afterwards on the frozen fine-tuned model EXIT_BASE_CHECKPOINT. The CLS
+# states are cached once (EXIT_CACHE_DIR); heads use the HEAD_* settings.
+EXIT_LAYERS = [3, 6, 9]
+EXIT_BASE_CHECKPOINT = os.path.join(OUTPUT_DIR, "phobert_best.pt")
+EXIT_CACHE_DIR = os.path.join(ROOT_DIR, "dataset", "exit_cls_cache")
+EXIT_HEADS_PATH = os.path.join(OUTPUT_DIR, "phobert_best.exits.pt")
+
 
 # =========================
 # Reproducibility
@@ -63,3 +236,39 @@ WEIGHT_DECAY = 0.01
 # =========================
 
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+# =========================
+# Precision
+# =========================
+
+# Autocast precision for train_epoch / eval_epoch / evaluate:
+# - None   : full fp32
+# - "bf16" : bfloat16 autocast (fast path on CPUs with AVX512-BF16 / AMX).
+#            Same exponent range as fp32, so no loss scaling; the loss is
+#            computed in fp32 on upcast logits. Master weights stay fp32.
+AUTOCAST_DTYPE = None
+
+# Precision of the weights written to CHECKPOINT_PATH:
+# - None   : fp32
+# - "bf16" : half the file size; loaders upcast to fp32 parameters
+CHECKPOINT_DTYPE = None
+
+
+# =========================
+# Instrumentation
+# =========================
+
+# torch.profiler window over training micro-batches, "start:count"
+# (e.g. "20:5" = steps 20..24 of the run). Empty: disabled.
+# Set without editing code: FAKENEWS_PROFILE_STEPS=20:5 python src/train/train.py
+PROFILE_STEPS = os.environ.get("FAKENEWS_PROFILE_STEPS", "")
+
+# Chrome traces (open in chrome://tracing or https://ui.perfetto.dev)
+PROFILE_DIR = os.path.join(ROOT_DIR, "result", "profiler")
+
+# Synchronize CUDA at every phase boundary of train_epoch so the per-phase
+# times (data_wait_s, forward_s, ...) are exact on GPU. Costs one device sync
+# per phase and micro-batch: only for diagnosis. Off: host-side times
+# (epoch_time_s, samples_per_s and tokens_per_s stay exact).
+PHASE_TIMING_SYNC = False
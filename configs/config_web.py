@@ -0,0 +1,72 @@
+# configs/config_web.py
+
+"""
+Web serving configuration
+
+Purpose:
+- Runtime behaviour of the FastAPI backend (web/backend)
+- Request batching policy in front of the model
+"""
+
+import os
+
+from configs.shared import ROOT_DIR
+
+
+# =========================================================
+# Micro-batching (/api/predict)
+# =========================================================
+
+# Coalesce concurrent /api/predict requests into one padded forward pass
+MICRO_BATCH_ENABLED = True
+
+# How long the first request of a batch may wait for company (milliseconds)
+MICRO_BATCH_MAX_WAIT_MS = 10
+
+# Hard cap on requests per forward pass
+MICRO_BATCH_MAX_SIZE = 16
+
+# Pending requests allowed before /api/predict answers 503
+MICRO_BATCH_MAX_QUEUE = 256
+
+
+# =========================================================
+# Server processes (main/run_web.py --prod)
+# =========================================================
+
+HOST = "0.0.0.0"
+PORT = 8000
+
+# Number of uvicorn worker processes.
+# Overridden per launch through the env var set by main/run_web.py.
+WEB_WORKERS = int(os.environ.get("FAKENEWS_WEB_WORKERS", 1))
+
+# Load the model when a worker starts instead of on its first request
+PRELOAD_MODEL = os.environ.get("FAKENEWS_PRELOAD_MODEL", "0") == "1"
+
+
+# =========================================================
+# Inference executor (async /api/predict)
+# =========================================================
+
+# Intra-op threads used by torch for one forward pass (per worker process)
+TORCH_NUM_THREADS = int(
+    os.environ.get(
+        "FAKENEWS_TORCH_THREADS",
+        max(1, (os.cpu_count() or 1) // (2 * WEB_WORKERS)),
+    )
+)
+
+# Dedicated threads running CPU-bound inference (segmentation + forward).
+# Sized so that workers x executor threads x torch threads never
+# oversubscribe the CPU.
+INFER_EXECUTOR_WORKERS = max(
+    1, (os.cpu_count() or 1) // (TORCH_NUM_THREADS * WEB_WORKERS)
+)
+
+
+# =========================================================
+# Benchmark
+# =========================================================
+
+BENCHMARK_DIR = ROOT_DIR / "result" / "benchmark"
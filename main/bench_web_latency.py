@@ -0,0 +1,178 @@
+# main/bench_web_latency.py
+"""
+Latency of light routes while /api/predict is saturated.
+
+Measures GET / latency twice: on an idle server, then while N clients
+hammer POST /api/predict. Reports p50 / p95 / p99 for both, plus the
+predict throughput, and saves them to result/benchmark/web_latency.json.
+
+The default server is started as a separate process (main/run_web.py
+--prod), so the load clients and the probe never share its GIL.
+
+Usage:
+    python main/bench_web_latency.py                 # starts its own server
+    python main/bench_web_latency.py --workers 4
+    python main/bench_web_latency.py --url http://127.0.0.1:8000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+import requests
+
+from configs.config_web import BENCHMARK_DIR
+
+SAMPLE_NEWS = {
+    "title": "Thanh toán gần đây của bạn cho Spotify Premium không thành công",
+    "text": (
+        "Tài khoản của bạn đang bị hạn chế, vui lòng xác minh tại "
+        "https://security-check-vn.com/update. Google đã chặn một nỗ lực đăng nhập "
+        "vào tài khoản của bạn. Vui lòng kiểm tra hoạt động thiết bị và đổi mật khẩu ngay."
+    ),
+    "source": "email",
+}
+
+
+def _percentiles(latencies_ms: list) -> dict:
+    if not latencies_ms:
+        return {"count": 0}
+    arr = np.asarray(latencies_ms)
+    return {
+        "count": int(arr.size),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p95_ms": round(float(np.percentile(arr, 95)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+        "max_ms": round(float(arr.max()), 2),
+    }
+
+
+def _start_local_server(port: int, workers: int, timeout: float = 300.0):
+    """
+    main/run_web.py --prod in a child process; returns (url, process) once
+    GET / answers.
+    """
+    process = subprocess.Popen([
+        sys.executable, os.path.join(root_dir, "main", "run_web.py"),
+        "--prod", "--workers", str(workers),
+        "--host", "127.0.0.1", "--port", str(port),
+    ])
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            requests.get(f"{url}/", timeout=1).raise_for_status()
+            return url, process
+        except requests.RequestException:
+            time.sleep(0.5)
+
+    process.terminate()
+    raise TimeoutError(f"Server did not answer on {url} within {timeout:.0f}s")
+
+
+def _probe_index(url: str, duration: float, interval: float) -> list:
+    session = requests.Session()
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        session.get(f"{url}/").raise_for_status()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def _predict_client(url: str, stop: threading.Event, latencies: list, errors: list):
+    session = requests.Session()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = session.post(f"{url}/api/predict", json=SAMPLE_NEWS)
+        if r.status_code == 200:
+            latencies.append((time.perf_counter() - t0) * 1000)
+        else:
+            errors.append(r.status_code)
+
+
+def run_benchmark(url: str, clients: int, duration: float, interval: float) -> dict:
+    # Warm-up: load the model outside of the measured window
+    requests.post(f"{url}/api/predict", json=SAMPLE_NEWS).raise_for_status()
+
+    print(f"[Bench] GET / on idle server ({duration:.0f}s)...")
+    idle = _probe_index(url, duration, interval)
+
+    print(f"[Bench] GET / with {clients} clients on /api/predict ({duration:.0f}s)...")
+    stop = threading.Event()
+    predict_latencies, predict_errors = [], []
+    workers = [
+        threading.Thread(
+            target=_predict_client,
+            args=(url, stop, predict_latencies, predict_errors),
+            daemon=True,
+        )
+        for _ in range(clients)
+    ]
+    for w in workers:
+        w.start()
+    time.sleep(1.0)  # let the load ramp up
+
+    t0 = time.perf_counter()
+    loaded = _probe_index(url, duration, interval)
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    for w in workers:
+        w.join()
+
+    stats = requests.get(f"{url}/api/predict/stats").json()
+
+    return {
+        "clients": clients,
+        "duration_s": duration,
+        "index_idle": _percentiles(idle),
+        "index_under_load": _percentiles(loaded),
+        "predict": {
+            **_percentiles(predict_latencies),
+            "throughput_rps": round(len(predict_latencies) / elapsed, 2),
+            "errors": len(predict_errors),
+        },
+        "scheduler": stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p99 of GET / while /api/predict is under load")
+    parser.add_argument("--url", default=None, help="Target server (default: start one in a subprocess)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of the started server")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        url, server = _start_local_server(args.port, args.workers)
+    try:
+        report = run_benchmark(url, args.clients, args.duration, args.interval)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    out_path = os.path.join(BENCHMARK_DIR, "web_latency.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    print(json.dumps({k: v for k, v in report.items() if k != "scheduler"}, indent=2))
+    print(f"Saved report to {out_path}")
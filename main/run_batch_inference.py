@@ -0,0 +1,54 @@
+# main/run_batch_inference.py
+import argparse
+import json
+import os
+import sys
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, root_dir)
+
+import pandas as pd
+
+from src.infer.infer import NewsInferencer
+
+
+def load_inputs(input_path: str) -> list:
+    """
+    Load news items from a CSV or JSONL file (must contain a 'text' column/field).
+    """
+    if input_path.endswith(".jsonl"):
+        with open(input_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    df = pd.read_csv(input_path)
+    df = df.astype(object).where(pd.notnull(df), None)
+    return df.to_dict(orient="records")
+
+
+def run_batch_inference(input_path: str, output_path: str, chunk_size: int = 1024):
+    inferencer = NewsInferencer()
+    items = load_inputs(input_path)
+    print(f"Loaded {len(items)} items from {input_path}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            for item, result in zip(chunk, inferencer.infer_batch(chunk)):
+                record = {"id": item.get("id"), **result}
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            print(f"Scored {min(start + chunk_size, len(items))}/{len(items)}")
+
+    print(f"Saved results to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch re-scoring with NewsInferencer.infer_batch")
+    parser.add_argument("input", help="CSV or JSONL file with 'title' / 'text' fields")
+    parser.add_argument(
+        "--output",
+        default=os.path.join(root_dir, "result", "inference", "batch_predictions.jsonl"),
+    )
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    run_batch_inference(args.input, args.output, args.chunk_size)
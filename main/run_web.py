@@ -1,4 +1,5 @@
 # main/run_web.py
+import argparse
 import os
 import sys
 import uvicorn
@@ -6,14 +7,74 @@ import uvicorn
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, root_dir)
 
+from configs.config_web import HOST, PORT, WEB_WORKERS
+
+
+def prepare_artifacts():
+    """
+    Build the files derived from the checkpoint once, before the workers
+    start, instead of having every worker rebuild them concurrently.
+    """
+    from configs.config_infer import CASCADE_ENABLED, INFER_BACKEND, QUANTIZE_MODE
+
+    if CASCADE_ENABLED:
+        from src.infer.cascade import load_stage1
+
+        load_stage1()
+
+    if QUANTIZE_MODE == "int8" and INFER_BACKEND != "onnx":
+        from src.infer.quantize import load_quantized_model
+
+        load_quantized_model()
+
+    if INFER_BACKEND == "onnx":
+        from src.infer.onnx_export import export_onnx, is_onnx_stale
+
+        if is_onnx_stale():
+            export_onnx()
+
+
 def main():
-    print("Run backend...")
+    parser = argparse.ArgumentParser(description="Run the Fake News web backend")
+    parser.add_argument(
+        "--prod",
+        action="store_true",
+        help="Production mode: N worker processes, no auto-reload, model preloaded"
+    )
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads per worker")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    if not args.prod:
+        print("Run backend...")
+        uvicorn.run(
+            "web.backend.app:app",
+            host=args.host,
+            port=args.port,
+            reload=True
+        )
+        return
+
+    # Worker processes re-import configs/config_web.py: pass settings via env
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    os.environ["FAKENEWS_WEB_WORKERS"] = str(args.workers)
+    os.environ["FAKENEWS_TORCH_THREADS"] = str(threads)
+    os.environ["FAKENEWS_PRELOAD_MODEL"] = "1"
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+
+    prepare_artifacts()
+
+    print(f"Run backend (prod): {args.workers} workers x {threads} torch threads")
     uvicorn.run(
         "web.backend.app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False
     )
 
+
 if __name__ == "__main__":
     main()
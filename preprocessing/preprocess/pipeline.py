@@ -3,8 +3,7 @@
 import pandas as pd
 
 from .validators import validate_dataframe, validate_text
-from .text_cleaner import clean_text
-from .word_segmenter import segment_vi
+from .segment_cache import clean_and_segment, get_segment_cache
 from .augmentation import augment_text
 from .feature_extractor import extract_aux_features
 from configs.config_preprocess import (
@@ -33,11 +32,8 @@ def preprocess_row(row, mode: str):
     if not validate_text(raw_text):
         return None
 
-    # --- Cleaning ---
-    text = clean_text(raw_text)
-
-    # --- Word segmentation ---
-    text = segment_vi(text)
+    # --- Cleaning + word segmentation (persistent cache) ---
+    text = clean_and_segment(raw_text)
 
     # --- Token-length filter (AFTER segmentation) ---
     token_count = len(text.split())
@@ -76,4 +72,9 @@ def preprocess_dataframe(df: pd.DataFrame, mode: str = TRAIN_MODE) -> pd.DataFra
         if processed is not None:
             processed_rows.append(processed)
 
+    # Keep the segmentation cache within its size bound
+    cache = get_segment_cache()
+    if cache is not None:
+        cache.compact()
+
     return pd.DataFrame(processed_rows)
@@ -0,0 +1,209 @@
+# preprocessing/preprocess/segment_cache.py
+"""
+Persistent clean_text -> segment_vi cache (SQLite).
+
+Shared by preprocessing runs and the inference server (NewsInferencer),
+across processes. The key hashes the raw text together with the cleaner
+configuration (LOWERCASE_MODE, UNICODE_NORMAL_FORM) and a cache version,
+so changing the cleaner never serves a stale segmentation.
+
+Maintenance:
+    python preprocessing/preprocess/segment_cache.py --stats
+    python preprocessing/preprocess/segment_cache.py --compact [--max-entries N]
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+from preprocessing.preprocess.text_cleaner import clean_text
+from preprocessing.preprocess.word_segmenter import segment_vi
+from configs.config_preprocess import (
+    LOWERCASE_MODE,
+    UNICODE_NORMAL_FORM,
+    SEGMENT_CACHE_ENABLED,
+    SEGMENT_CACHE_PATH,
+    SEGMENT_CACHE_MAX_ENTRIES,
+)
+
+# Bump when text_cleaner.py / word_segmenter.py change behaviour
+SEGMENT_CACHE_VERSION = 1
+
+# Refresh last_used on a hit at most this often (avoid a write per read)
+_TOUCH_INTERVAL_SECONDS = 3600
+
+# Check the size bound every N inserts
+_COMPACT_CHECK_EVERY = 10000
+
+
+def cache_key(raw_text: str) -> str:
+    payload = (
+        f"v{SEGMENT_CACHE_VERSION}|{LOWERCASE_MODE}|{UNICODE_NORMAL_FORM}|{raw_text}"
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SegmentCache:
+    """
+    Key-value store: sha256(config + raw text) -> segmented text.
+    One SQLite connection per thread; WAL mode allows concurrent readers
+    from several processes (web workers + a preprocessing job).
+    """
+
+    def __init__(self, path=SEGMENT_CACHE_PATH, max_entries: int = SEGMENT_CACHE_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+        self._puts_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON segments(last_used)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # =====================================================
+    # ----------------- GET / PUT -------------------------
+    # =====================================================
+    def get(self, key: str):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, last_used FROM segments WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, last_used = row
+        now = time.time()
+        if now - last_used > _TOUCH_INTERVAL_SECONDS:
+            conn.execute("UPDATE segments SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return value
+
+    def put(self, key: str, value: str):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO segments (key, value, last_used) VALUES (?, ?, ?)",
+            (key, value, time.time()),
+        )
+        conn.commit()
+
+        # put() runs on every web worker thread: count under a lock so no
+        # increment is lost and exactly one caller triggers each compaction
+        with self._puts_lock:
+            self._puts += 1
+            due = self._puts % _COMPACT_CHECK_EVERY == 0
+        if due:
+            self.compact()
+
+    # =====================================================
+    # ----------------- MAINTENANCE -----------------------
+    # =====================================================
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def compact(self, max_entries: int = None, vacuum: bool = False) -> int:
+        """
+        Drop least-recently-used entries beyond `max_entries`.
+        Returns the number of deleted rows.
+        """
+        max_entries = self.max_entries if max_entries is None else max_entries
+        conn = self._conn()
+
+        excess = self.count() - max_entries
+        if excess <= 0:
+            return 0
+
+        conn.execute(
+            "DELETE FROM segments WHERE key IN ("
+            " SELECT key FROM segments ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        conn.commit()
+        if vacuum:
+            conn.execute("VACUUM")
+
+        print(f"[SegmentCache] Compacted: removed {excess} entries")
+        return excess
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "entries": self.count(),
+            "max_entries": self.max_entries,
+            "file_mb": round(os.path.getsize(self.path) / 1024 ** 2, 2)
+            if os.path.exists(self.path) else 0.0,
+        }
+
+
+# =========================================================
+# Shared entry point
+# =========================================================
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_segment_cache():
+    """
+    Process-wide SegmentCache, or None when disabled.
+    """
+    global _cache
+    if not SEGMENT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SegmentCache()
+    return _cache
+
+
+def clean_and_segment(raw_text: str) -> str:
+    """
+    clean_text + segment_vi, served from the persistent cache when possible.
+    """
+    cache = get_segment_cache()
+    if cache is None:
+        return segment_vi(clean_text(raw_text))
+
+    key = cache_key(raw_text)
+    segmented = cache.get(key)
+    if segmented is None:
+        segmented = segment_vi(clean_text(raw_text))
+        cache.put(key, segmented)
+    return segmented
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Segmentation cache maintenance")
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--max-entries", type=int, default=SEGMENT_CACHE_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    cache = SegmentCache()
+    if args.compact:
+        cache.compact(args.max_entries, vacuum=True)
+    print(cache.stats())
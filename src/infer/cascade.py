@@ -0,0 +1,267 @@
+# infer/cascade.py
+"""
+Cheap first-stage classifier in front of PhoBERT.
+
+Stage 1 = hashed word n-grams (HashingVectorizer, no vocabulary to store)
++ TF-IDF weighting + linear model (SGD, log loss), trained on
+CASCADE_TRAIN_PATH. It reads the *cleaned* text: no word segmentation and no
+tokenizer, so it costs well under a millisecond per item. Training text is
+the segmented CSV text with the "_" word joints removed, which matches what
+clean_text produces at inference time.
+
+NewsInferencer (CASCADE_ENABLED) answers an item with the stage-1
+probabilities when they reach the threshold of the predicted label
+(CASCADE_THRESHOLD / CASCADE_CLASS_THRESHOLDS); everything else is escalated
+to PhoBERT.
+
+The fitted pipeline is cached at CASCADE_MODEL_PATH and retrained when the
+training CSV or the feature settings change.
+
+Report on the test split (escalation rate, latency / throughput gain,
+agreement with PhoBERT-only, threshold sweep):
+    python src/infer/cascade.py
+"""
+import os
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+from typing import List
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from src.utils.checkpoint import file_fingerprint
+from configs.config_infer import (
+    NUM_CLASSES,
+    LABEL2ID,
+    CASCADE_MODEL_PATH,
+    CASCADE_TRAIN_PATH,
+    CASCADE_NGRAM_RANGE,
+    CASCADE_N_FEATURES,
+    CASCADE_THRESHOLD,
+    CASCADE_CLASS_THRESHOLDS,
+)
+from configs.shared import RANDOM_SEED
+
+
+def stage1_text(title: str, text: str) -> str:
+    """
+    Stage-1 input: the same "title. text" string NewsInferencer segments,
+    only cleaned.
+    """
+    from preprocessing.preprocess.text_cleaner import clean_text
+
+    return clean_text(f"{title}. {text}".strip())
+
+
+def _settings() -> dict:
+    return {
+        "ngram_range": list(CASCADE_NGRAM_RANGE),
+        "n_features": CASCADE_N_FEATURES,
+        "num_classes": NUM_CLASSES,
+    }
+
+
+# =========================================================
+# Training / loading
+# =========================================================
+
+def build_pipeline() -> Pipeline:
+    return Pipeline([
+        ("hash", HashingVectorizer(
+            ngram_range=tuple(CASCADE_NGRAM_RANGE),
+            n_features=CASCADE_N_FEATURES,
+            alternate_sign=False,
+            norm=None,
+        )),
+        ("tfidf", TfidfTransformer(sublinear_tf=True)),
+        ("clf", SGDClassifier(
+            loss="log_loss",
+            alpha=1e-5,
+            max_iter=20,
+            tol=None,
+            random_state=RANDOM_SEED,
+        )),
+    ])
+
+
+def train_stage1(train_path=CASCADE_TRAIN_PATH) -> Pipeline:
+    df = pd.read_csv(train_path, usecols=["text", "label"])
+    texts = df["text"].astype(str).str.replace("_", " ", regex=False)
+
+    t0 = time.perf_counter()
+    pipeline = build_pipeline().fit(texts, df["label"].astype(int))
+    print(f"[Cascade] Stage 1 trained on {len(df)} rows in {time.perf_counter() - t0:.1f}s")
+    return pipeline
+
+
+def load_stage1(model_path=CASCADE_MODEL_PATH, train_path=CASCADE_TRAIN_PATH) -> "CascadeStage1":
+    """
+    Stage 1 from the on-disk cache when it was trained on the same CSV with
+    the same settings; otherwise retrain and rewrite the cache.
+    """
+    source = {"train": file_fingerprint(train_path), "settings": _settings()}
+
+    if os.path.exists(model_path):
+        cached = joblib.load(model_path)
+        if cached.get("source") == source:
+            return CascadeStage1(cached["pipeline"])
+        print(f"[Cascade] Cache {model_path} is stale, retraining")
+
+    pipeline = train_stage1(train_path)
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    tmp_path = f"{model_path}.tmp-{os.getpid()}"
+    joblib.dump({"source": source, "pipeline": pipeline}, tmp_path)
+    os.replace(tmp_path, model_path)
+    print(f"[Cascade] Saved stage 1 to {model_path}")
+
+    return CascadeStage1(pipeline)
+
+
+# =========================================================
+# Routing
+# =========================================================
+
+class CascadeStage1:
+    """
+    Fitted stage-1 pipeline + per-label answer thresholds.
+    """
+
+    def __init__(self, pipeline: Pipeline, thresholds: dict = None):
+        self.pipeline = pipeline
+        self.classes = pipeline.named_steps["clf"].classes_
+
+        thresholds = CASCADE_CLASS_THRESHOLDS if thresholds is None else thresholds
+        self.thresholds = np.full(NUM_CLASSES, CASCADE_THRESHOLD, dtype=np.float64)
+        for label, value in thresholds.items():
+            self.thresholds[LABEL2ID[label]] = value
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        [len(texts), NUM_CLASSES] probabilities (labels absent from the
+        training CSV get 0).
+        """
+        probs = np.zeros((len(texts), NUM_CLASSES), dtype=np.float64)
+        if texts:
+            probs[:, self.classes] = self.pipeline.predict_proba(texts)
+        return probs
+
+    def confident(self, probs: np.ndarray) -> np.ndarray:
+        """
+        Boolean mask of the rows stage 1 may answer on its own.
+        """
+        best = probs.argmax(axis=1)
+        return probs[np.arange(len(probs)), best] >= self.thresholds[best]
+
+
+# =========================================================
+# Cascade vs PhoBERT-only report
+# =========================================================
+
+SWEEP_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def report_cascade() -> dict:
+    import torch
+    from sklearn.metrics import accuracy_score, f1_score
+
+    from src.infer.infer import NewsInferencer
+    from src.train.evaluate import TEST_PATH
+    from src.utils.benchmark import save_report
+    from configs.config_infer import INFER_BATCH_SIZE
+
+    df = pd.read_csv(TEST_PATH)
+    labels = df["label"].astype(int).tolist()
+    # Raw-looking inputs: the segmented test text without "_" joints
+    items = [
+        {"title": "", "text": t.replace("_", " ")} for t in df["text"].astype(str)
+    ]
+
+    inferencer = NewsInferencer()
+    inferencer.cache = None  # time the model, not the prediction cache
+    stage1 = inferencer.cascade or load_stage1()
+
+    def run(cascade):
+        inferencer.cascade = cascade
+        preds, sources = [], []
+        t0 = time.perf_counter()
+        for start in range(0, len(items), INFER_BATCH_SIZE):
+            for result in inferencer.infer_batch(items[start:start + INFER_BATCH_SIZE]):
+                top = result["prediction"]["top_predictions"][0]["label"]
+                preds.append(LABEL2ID[top])
+                sources.append(result["prediction"]["source"])
+        return preds, sources, time.perf_counter() - t0
+
+    # Untimed pass: fills the segmentation cache for both timed runs
+    phobert_preds, _, _ = run(None)
+    _, _, phobert_seconds = run(None)
+    cascade_preds, sources, cascade_seconds = run(stage1)
+
+    answered = [s == "cascade" for s in sources]
+    n = len(items)
+
+    # Stage 1 alone, and the same routing replayed for other thresholds
+    t0 = time.perf_counter()
+    stage1_probs = stage1.predict_proba([stage1_text(i["title"], i["text"]) for i in items])
+    stage1_ms = (time.perf_counter() - t0) * 1000 / max(n, 1)
+    stage1_preds = stage1_probs.argmax(axis=1)
+    stage1_best = stage1_probs.max(axis=1)
+
+    sweep = []
+    for threshold in SWEEP_THRESHOLDS:
+        mask = stage1_best >= threshold
+        routed = np.where(mask, stage1_preds, phobert_preds)
+        sweep.append({
+            "threshold": threshold,
+            "escalation_rate": round(1 - float(mask.mean()), 4),
+            "agreement_with_phobert": round(float((routed == np.asarray(phobert_preds)).mean()), 4),
+            "macro_f1": round(f1_score(labels, routed, average="macro"), 4),
+        })
+
+    def agreement(a, b, mask=None):
+        pairs = [(x, y) for k, (x, y) in enumerate(zip(a, b)) if mask is None or mask[k]]
+        return round(sum(x == y for x, y in pairs) / len(pairs), 4) if pairs else None
+
+    report = {
+        "num_test_samples": n,
+        "thresholds": {
+            "default": CASCADE_THRESHOLD,
+            "per_label": CASCADE_CLASS_THRESHOLDS,
+        },
+        "escalation_rate": round(1 - sum(answered) / max(n, 1), 4),
+        "stage1_ms_per_item": round(stage1_ms, 4),
+        "phobert_only": {
+            "seconds": round(phobert_seconds, 3),
+            "items_per_s": round(n / phobert_seconds, 2),
+            "accuracy": round(accuracy_score(labels, phobert_preds), 4),
+            "macro_f1": round(f1_score(labels, phobert_preds, average="macro"), 4),
+        },
+        "cascade": {
+            "seconds": round(cascade_seconds, 3),
+            "items_per_s": round(n / cascade_seconds, 2),
+            "accuracy": round(accuracy_score(labels, cascade_preds), 4),
+            "macro_f1": round(f1_score(labels, cascade_preds, average="macro"), 4),
+        },
+        "speedup": round(phobert_seconds / cascade_seconds, 3),
+        "agreement_with_phobert": {
+            "all": agreement(cascade_preds, phobert_preds),
+            "answered_by_stage1": agreement(cascade_preds, phobert_preds, answered),
+        },
+        "stage1_only_macro_f1": round(f1_score(labels, stage1_preds, average="macro"), 4),
+        "threshold_sweep": sweep,
+        "torch_threads": torch.get_num_threads(),
+    }
+    print(report)
+    save_report("cascade", report)
+    return report
+
+
+if __name__ == "__main__":
+    report_cascade()
@@ -1,13 +1,13 @@
 # infer/infer.py
 import os
+import re
 import sys
 from typing import Dict, Any, List
 
 import torch
-import torch.nn.functional as F
 from transformers import AutoTokenizer
 
-from src.model.model import PhoBERTClassifier
+from src.model.model import PhoBERTClassifier, unpack_checkpoint
 from configs.config_infer import (
     MODEL_NAME,
     CHECKPOINT_PATH,
@@ -19,14 +19,48 @@ from configs.config_infer import (
     CONFIDENCE_MEDIUM,
     RETURN_TOP_K,
     ENABLE_EXPLAIN,
+    INFER_BATCH_SIZE,
+    MMAP_WEIGHTS,
+    QUANTIZE_MODE,
+    INFER_BACKEND,
+    ENABLE_PREDICTION_CACHE,
+    PREDICTION_CACHE_MAX_BYTES,
+    PREDICTION_CACHE_TTL_SECONDS,
+    SUSPICIOUS_KEYWORDS_PATH,
+    TRUNCATION_AWARE_PREPROCESS,
+    PREPROCESS_CHARS_PER_TOKEN,
+    PREPROCESS_BUDGET_MARGIN,
+    PREPROCESS_TOKEN_MARGIN,
+    PREPROCESS_MAX_ROUNDS,
+    CHUNKED_INFERENCE,
+    MAX_WINDOWS,
+    WINDOW_STRIDE,
+    WINDOW_AGGREGATION,
+    AUTOCAST_DTYPE,
+    CASCADE_ENABLED,
+    EARLY_EXIT,
+    EARLY_EXIT_HEADS_PATH,
+    EARLY_EXIT_THRESHOLD,
+)
+from src.infer.phrase_extractor import extract_suspicious_phrases, reload_keywords
+from src.infer.prediction_cache import PredictionCache
+from src.infer.long_document import (
+    WINDOW_AGGREGATIONS,
+    aggregate_windows,
+    split_windows,
+    window_token_budget,
 )
-from src.infer.phrase_extractor import extract_suspicious_phrases
 from src.infer.eda_loader import EDAStats
+from src.infer.vocab_prune import wrap_tokenizer
+from src.utils.precision import autocast, is_fp32_state_dict, resolve_dtype
 
 # ------------------- PATH -------------------
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 sys.path.insert(0, root_dir)
 
+# Last whitespace character of a string (only non-space after it)
+_LAST_WHITESPACE = re.compile(r"\s\S*\Z")
+
 
 class NewsInferencer:
     """
@@ -34,23 +68,148 @@ class NewsInferencer:
     """
 
     def __init__(self):
-        # -------- tokenizer --------
-        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        # -------- tokenizer (remapped ids for a pruned vocabulary) --------
+        self.tokenizer = wrap_tokenizer(AutoTokenizer.from_pretrained(MODEL_NAME), CHECKPOINT_PATH)
 
         # -------- model --------
-        self.model = PhoBERTClassifier(
-            model_name=MODEL_NAME,
-            num_classes=NUM_CLASSES
-        )
-        self.model.load_state_dict(
-            torch.load(CHECKPOINT_PATH, map_location=DEVICE)
-        )
-        self.model.to(DEVICE)
-        self.model.eval()
+        self.model = self._load_model()
+
+        # -------- long documents --------
+        self.token_budget = MAX_SEQ_LENGTH
+        window_mode = "truncate"
+        if CHUNKED_INFERENCE:
+            if WINDOW_AGGREGATION not in WINDOW_AGGREGATIONS:
+                raise ValueError(f"Unknown WINDOW_AGGREGATION: {WINDOW_AGGREGATION}")
+            if WINDOW_AGGREGATION == "attention" and not hasattr(self.model, "encode"):
+                raise ValueError(
+                    "WINDOW_AGGREGATION='attention' needs INFER_BACKEND='torch' "
+                    "and EARLY_EXIT=False"
+                )
+            self.token_budget = window_token_budget()
+            window_mode = f"{WINDOW_AGGREGATION}:{WINDOW_STRIDE}:{MAX_WINDOWS}"
+
+        # -------- cascade (cheap first stage) --------
+        self.cascade = None
+        if CASCADE_ENABLED:
+            from src.infer.cascade import load_stage1
+
+            self.cascade = load_stage1()
 
         # -------- EDA --------
         self.eda = EDAStats()
 
+        # -------- prediction cache --------
+        self.cache = None
+        if ENABLE_PREDICTION_CACHE:
+            watch_paths = [CHECKPOINT_PATH, SUSPICIOUS_KEYWORDS_PATH]
+            if EARLY_EXIT:
+                watch_paths.append(EARLY_EXIT_HEADS_PATH)
+            self.cache = PredictionCache(
+                max_bytes=PREDICTION_CACHE_MAX_BYTES,
+                ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+                watch_paths=watch_paths,
+                identity_extra=(
+                    f"{INFER_BACKEND}:{QUANTIZE_MODE}:{AUTOCAST_DTYPE}:"
+                    f"{MAX_SEQ_LENGTH}:{window_mode}:"
+                    f"{f'exit{EARLY_EXIT_THRESHOLD}' if EARLY_EXIT else 'full'}"
+                ),
+            )
+            self.cache.on_invalidate.append(reload_keywords)
+
+    # =====================================================
+    # ----------------- MODEL LOADING ---------------------
+    # =====================================================
+    def _load_model(self):
+        """
+        Build the inference engine selected by INFER_BACKEND:
+        - "torch"    : the classifier itself (see _load_torch_model)
+        - "compiled" : the same classifier traced per (batch, seq) bucket,
+                       all buckets warmed up here, before any traffic
+        - "onnx"     : an ONNX Runtime session
+        With EARLY_EXIT the torch classifier is wrapped with its exit heads.
+        """
+        if resolve_dtype(AUTOCAST_DTYPE) is not None and (
+            INFER_BACKEND != "torch" or QUANTIZE_MODE is not None
+        ):
+            raise ValueError(
+                "AUTOCAST_DTYPE needs INFER_BACKEND='torch' and QUANTIZE_MODE=None"
+            )
+
+        if INFER_BACKEND == "onnx":
+            from src.infer.onnx_backend import load_onnx_model
+
+            if QUANTIZE_MODE is not None:
+                raise ValueError("QUANTIZE_MODE is not supported with INFER_BACKEND='onnx'")
+            return load_onnx_model()
+
+        if INFER_BACKEND not in ("torch", "compiled"):
+            raise ValueError(f"Unknown INFER_BACKEND: {INFER_BACKEND}")
+
+        model = self._load_torch_model()
+
+        if EARLY_EXIT:
+            from src.model.early_exit import load_early_exit
+
+            if INFER_BACKEND != "torch":
+                raise ValueError("EARLY_EXIT needs INFER_BACKEND='torch'")
+            return load_early_exit(
+                model, EARLY_EXIT_HEADS_PATH, EARLY_EXIT_THRESHOLD, checkpoint_path=CHECKPOINT_PATH
+            )
+
+        if INFER_BACKEND == "compiled":
+            from src.infer.compiled_engine import BucketedTracedClassifier
+
+            return BucketedTracedClassifier(model, self.tokenizer.pad_token_id).warmup()
+
+        return model
+
+    @staticmethod
+    def _load_torch_model() -> PhoBERTClassifier:
+        """
+        Build the classifier and load the fine-tuned checkpoint.
+
+        With MMAP_WEIGHTS (CPU only) the checkpoint is memory-mapped and the
+        parameters point directly at the mapped pages instead of a private
+        copy. Every worker process mapping the same file then shares those
+        read-only pages through the OS page cache.
+
+        With QUANTIZE_MODE = "int8" the cached dynamic-INT8 model is used.
+        """
+        if QUANTIZE_MODE == "int8":
+            from src.infer.quantize import load_quantized_model
+
+            if DEVICE.type != "cpu":
+                raise ValueError("QUANTIZE_MODE='int8' is only supported on CPU")
+            return load_quantized_model()
+
+        if QUANTIZE_MODE is not None:
+            raise ValueError(f"Unknown QUANTIZE_MODE: {QUANTIZE_MODE}")
+
+        use_mmap = MMAP_WEIGHTS and DEVICE.type == "cpu"
+
+        # Plain state dict, or a resized encoder (distilled student)
+        state_dict, encoder_config = unpack_checkpoint(
+            torch.load(CHECKPOINT_PATH, map_location=DEVICE, mmap=use_mmap)
+        )
+
+        # Architecture only: every weight comes from the checkpoint
+        model = PhoBERTClassifier(
+            model_name=MODEL_NAME,
+            num_classes=NUM_CLASSES,
+            pretrained=False,
+            encoder_config=encoder_config
+        )
+
+        # bf16 checkpoint (CHECKPOINT_DTYPE): assigning would make the model
+        # bf16, so copy into the fp32 parameters instead (no page sharing)
+        if use_mmap and not is_fp32_state_dict(state_dict):
+            use_mmap = False
+        model.load_state_dict(state_dict, assign=use_mmap)
+
+        model.to(DEVICE)
+        model.eval()
+        return model
+
     # =====================================================
     # ----------------- AUX FEATURE COMPUTE --------------
     # =====================================================
@@ -85,54 +244,116 @@ class NewsInferencer:
     # =====================================================
     # ----------------- PREPROCESS ------------------------
     # =====================================================
-    def _preprocess_text(self, title: str, text: str):
+    def _preprocess_text(self, title: str, text: str, token_budget: int = MAX_SEQ_LENGTH):
         raw_text = f"{title}. {text}".strip()
 
-        # -------- clean & segment --------
-        from preprocessing.preprocess.text_cleaner import clean_text
-        from preprocessing.preprocess.word_segmenter import segment_vi
+        # -------- clean & segment (persistent cache) --------
+        from preprocessing.preprocess.segment_cache import clean_and_segment
         from preprocessing.preprocess.pipeline import format_phobert_input
 
-        cleaned = clean_text(raw_text)
-        segmented = segment_vi(cleaned)
+        if not TRUNCATION_AWARE_PREPROCESS:
+            segmented = clean_and_segment(raw_text)
+            return format_phobert_input(segmented), segmented
+
+        # -------- only the prefix that fits in the token budget --------
+        # Enough tokens past the budget that the words near the cut cannot
+        # change the first `token_budget` ones; after PREPROCESS_MAX_ROUNDS
+        # longer prefixes, the whole document is processed.
+        target_tokens = token_budget + PREPROCESS_TOKEN_MARGIN
+        budget_chars = int(token_budget * PREPROCESS_CHARS_PER_TOKEN * PREPROCESS_BUDGET_MARGIN)
+        for _ in range(PREPROCESS_MAX_ROUNDS):
+            prefix = self._cut_at_whitespace(raw_text, budget_chars)
+            if len(prefix) == len(raw_text):
+                break
+
+            segmented = clean_and_segment(prefix)
+            num_tokens = len(
+                self.tokenizer(segmented, add_special_tokens=False)["input_ids"]
+            )
+            if num_tokens >= target_tokens:
+                return format_phobert_input(segmented), segmented
+
+            # Denser text than estimated: take a longer prefix
+            budget_chars *= 2
 
-        phobert_text = format_phobert_input(segmented)
+        segmented = clean_and_segment(raw_text)
+        return format_phobert_input(segmented), segmented
 
-        return phobert_text, segmented
+    @staticmethod
+    def _cut_at_whitespace(text: str, max_chars: int) -> str:
+        """
+        Prefix of at most `max_chars`, not cutting a word / URL in half
+        (any whitespace counts as a boundary, as in str.split()).
+        """
+        if len(text) <= max_chars:
+            return text
+        match = _LAST_WHITESPACE.search(text, 0, max_chars)
+        return text[:match.start() if match and match.start() > 0 else max_chars]
 
     # =====================================================
-    # ----------------- INFER -----------------------------
+    # ----------------- WINDOWS ---------------------------
     # =====================================================
-    def infer(self, input_json: Dict[str, Any]) -> Dict[str, Any]:
+    def _make_windows(self, phobert_text: str) -> List[List[int]]:
         """
-        Perform inference on a single news item with uncertainty awareness.
+        Token ids of the model inputs for ONE document:
+        the truncated text, or up to MAX_WINDOWS overlapping windows
+        when CHUNKED_INFERENCE is on.
         """
+        if not CHUNKED_INFERENCE:
+            return [
+                self.tokenizer(
+                    phobert_text,
+                    truncation=True,
+                    max_length=MAX_SEQ_LENGTH,
+                )["input_ids"]
+            ]
 
-        title = input_json.get("title", "")
-        text = input_json.get("text")
-        if not text:
-            raise ValueError("Input must contain 'text' field")
-
-        phobert_text, segmented_text = self._preprocess_text(title, text)
-        aux_features = self._compute_aux_features(input_json, segmented_text)
+        body_ids = self.tokenizer(phobert_text, add_special_tokens=False)["input_ids"]
+        return split_windows(
+            body_ids[:self.token_budget],
+            self.tokenizer.bos_token_id,
+            self.tokenizer.eos_token_id,
+        )
 
-        # -------- tokenize --------
-        encoded = self.tokenizer(
-            phobert_text,
+    # =====================================================
+    # ----------------- MODEL FORWARD ---------------------
+    # =====================================================
+    def _run_windows(self, windows: List[List[int]], with_cls: bool = False):
+        """
+        Pad token id lists to the longest one and run them in one forward pass.
+        Returns (logits on CPU, cls on DEVICE); cls is None unless `with_cls`.
+        """
+        encoded = self.tokenizer.pad(
+            {"input_ids": windows},
+            padding="longest",
             return_tensors="pt",
-            padding=True,
-            truncation=True,
-            max_length=MAX_SEQ_LENGTH,
         )
-        encoded = {k: v.to(DEVICE) for k, v in encoded.items()}
+        input_ids = encoded["input_ids"].to(DEVICE)
+        attention_mask = encoded["attention_mask"].to(DEVICE)
 
-        # -------- model inference --------
-        with torch.no_grad():
-            logits = self.model(
-                input_ids=encoded["input_ids"],
-                attention_mask=encoded["attention_mask"],
-            )
-            probs = F.softmax(logits, dim=-1).squeeze(0)
+        with torch.no_grad(), autocast(DEVICE, AUTOCAST_DTYPE):
+            if not with_cls:
+                logits = self.model(input_ids=input_ids, attention_mask=attention_mask)
+                return logits.float().cpu(), None
+
+            # Same computation as forward(), keeping the CLS vectors (dropout is a no-op in eval)
+            cls = self.model.encode(input_ids, attention_mask)
+            return self.model.classifier(cls).float().cpu(), cls.float()
+
+    # =====================================================
+    # ----------------- POSTPROCESS -----------------------
+    # =====================================================
+    def _build_result(
+        self,
+        probs: torch.Tensor,
+        text: str,
+        aux_features: Dict[str, Any],
+        source: str = "phobert"
+    ) -> Dict[str, Any]:
+        """
+        Turn the probability vector of ONE item into the public result dict.
+        `source`: model that produced `probs` ("phobert" / "cascade").
+        """
 
         # -------- top-k predictions --------
         top_probs, top_ids = torch.topk(probs, k=min(RETURN_TOP_K, len(probs)))
@@ -173,6 +394,130 @@ class NewsInferencer:
                 "confidence": best_prob,
                 "confidence_level": confidence_level,
                 "top_predictions": top_predictions,
+                "source": source,
             },
             "explanation": explanation,
         }
+
+    # =====================================================
+    # ----------------- INFER -----------------------------
+    # =====================================================
+    def infer(self, input_json: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Perform inference on a single news item with uncertainty awareness.
+        """
+        if not input_json.get("text"):
+            raise ValueError("Input must contain 'text' field")
+
+        return self.infer_batch([input_json])[0]
+
+    # =====================================================
+    # ----------------- INFER BATCH -----------------------
+    # =====================================================
+    def infer_batch(self, input_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Perform inference on many news items at once.
+
+        Every item becomes one model input (or several windows with
+        CHUNKED_INFERENCE). Inputs are sorted by token length and cut into
+        buckets of INFER_BATCH_SIZE; each bucket is padded only to its own
+        longest sequence and run in one forward pass. Window outputs are then
+        aggregated per item. Results are returned in the original order.
+        Cached items skip preprocessing and the forward pass entirely; with
+        CASCADE_ENABLED, items the first stage is confident about too.
+        """
+        if not input_list:
+            return []
+
+        texts: List[str] = [None] * len(input_list)
+        aux_list: List[Dict[str, Any]] = [None] * len(input_list)
+        windows: Dict[int, List[List[int]]] = {}
+        cache_keys: Dict[int, str] = {}
+        results: List[Dict[str, Any]] = [None] * len(input_list)
+        pending: List[int] = []
+
+        # -------- prediction cache --------
+        for i, input_json in enumerate(input_list):
+            title = input_json.get("title", "")
+            text = input_json.get("text")
+            if not text:
+                raise ValueError(f"Input #{i} must contain 'text' field")
+            texts[i] = text
+
+            if self.cache is not None:
+                cache_keys[i] = self.cache.make_key(title, text)
+                cached = self.cache.get(cache_keys[i])
+                if cached is not None:
+                    aux_list[i] = self._compute_aux_features(input_json, None)
+                    results[i] = self._build_result(torch.tensor(cached), text, aux_list[i])
+                    continue
+            pending.append(i)
+
+        # -------- cascade: confident items never reach PhoBERT --------
+        if self.cascade is not None and pending:
+            from src.infer.cascade import stage1_text
+
+            stage1_probs = self.cascade.predict_proba([
+                stage1_text(input_list[i].get("title", ""), texts[i]) for i in pending
+            ])
+            confident = self.cascade.confident(stage1_probs)
+
+            escalated = []
+            for i, probs, answer in zip(pending, stage1_probs, confident):
+                if not answer:
+                    escalated.append(i)
+                    continue
+                aux_list[i] = self._compute_aux_features(input_list[i], None)
+                results[i] = self._build_result(
+                    torch.tensor(probs, dtype=torch.float), texts[i], aux_list[i], source="cascade"
+                )
+            pending = escalated
+
+        # -------- preprocess + tokenize (no padding yet) --------
+        for i in pending:
+            input_json = input_list[i]
+            title = input_json.get("title", "")
+            text = texts[i]
+
+            phobert_text, segmented_text = self._preprocess_text(
+                title, text, token_budget=self.token_budget
+            )
+
+            aux_list[i] = self._compute_aux_features(input_json, segmented_text)
+            windows[i] = self._make_windows(phobert_text)
+
+        # -------- flatten windows, contiguous per item --------
+        flat = [w for i in windows for w in windows[i]]
+        with_cls = CHUNKED_INFERENCE and WINDOW_AGGREGATION == "attention"
+        flat_logits: List[torch.Tensor] = [None] * len(flat)
+        flat_cls: List[torch.Tensor] = [None] * len(flat)
+
+        # -------- length buckets --------
+        order = sorted(range(len(flat)), key=lambda k: len(flat[k]))
+
+        for start in range(0, len(order), INFER_BATCH_SIZE):
+            bucket = order[start:start + INFER_BATCH_SIZE]
+            logits, cls = self._run_windows([flat[k] for k in bucket], with_cls)
+
+            for row, k in enumerate(bucket):
+                flat_logits[k] = logits[row]
+                if cls is not None:
+                    flat_cls[k] = cls[row]
+
+        # -------- aggregate windows per item --------
+        pos = 0
+        for i in windows:
+            n = len(windows[i])
+            probs = aggregate_windows(
+                torch.stack(flat_logits[pos:pos + n]),
+                WINDOW_AGGREGATION,
+                torch.stack(flat_cls[pos:pos + n]) if with_cls else None,
+                self.model.classifier if with_cls else None,
+            )
+            pos += n
+
+            if i in cache_keys:
+                self.cache.put(cache_keys[i], probs.tolist())
+            results[i] = self._build_result(probs, texts[i], aux_list[i])
+
+        return results
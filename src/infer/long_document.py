@@ -0,0 +1,192 @@
+# infer/long_document.py
+"""
+Sliding-window inference for documents longer than MAX_SEQ_LENGTH.
+
+The segmented text is split into overlapping windows of MAX_SEQ_LENGTH
+subword tokens (<s> ... </s> included), capped at MAX_WINDOWS. All windows
+run in the same batched forward pass; their outputs are aggregated into
+one probability vector per document:
+
+- "max_prob"  : the most confident window wins
+- "mean"      : average of the window probabilities
+- "attention" : window CLS vectors are pooled with softmax weights over each
+                window's top logit, then classified once (torch backend only)
+
+Run as a script to measure it on long documents of the test split:
+    python src/infer/long_document.py
+"""
+import os
+import sys
+import time
+from typing import List, Optional
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import torch
+import torch.nn.functional as F
+
+from configs.config_infer import MAX_SEQ_LENGTH, WINDOW_STRIDE, MAX_WINDOWS
+
+WINDOW_AGGREGATIONS = ("max_prob", "mean", "attention")
+
+
+def window_token_budget(max_windows: int = MAX_WINDOWS) -> int:
+    """
+    Number of body tokens covered by `max_windows` windows.
+    """
+    body_len = MAX_SEQ_LENGTH - 2
+    return body_len + WINDOW_STRIDE * (max_windows - 1)
+
+
+def split_windows(
+    body_ids: List[int],
+    bos_id: int,
+    eos_id: int,
+    max_windows: int = MAX_WINDOWS,
+) -> List[List[int]]:
+    """
+    Split token ids (without special tokens) into overlapping windows.
+    """
+    body_len = MAX_SEQ_LENGTH - 2
+    windows = []
+    start = 0
+    while len(windows) < max_windows:
+        windows.append([bos_id] + body_ids[start:start + body_len] + [eos_id])
+        if start + body_len >= len(body_ids):
+            break
+        start += WINDOW_STRIDE
+    return windows
+
+
+def aggregate_windows(
+    logits: torch.Tensor,
+    method: str,
+    cls: Optional[torch.Tensor] = None,
+    classifier: Optional[torch.nn.Module] = None,
+) -> torch.Tensor:
+    """
+    Combine the window logits of ONE document [num_windows, C] into probabilities [C].
+    """
+    probs = F.softmax(logits, dim=-1)
+    if logits.size(0) == 1:
+        return probs[0]
+
+    if method == "max_prob":
+        return probs[probs.max(dim=-1).values.argmax()]
+
+    if method == "mean":
+        return probs.mean(dim=0)
+
+    if method == "attention":
+        if cls is None or classifier is None:
+            raise ValueError("'attention' aggregation needs window CLS vectors")
+        weights = F.softmax(logits.max(dim=-1).values, dim=0).to(cls.device)
+        pooled = (weights.unsqueeze(-1) * cls).sum(dim=0, keepdim=True)
+        with torch.no_grad():
+            return F.softmax(classifier(pooled), dim=-1)[0].cpu()
+
+    raise ValueError(f"Unknown WINDOW_AGGREGATION: {method}")
+
+
+# =========================================================
+# Report on long documents of the test split
+# =========================================================
+
+def report_long_documents(max_windows: int = MAX_WINDOWS) -> dict:
+    """
+    On test documents longer than MAX_SEQ_LENGTH, compare the truncated
+    prediction with each aggregation rule, and measure the latency cost of
+    every extra window.
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.metrics import accuracy_score, f1_score
+
+    from src.infer.infer import NewsInferencer
+    from src.train.evaluate import TEST_PATH
+    from src.utils.benchmark import save_report
+
+    inferencer = NewsInferencer()
+    tokenizer = inferencer.tokenizer
+    df = pd.read_csv(TEST_PATH)
+
+    # "attention" needs the window CLS vectors: torch backend without early exit
+    with_cls = hasattr(inferencer.model, "encode")
+    methods = [m for m in WINDOW_AGGREGATIONS if with_cls or m != "attention"]
+    if not with_cls:
+        print("[LongDoc] 'attention' aggregation skipped (needs INFER_BACKEND='torch', EARLY_EXIT=False)")
+
+    labels, truncated_preds = [], []
+    preds = {m: [] for m in methods}
+    latency_by_windows = {}
+
+    for text, label in zip(df["text"].astype(str), df["label"].astype(int)):
+        body_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        if len(body_ids) <= MAX_SEQ_LENGTH - 2:
+            continue
+
+        windows = split_windows(
+            body_ids[:window_token_budget(max_windows)],
+            tokenizer.bos_token_id,
+            tokenizer.eos_token_id,
+            max_windows,
+        )
+
+        # Truncated baseline = first window only
+        t0 = time.perf_counter()
+        logits, cls = inferencer._run_windows(windows[:1], with_cls=False)
+        truncated_ms = (time.perf_counter() - t0) * 1000
+        truncated_preds.append(int(logits.argmax(dim=-1)[0]))
+
+        t0 = time.perf_counter()
+        logits, cls = inferencer._run_windows(windows, with_cls=with_cls)
+        windowed_ms = (time.perf_counter() - t0) * 1000
+
+        classifier = inferencer.model.classifier if with_cls else None
+        for method in methods:
+            probs = aggregate_windows(logits, method, cls, classifier)
+            preds[method].append(int(probs.argmax()))
+
+        labels.append(label)
+        latency_by_windows.setdefault(len(windows), []).append(
+            (truncated_ms, windowed_ms)
+        )
+
+    if not labels:
+        print("No test document is longer than MAX_SEQ_LENGTH")
+        return {}
+
+    latency_rows = []
+    for n, pairs in sorted(latency_by_windows.items()):
+        pairs = np.asarray(pairs)
+        extra = pairs[:, 1].mean() - pairs[:, 0].mean()
+        latency_rows.append({
+            "num_windows": n,
+            "num_docs": len(pairs),
+            "truncated_mean_ms": round(float(pairs[:, 0].mean()), 2),
+            "windowed_mean_ms": round(float(pairs[:, 1].mean()), 2),
+            "ms_per_extra_window": round(float(extra / (n - 1)), 2) if n > 1 else None,
+        })
+
+    def scores(p):
+        return {
+            "accuracy": round(accuracy_score(labels, p), 4),
+            "macro_f1": round(f1_score(labels, p, average="macro"), 4),
+        }
+
+    report = {
+        "num_long_docs": len(labels),
+        "max_windows": max_windows,
+        "window_stride": WINDOW_STRIDE,
+        "truncated": scores(truncated_preds),
+        "windowed": {m: scores(p) for m, p in preds.items()},
+        "latency": latency_rows,
+    }
+    save_report("long_document_windows", report)
+    return report
+
+
+if __name__ == "__main__":
+    import json
+
+    print(json.dumps(report_long_documents(), indent=2))
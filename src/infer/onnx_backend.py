@@ -0,0 +1,62 @@
+# infer/onnx_backend.py
+
+import numpy as np
+import torch
+
+from configs.config_infer import CHECKPOINT_PATH, ONNX_PATH
+
+
+class OnnxClassifier:
+    """
+    ONNX Runtime (CPU) drop-in for PhoBERTClassifier at inference time.
+
+    Called exactly like the torch model and returns torch logits, so
+    NewsInferencer does not need to know which backend is running.
+    """
+
+    def __init__(self, onnx_path=ONNX_PATH, num_threads: int = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "INFER_BACKEND='onnx' requires onnxruntime (pip install onnxruntime)"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        logits = self.session.run(
+            ["logits"],
+            {
+                "input_ids": input_ids.cpu().numpy().astype(np.int64),
+                "attention_mask": attention_mask.cpu().numpy().astype(np.int64),
+            },
+        )[0]
+        return torch.from_numpy(logits)
+
+    # torch.nn.Module API used by callers -------------------------------
+    def eval(self):
+        return self
+
+    def to(self, device):
+        return self
+
+
+def load_onnx_model(checkpoint_path=CHECKPOINT_PATH, onnx_path=ONNX_PATH) -> OnnxClassifier:
+    """
+    Open the ONNX graph for `checkpoint_path`, exporting it first if needed.
+    """
+    from src.infer.onnx_export import export_onnx, is_onnx_stale
+
+    if is_onnx_stale(checkpoint_path, onnx_path):
+        export_onnx(checkpoint_path, onnx_path)
+
+    return OnnxClassifier(onnx_path)
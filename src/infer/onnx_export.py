@@ -0,0 +1,167 @@
+# infer/onnx_export.py
+"""
+Export PhoBERTClassifier to ONNX and check parity with PyTorch.
+
+Usage:
+    python src/infer/onnx_export.py            # export + parity check on val
+    python src/infer/onnx_export.py --skip-parity
+"""
+import argparse
+import json
+import os
+import sys
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import torch
+
+from src.model.model import load_classifier
+from src.utils.checkpoint import file_fingerprint
+from configs.config_infer import (
+    MODEL_NAME,
+    NUM_CLASSES,
+    CHECKPOINT_PATH,
+    ONNX_PATH,
+    ONNX_PARITY_ATOL,
+)
+
+OPSET_VERSION = 17
+
+
+def _meta_path(onnx_path) -> str:
+    return f"{onnx_path}.meta.json"
+
+
+def is_onnx_stale(checkpoint_path=CHECKPOINT_PATH, onnx_path=ONNX_PATH) -> bool:
+    """
+    True when the ONNX file is missing or was exported from another checkpoint.
+    """
+    if not os.path.exists(onnx_path) or not os.path.exists(_meta_path(onnx_path)):
+        return True
+    with open(_meta_path(onnx_path), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta.get("source") != file_fingerprint(checkpoint_path)
+
+
+def export_onnx(checkpoint_path=CHECKPOINT_PATH, onnx_path=ONNX_PATH) -> str:
+    """
+    Export the fine-tuned classifier with dynamic batch and sequence axes.
+    Inputs: input_ids, attention_mask (int64, [batch, seq]) -> logits [batch, classes].
+    """
+    # A pruned vocabulary is exported as is: NewsInferencer remaps the ids
+    model = load_classifier(checkpoint_path, MODEL_NAME, NUM_CLASSES, allow_pruned_vocab=True)
+
+    # Dummy input: shapes are symbolic thanks to dynamic_axes
+    dummy_ids = torch.full((2, 16), 5, dtype=torch.long)
+    dummy_mask = torch.ones((2, 16), dtype=torch.long)
+
+    os.makedirs(os.path.dirname(str(onnx_path)), exist_ok=True)
+    # Per-process tmp names: every web worker may export at the same time
+    tmp_path = f"{onnx_path}.tmp-{os.getpid()}"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy_ids, dummy_mask),
+            tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=OPSET_VERSION,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+    os.replace(tmp_path, onnx_path)
+
+    meta_tmp_path = f"{_meta_path(onnx_path)}.tmp-{os.getpid()}"
+    with open(meta_tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"source": file_fingerprint(checkpoint_path), "opset": OPSET_VERSION},
+            f,
+            indent=4,
+        )
+    os.replace(meta_tmp_path, _meta_path(onnx_path))
+
+    print(f"[ONNX] Exported {checkpoint_path} -> {onnx_path}")
+    return str(onnx_path)
+
+
+# =========================================================
+# Parity check
+# =========================================================
+
+def parity_check(
+    csv_path=None,
+    atol: float = ONNX_PARITY_ATOL,
+    checkpoint_path=CHECKPOINT_PATH,
+    onnx_path=ONNX_PATH
+) -> dict:
+    """
+    Compare torch (`checkpoint_path`) and ONNX Runtime (`onnx_path`) logits
+    over a processed split (val by default).
+    """
+    from transformers import AutoTokenizer
+
+    from src.infer.onnx_backend import OnnxClassifier
+    from src.infer.vocab_prune import wrap_tokenizer
+    from src.train.evaluate import build_eval_loader
+    from src.utils.benchmark import save_report
+
+    csv_path = csv_path or os.path.join(root_dir, "dataset/data_processed/val.csv")
+
+    tokenizer = wrap_tokenizer(AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=False), checkpoint_path)
+    loader = build_eval_loader(tokenizer, csv_path)
+
+    torch_model = load_classifier(checkpoint_path, MODEL_NAME, NUM_CLASSES, allow_pruned_vocab=True)
+    onnx_model = OnnxClassifier(onnx_path)
+
+    max_abs_diff = 0.0
+    num_samples = 0
+    num_label_mismatch = 0
+
+    with torch.no_grad():
+        for batch in loader:
+            torch_logits = torch_model(
+                input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]
+            )
+            onnx_logits = onnx_model(
+                input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]
+            )
+
+            max_abs_diff = max(max_abs_diff, float((torch_logits - onnx_logits).abs().max()))
+            num_label_mismatch += int(
+                (torch_logits.argmax(dim=1) != onnx_logits.argmax(dim=1)).sum()
+            )
+            num_samples += batch["input_ids"].size(0)
+
+    report = {
+        "checkpoint": str(checkpoint_path),
+        "onnx": str(onnx_path),
+        "split": csv_path,
+        "num_samples": num_samples,
+        "max_abs_logit_diff": max_abs_diff,
+        "atol": atol,
+        "num_label_mismatch": num_label_mismatch,
+        "passed": max_abs_diff <= atol,
+    }
+    save_report("onnx_parity", report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export PhoBERTClassifier to ONNX")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH))
+    parser.add_argument("--output", default=str(ONNX_PATH))
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    export_onnx(args.checkpoint, args.output)
+
+    if not args.skip_parity:
+        report = parity_check(checkpoint_path=args.checkpoint, onnx_path=args.output)
+        print(json.dumps(report, indent=2))
+        if not report["passed"]:
+            sys.exit(1)
@@ -12,6 +12,14 @@ def load_keywords_from_json(file_path: str) -> Dict[str, List[str]]:
 
 SUSPICIOUS_KEYWORDS = load_keywords_from_json(SUSPICIOUS_KEYWORDS_PATH)
 
+
+def reload_keywords():
+    """
+    Re-read keywords.json (called when the file changes on disk).
+    """
+    global SUSPICIOUS_KEYWORDS
+    SUSPICIOUS_KEYWORDS = load_keywords_from_json(SUSPICIOUS_KEYWORDS_PATH)
+
 REGEX_PATTERNS = {
     "url": r"http[s]?://\S+",
     "email": r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
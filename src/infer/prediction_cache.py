@@ -0,0 +1,170 @@
+# infer/prediction_cache.py
+
+import hashlib
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.checkpoint import file_fingerprint
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Rough per-entry bookkeeping cost (OrderedDict node + tuple + timestamps)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_for_key(text: str) -> str:
+    """
+    Cheap normalization so trivially different copies of the same message
+    (unicode form, spacing) share one cache entry.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class PredictionCache:
+    """
+    Content-addressed LRU cache of model probabilities.
+
+    - key      : sha256(normalized title + text + model identity)
+    - value    : probability vector (tuple of floats)
+    - bounded  : by approximate bytes in use (LRU eviction) and by TTL
+    - identity : fingerprints of `watch_paths` (checkpoint, keywords.json).
+                 When any of them changes on disk, the whole cache is dropped
+                 and `on_invalidate` callbacks run.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        watch_paths: List,
+        identity_extra: str = "",
+        check_interval: float = 1.0,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.watch_paths = list(watch_paths)
+        self.identity_extra = identity_extra
+        self.check_interval = check_interval
+        self.on_invalidate: List[Callable[[], None]] = []
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[tuple, float, int]]" = OrderedDict()
+        self._bytes = 0
+
+        self._identity = self._compute_identity()
+        self._last_check = time.monotonic()
+
+        # -------- counters --------
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    # =====================================================
+    # ----------------- IDENTITY --------------------------
+    # =====================================================
+    def _compute_identity(self) -> str:
+        parts = [self.identity_extra]
+        for path in self.watch_paths:
+            fp = file_fingerprint(path)
+            parts.append(f"{fp['path']}:{fp['size']}:{fp['mtime_ns']}")
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _maybe_invalidate(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        identity = self._compute_identity()
+        if identity == self._identity:
+            return
+
+        with self._lock:
+            self._identity = identity
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+        print("[Cache] Model or keywords changed on disk, prediction cache cleared")
+        for callback in self.on_invalidate:
+            callback()
+
+    def make_key(self, title: str, text: str) -> str:
+        self._maybe_invalidate()
+        payload = f"{self._identity}\x00{normalize_for_key(title)}\x00{normalize_for_key(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # =====================================================
+    # ----------------- GET / PUT -------------------------
+    # =====================================================
+    @staticmethod
+    def _entry_size(key: str, probs: tuple) -> int:
+        return (
+            sys.getsizeof(key)
+            + sys.getsizeof(probs)
+            + sum(sys.getsizeof(p) for p in probs)
+            + _ENTRY_OVERHEAD_BYTES
+        )
+
+    def get(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            probs, created_at, size = entry
+            if time.monotonic() - created_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return probs
+
+    def put(self, key: str, probs) -> None:
+        probs = tuple(float(p) for p in probs)
+        size = self._entry_size(key, probs)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+            self._entries[key] = (probs, time.monotonic(), size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    # =====================================================
+    # ----------------- STATS -----------------------------
+    # =====================================================
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes_in_use": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
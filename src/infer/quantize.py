@@ -0,0 +1,227 @@
+# infer/quantize.py
+"""
+Dynamic INT8 quantization of PhoBERTClassifier for CPU inference.
+
+- Every nn.Linear (12 encoder layers: Q/K/V/O + FFN, and the classifier head)
+  gets INT8 weights; activations are quantized on the fly per batch.
+- The quantized model is cached next to the fp32 checkpoint and rebuilt only
+  when that checkpoint changes.
+
+Run as a script to produce the fp32 vs int8 report on the test split:
+    python src/infer/quantize.py
+"""
+import os
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+from collections import OrderedDict
+
+import torch
+import torch.nn as nn
+from sklearn.metrics import f1_score
+
+from src.model.model import PhoBERTClassifier, load_classifier
+from src.utils.checkpoint import file_fingerprint
+from configs.config_infer import (
+    MODEL_NAME,
+    NUM_CLASSES,
+    CHECKPOINT_PATH,
+    QUANTIZED_CHECKPOINT_PATH,
+)
+
+
+def quantize_dynamic_int8(model: nn.Module) -> nn.Module:
+    """
+    Replace every nn.Linear with its dynamically quantized INT8 version.
+    """
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(
+        model, {nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _to_portable(state_dict: dict) -> dict:
+    """
+    Unpack quantized Linear params into plain tensors + scale / zero point
+    so the cache can be written and read with plain torch.save / torch.load.
+    """
+    portable = {}
+    for key, value in state_dict.items():
+        if isinstance(value, tuple):  # (qweight, bias) of a quantized Linear
+            qweight, bias = value
+            portable[key] = {
+                "int_repr": qweight.int_repr(),
+                "scale": float(qweight.q_scale()),
+                "zero_point": int(qweight.q_zero_point()),
+                "bias": bias,
+            }
+        else:
+            portable[key] = value
+    return portable
+
+
+def _from_portable(portable: dict, metadata: dict) -> dict:
+    state_dict = OrderedDict()
+    # Quantized modules pick their loading format from the per-module version
+    state_dict._metadata = metadata
+    for key, value in portable.items():
+        if isinstance(value, dict) and "int_repr" in value:
+            qweight = torch._make_per_tensor_quantized_tensor(
+                value["int_repr"], value["scale"], value["zero_point"]
+            )
+            state_dict[key] = (qweight, value["bias"])
+        else:
+            state_dict[key] = value
+    return state_dict
+
+
+def _build_fp32(checkpoint_path) -> PhoBERTClassifier:
+    # Inputs are remapped by the caller's tokenizer (wrap_tokenizer)
+    return load_classifier(checkpoint_path, MODEL_NAME, NUM_CLASSES, allow_pruned_vocab=True)
+
+
+def load_quantized_model(
+    checkpoint_path=CHECKPOINT_PATH,
+    cache_path=QUANTIZED_CHECKPOINT_PATH,
+) -> nn.Module:
+    """
+    Return the INT8 model for `checkpoint_path`, using the on-disk cache
+    when it was built from the same checkpoint (size + mtime).
+    """
+    source = file_fingerprint(checkpoint_path)
+
+    if os.path.exists(cache_path):
+        cached = torch.load(cache_path, map_location="cpu")
+        if cached.get("source") == source:
+            skeleton = PhoBERTClassifier(
+                model_name=MODEL_NAME,
+                num_classes=NUM_CLASSES,
+                pretrained=False,
+                encoder_config=cached.get("encoder_config")
+            )
+            model = quantize_dynamic_int8(skeleton)
+            model.load_state_dict(
+                _from_portable(cached["state_dict"], cached["metadata"])
+            )
+            return model.eval()
+        print(f"[Quantize] Cache {cache_path} is stale, rebuilding")
+
+    fp32_model = _build_fp32(checkpoint_path)
+    encoder_config = fp32_model.encoder_config
+    model = quantize_dynamic_int8(fp32_model)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+    state_dict = model.state_dict()
+    torch.save(
+        {
+            "source": source,
+            "state_dict": _to_portable(state_dict),
+            "metadata": dict(state_dict._metadata),
+            "encoder_config": encoder_config,
+        },
+        tmp_path,
+    )
+    os.replace(tmp_path, cache_path)
+    print(f"[Quantize] Saved INT8 model to {cache_path}")
+
+    return model
+
+
+# =========================================================
+# fp32 vs int8 report
+# =========================================================
+
+def compare_fp32_int8(num_latency_samples: int = 200) -> dict:
+    """
+    Side-by-side fp32 / int8 comparison on the test split (CPU):
+    latency (batch of 1), throughput (BATCH_SIZE), memory footprint,
+    macro-F1 and agreement between the two models' labels.
+    """
+    from transformers import AutoTokenizer
+
+    from src.train.evaluate import TEST_PATH, build_eval_loader, predict_loader, sample_single_batches
+    from src.utils.benchmark import (
+        latency_summary,
+        save_report,
+        state_dict_size_mb,
+        time_calls,
+    )
+    from src.utils.memory import process_memory
+
+    from src.infer.vocab_prune import wrap_tokenizer
+
+    device = torch.device("cpu")
+    tokenizer = wrap_tokenizer(AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=False), CHECKPOINT_PATH)
+
+    test_loader = build_eval_loader(tokenizer, TEST_PATH)
+    single_batches = sample_single_batches(tokenizer, TEST_PATH, num_latency_samples)
+
+    def forward(model):
+        return lambda b: model(input_ids=b["input_ids"], attention_mask=b["attention_mask"])
+
+    rows = {}
+    predictions = {}
+    for name, loader_fn in (
+        ("fp32", lambda: _build_fp32(CHECKPOINT_PATH)),
+        ("int8", load_quantized_model),
+    ):
+        rss_before = process_memory()["rss_mb"]
+        model = loader_fn()
+        rss_after = process_memory()["rss_mb"]
+
+        latencies = time_calls(forward(model), single_batches)
+
+        t0 = time.perf_counter()
+        preds, labels = predict_loader(model, test_loader, device)
+        elapsed = time.perf_counter() - t0
+
+        predictions[name] = preds
+        rows[name] = {
+            "latency_batch1": latency_summary(latencies),
+            "throughput_samples_per_s": round(len(labels) / elapsed, 2),
+            "weights_mb": state_dict_size_mb(model),
+            "rss_delta_on_load_mb": (
+                round(rss_after - rss_before, 1)
+                if rss_before is not None and rss_after is not None else None
+            ),
+            "macro_f1": round(f1_score(labels, preds, average="macro"), 4),
+        }
+        del model
+
+    agreement = sum(
+        a == b for a, b in zip(predictions["fp32"], predictions["int8"])
+    ) / max(len(labels), 1)
+
+    report = {
+        "num_test_samples": len(labels),
+        "torch_threads": torch.get_num_threads(),
+        "quantized_engine": torch.backends.quantized.engine,
+        **rows,
+        "delta": {
+            "macro_f1": round(rows["int8"]["macro_f1"] - rows["fp32"]["macro_f1"], 4),
+            "label_agreement": round(agreement, 4),
+            "latency_p50_speedup": round(
+                rows["fp32"]["latency_batch1"]["p50_ms"]
+                / rows["int8"]["latency_batch1"]["p50_ms"], 2
+            ),
+            "throughput_speedup": round(
+                rows["int8"]["throughput_samples_per_s"]
+                / rows["fp32"]["throughput_samples_per_s"], 2
+            ),
+            "weights_size_ratio": round(
+                rows["int8"]["weights_mb"] / rows["fp32"]["weights_mb"], 3
+            ),
+        },
+    }
+
+    save_report("quantization_int8_vs_fp32", report)
+    return report
+
+
+if __name__ == "__main__":
+    import json
+
+    print(json.dumps(compare_fp32_int8(), indent=2))
@@ -0,0 +1,434 @@
+# infer/vocab_prune.py
+"""
+Embedding-vocabulary pruning.
+
+The word embedding matrix holds one row per PhoBERT token (64k x 768, about
+a fifth of the fp32 weights), while the Vietnamese news of this task only
+ever produce a small part of those ids.
+
+1. Every processed CSV (VOCAB_PRUNE_SOURCES) and optional saved traffic
+   (VOCAB_PRUNE_TRAFFIC, preprocessed like live requests) is tokenized and
+   the ids seen at least VOCAB_MIN_COUNT times are kept, plus the special
+   tokens.
+2. The checkpoint is rewritten with only those embedding rows
+   (PRUNED_CHECKPOINT_PATH, encoder vocab_size overridden) and the sorted
+   original ids of the kept rows ("vocab_ids").
+3. At inference PrunedTokenizer maps original ids to rows of the pruned
+   matrix; ids that were never seen become <unk>. Text made only of kept
+   tokens gets exactly the same logits as with the full model.
+
+    python src/infer/vocab_prune.py                       # prune + report
+    python src/infer/vocab_prune.py --traffic requests.jsonl
+    python src/infer/vocab_prune.py --report-only
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import torch
+
+from src.model.model import load_classifier, pack_checkpoint, unpack_checkpoint
+from src.utils.checkpoint import file_fingerprint
+from configs.config_infer import (
+    MODEL_NAME,
+    NUM_CLASSES,
+    MAX_SEQ_LENGTH,
+    INFER_BATCH_SIZE,
+    CHECKPOINT_PATH,
+    PRUNED_CHECKPOINT_PATH,
+    VOCAB_PRUNE_SOURCES,
+    VOCAB_PRUNE_TRAFFIC,
+    VOCAB_MIN_COUNT,
+)
+
+EMBEDDING_KEY = "encoder.embeddings.word_embeddings.weight"
+
+# Rows per pandas chunk while scanning CSVs
+SCAN_CHUNK_ROWS = 10000
+
+
+# =========================================================
+# Tokenizer wrapper
+# =========================================================
+
+class PrunedTokenizer:
+    def __init__(self, tokenizer, vocab_ids):
+        """
+        Tokenizer whose input ids index the pruned embedding matrix.
+
+        Only `__call__` is remapped; every other attribute (pad, special
+        token ids, ...) comes from the wrapped tokenizer. Pruning keeps the
+        ids up to the last of <s> / <pad> / </s> / <unk> unchanged, so
+        padding and window building work on remapped ids as they are.
+
+        Args:
+            tokenizer: HuggingFace tokenizer (PhoBERT)
+            vocab_ids: sorted original ids of the kept embedding rows
+        """
+        vocab_ids = np.asarray(vocab_ids, dtype=np.int64)
+        unk_id = tokenizer.unk_token_id
+
+        for token_id in _core_special_ids(tokenizer):
+            if token_id >= len(vocab_ids) or vocab_ids[token_id] != token_id:
+                raise ValueError(f"Special token id {token_id} was remapped by the pruned vocabulary")
+
+        id_map = np.full(max(len(tokenizer), int(vocab_ids[-1]) + 1), unk_id, dtype=np.int64)
+        id_map[vocab_ids] = np.arange(len(vocab_ids))
+
+        self.tokenizer = tokenizer
+        self.vocab_ids = vocab_ids
+        # Own identity for tokenized caches (token_shards.tokenizer_identity)
+        digest = hashlib.sha256(vocab_ids.tobytes()).hexdigest()[:12]
+        self.name_or_path = f"{tokenizer.name_or_path}#pruned-{digest}"
+        self.id_map = id_map
+        self.id_map_tensor = torch.from_numpy(id_map)
+
+    def remap(self, input_ids):
+        """
+        Original ids -> pruned ids; same container as the input
+        (tensor, array, list of ids or list of lists).
+        """
+        if isinstance(input_ids, torch.Tensor):
+            return self.id_map_tensor[input_ids]
+        if isinstance(input_ids, np.ndarray):
+            return self.id_map[input_ids]
+        if input_ids and isinstance(input_ids[0], (list, tuple, np.ndarray, torch.Tensor)):
+            return [self.remap(list(ids)) for ids in input_ids]
+        return self.id_map[np.asarray(input_ids, dtype=np.int64)].tolist()
+
+    def __call__(self, *args, **kwargs):
+        encoded = self.tokenizer(*args, **kwargs)
+        encoded["input_ids"] = self.remap(encoded["input_ids"])
+        return encoded
+
+    def __len__(self):
+        return len(self.vocab_ids)
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+
+def _core_special_ids(tokenizer) -> List[int]:
+    ids = [
+        tokenizer.bos_token_id,
+        tokenizer.pad_token_id,
+        tokenizer.eos_token_id,
+        tokenizer.unk_token_id,
+    ]
+    return [i for i in ids if i is not None]
+
+
+def load_vocab_ids(checkpoint_path) -> Optional[torch.Tensor]:
+    """
+    Kept original token ids of a pruned checkpoint, None for a full one.
+    The file is memory-mapped: the weights themselves are not read.
+    """
+    checkpoint = torch.load(checkpoint_path, map_location="cpu", mmap=True)
+    if isinstance(checkpoint, dict) and "vocab_ids" in checkpoint:
+        return checkpoint["vocab_ids"]
+    return None
+
+
+def wrap_tokenizer(tokenizer, checkpoint_path):
+    """
+    `tokenizer`, wrapped with PrunedTokenizer if `checkpoint_path` is pruned.
+    """
+    vocab_ids = load_vocab_ids(checkpoint_path)
+    if vocab_ids is None:
+        return tokenizer
+    return PrunedTokenizer(tokenizer, vocab_ids)
+
+
+# =========================================================
+# Vocabulary scan
+# =========================================================
+
+def _traffic_texts(path) -> List[str]:
+    """
+    PhoBERT inputs of saved raw requests (CSV / JSONL with title / text),
+    cleaned and segmented like NewsInferencer does.
+    """
+    from preprocessing.preprocess.segment_cache import clean_and_segment
+    from preprocessing.preprocess.pipeline import format_phobert_input
+
+    path = str(path)
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+    else:
+        items = pd.read_csv(path).fillna("").to_dict(orient="records")
+
+    return [
+        format_phobert_input(
+            clean_and_segment(f"{item.get('title') or ''}. {item.get('text') or ''}".strip())
+        )
+        for item in items
+    ]
+
+
+def count_token_ids(tokenizer, csv_paths: Sequence, traffic_paths: Sequence = ()) -> np.ndarray:
+    """
+    Occurrences of every token id over the full texts (no truncation:
+    chunked inference also reads past MAX_SEQ_LENGTH).
+    """
+    counts = np.zeros(len(tokenizer), dtype=np.int64)
+
+    def add(texts):
+        ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+        flat = np.fromiter(itertools.chain.from_iterable(ids), dtype=np.int64)
+        counts[:] += np.bincount(flat, minlength=len(counts))[:len(counts)]
+
+    for csv_path in csv_paths:
+        num_rows = 0
+        for chunk in pd.read_csv(csv_path, usecols=["text"], chunksize=SCAN_CHUNK_ROWS):
+            texts = chunk["text"].fillna("").astype(str).tolist()
+            add(texts)
+            num_rows += len(texts)
+        print(f"[VocabPrune] Scanned {num_rows} rows of {csv_path}")
+
+    for traffic_path in traffic_paths:
+        texts = _traffic_texts(traffic_path)
+        add(texts)
+        print(f"[VocabPrune] Scanned {len(texts)} requests of {traffic_path}")
+
+    return counts
+
+
+def select_vocab(tokenizer, counts: np.ndarray, min_count: int = VOCAB_MIN_COUNT) -> np.ndarray:
+    """
+    Sorted kept ids: special tokens, every id up to the last core special
+    token (so those keep their id) and ids seen at least `min_count` times.
+    """
+    keep = counts >= max(min_count, 1)
+    keep[:max(_core_special_ids(tokenizer)) + 1] = True
+    keep[[i for i in tokenizer.all_special_ids if i < len(keep)]] = True
+    return np.flatnonzero(keep)
+
+
+# =========================================================
+# Pruned checkpoint
+# =========================================================
+
+def prune_checkpoint(
+    checkpoint_path=CHECKPOINT_PATH,
+    out_path=PRUNED_CHECKPOINT_PATH,
+    csv_paths: Sequence = VOCAB_PRUNE_SOURCES,
+    traffic_paths: Sequence = VOCAB_PRUNE_TRAFFIC,
+    min_count: int = VOCAB_MIN_COUNT
+) -> dict:
+    from transformers import AutoTokenizer
+
+    if not csv_paths and not traffic_paths:
+        raise ValueError("Nothing to scan: VOCAB_PRUNE_SOURCES and VOCAB_PRUNE_TRAFFIC are empty")
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    counts = count_token_ids(tokenizer, csv_paths, traffic_paths)
+    vocab_ids = select_vocab(tokenizer, counts, min_count)
+
+    checkpoint = torch.load(checkpoint_path, map_location="cpu")
+    if isinstance(checkpoint, dict) and "vocab_ids" in checkpoint:
+        raise ValueError(f"{checkpoint_path} is already pruned")
+    state_dict, encoder_config = unpack_checkpoint(checkpoint)
+
+    embeddings = state_dict[EMBEDDING_KEY]
+    pruned_state = dict(state_dict)
+    pruned_state[EMBEDDING_KEY] = embeddings[torch.from_numpy(vocab_ids)].clone()
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    torch.save(
+        pack_checkpoint(
+            pruned_state,
+            {**(encoder_config or {}), "vocab_size": len(vocab_ids)},
+            vocab_ids=torch.from_numpy(vocab_ids)
+        ),
+        out_path
+    )
+
+    summary = {
+        "source": file_fingerprint(checkpoint_path),
+        "scanned": [str(p) for p in csv_paths] + [str(p) for p in traffic_paths],
+        "min_count": min_count,
+        "vocab_size": int(embeddings.shape[0]),
+        "kept_ids": int(len(vocab_ids)),
+        "kept_ratio": round(len(vocab_ids) / embeddings.shape[0], 4),
+    }
+    print(
+        f"[VocabPrune] Kept {summary['kept_ids']}/{summary['vocab_size']} embedding rows "
+        f"-> {out_path}"
+    )
+    return summary
+
+
+# =========================================================
+# Report
+# =========================================================
+
+def _measure_load(checkpoint_path) -> dict:
+    """
+    torch.load + model build time and memory of a fresh worker process
+    (no mmap: the weights are copied into the process, as without MMAP_WEIGHTS).
+    """
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure-load", str(checkpoint_path)],
+        check=True, capture_output=True, text=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _load_in_this_process(checkpoint_path) -> dict:
+    from src.utils.memory import process_memory
+
+    t0 = time.perf_counter()
+    checkpoint = torch.load(checkpoint_path, map_location="cpu")
+    load_s = time.perf_counter() - t0
+    del checkpoint
+
+    t0 = time.perf_counter()
+    model = load_classifier(checkpoint_path, MODEL_NAME, NUM_CLASSES, allow_pruned_vocab=True)
+    build_s = time.perf_counter() - t0
+
+    memory = process_memory()
+    del model
+    return {
+        "torch_load_s": load_s,
+        "load_classifier_s": build_s,
+        "rss_mb": memory["rss_mb"],
+        "private_mb": memory.get("private_mb"),
+    }
+
+
+def _split_parity(full_model, pruned_model, tokenizer, pruned_tokenizer, csv_path) -> dict:
+    """
+    Full vs pruned model on one split (truncated to MAX_SEQ_LENGTH):
+    logits difference and label agreement, overall and on in-vocab rows.
+    """
+    texts = pd.read_csv(csv_path, usecols=["text"])["text"].fillna("").astype(str).tolist()
+    unk_id = tokenizer.unk_token_id
+
+    max_diff_in_vocab = 0.0
+    num_in_vocab = agree_in_vocab = agree = 0
+
+    with torch.no_grad():
+        for start in range(0, len(texts), INFER_BATCH_SIZE):
+            encoded = tokenizer(
+                texts[start:start + INFER_BATCH_SIZE],
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                padding=True,
+                return_tensors="pt",
+            )
+            input_ids, attention_mask = encoded["input_ids"], encoded["attention_mask"]
+            pruned_ids = pruned_tokenizer.remap(input_ids)
+
+            full_logits = full_model(input_ids=input_ids, attention_mask=attention_mask)
+            pruned_logits = pruned_model(input_ids=pruned_ids, attention_mask=attention_mask)
+
+            same = full_logits.argmax(dim=-1) == pruned_logits.argmax(dim=-1)
+            in_vocab = ~((pruned_ids == unk_id) & (input_ids != unk_id)).any(dim=-1)
+
+            agree += int(same.sum())
+            num_in_vocab += int(in_vocab.sum())
+            agree_in_vocab += int((same & in_vocab).sum())
+            if in_vocab.any():
+                diff = (full_logits - pruned_logits)[in_vocab].abs().max()
+                max_diff_in_vocab = max(max_diff_in_vocab, float(diff))
+
+    return {
+        "num_samples": len(texts),
+        "label_agreement": round(agree / max(len(texts), 1), 4),
+        "in_vocab_share": round(num_in_vocab / max(len(texts), 1), 4),
+        "in_vocab_label_agreement": round(agree_in_vocab / max(num_in_vocab, 1), 4),
+        "in_vocab_max_abs_logit_diff": max_diff_in_vocab,
+    }
+
+
+def report_vocab_prune(
+    checkpoint_path=CHECKPOINT_PATH,
+    pruned_path=PRUNED_CHECKPOINT_PATH,
+    csv_paths: Sequence = VOCAB_PRUNE_SOURCES,
+    repeats: int = 3
+) -> dict:
+    from transformers import AutoTokenizer
+
+    from src.utils.benchmark import save_report
+
+    # One fresh process per measurement, median of `repeats`
+    footprint = {}
+    for name, path in (("full", checkpoint_path), ("pruned", pruned_path)):
+        runs = [_measure_load(path) for _ in range(repeats)]
+        footprint[name] = {
+            "file_mb": round(os.path.getsize(path) / 1024 ** 2, 2),
+            **{
+                key: round(float(np.median([r[key] for r in runs])), 4 if key.endswith("_s") else 1)
+                for key in runs[0] if runs[0][key] is not None
+            },
+        }
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    pruned_tokenizer = wrap_tokenizer(tokenizer, pruned_path)
+    full_model = load_classifier(checkpoint_path, MODEL_NAME, NUM_CLASSES)
+    pruned_model = load_classifier(pruned_path, MODEL_NAME, NUM_CLASSES, allow_pruned_vocab=True)
+
+    parity = {}
+    for csv_path in csv_paths:
+        split = os.path.splitext(os.path.basename(str(csv_path)))[0]
+        parity[split] = _split_parity(full_model, pruned_model, tokenizer, pruned_tokenizer, csv_path)
+        print(
+            f"{split}: label agreement {parity[split]['label_agreement']}, "
+            f"in-vocab max |diff| {parity[split]['in_vocab_max_abs_logit_diff']:.2e}"
+        )
+
+    report = {
+        "checkpoint": str(checkpoint_path),
+        "pruned_checkpoint": str(pruned_path),
+        "vocab_size": int(full_model.encoder.config.vocab_size),
+        "kept_ids": len(pruned_tokenizer),
+        **footprint,
+        "delta": {
+            "file_size_ratio": round(footprint["pruned"]["file_mb"] / footprint["full"]["file_mb"], 3),
+            "torch_load_speedup": round(
+                footprint["full"]["torch_load_s"] / footprint["pruned"]["torch_load_s"], 2
+            ),
+            "rss_saved_mb": round(footprint["full"]["rss_mb"] - footprint["pruned"]["rss_mb"], 1),
+        },
+        "parity": parity,
+    }
+    print(
+        f"Checkpoint {footprint['full']['file_mb']} -> {footprint['pruned']['file_mb']} MB, "
+        f"torch.load x{report['delta']['torch_load_speedup']}, "
+        f"RSS -{report['delta']['rss_saved_mb']} MB per worker"
+    )
+    save_report("vocab_prune", report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding-vocabulary pruning + parity report")
+    parser.add_argument("--traffic", nargs="*", default=None,
+                        help="saved requests (CSV / JSONL), default VOCAB_PRUNE_TRAFFIC")
+    parser.add_argument("--min-count", type=int, default=VOCAB_MIN_COUNT)
+    parser.add_argument("--report-only", action="store_true")
+    parser.add_argument("--measure-load", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_load:
+        print(json.dumps(_load_in_this_process(args.measure_load)))
+        sys.exit(0)
+
+    if not args.report_only:
+        prune_checkpoint(
+            traffic_paths=VOCAB_PRUNE_TRAFFIC if args.traffic is None else args.traffic,
+            min_count=args.min_count
+        )
+    report_vocab_prune()
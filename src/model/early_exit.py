@@ -0,0 +1,145 @@
+# model/early_exit.py
+
+from typing import Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from src.model.model import PhoBERTClassifier
+from src.utils.checkpoint import file_fingerprint
+
+
+class EarlyExitClassifier(nn.Module):
+    def __init__(
+        self,
+        model: PhoBERTClassifier,
+        exit_layers: List[int],
+        threshold: float = 1.0,
+        exit_heads: Optional[Dict[str, torch.Tensor]] = None
+    ):
+        """
+        PhoBERTClassifier with extra Linear heads on the CLS state after
+        some intermediate encoder layers.
+
+        forward() runs the encoder layer by layer; after each exit layer,
+        rows whose max probability reaches `threshold` stop there, the
+        others continue (the batch shrinks). Rows that never exit get the
+        usual classifier on the last layer, so threshold > 1 gives exactly
+        the base model's logits.
+
+        Args:
+            model: fine-tuned classifier (left unchanged)
+            exit_layers (list): 1-based layer numbers with an exit head
+                (e.g. [3, 6, 9]: after the 3rd, 6th and 9th layer)
+            threshold (float): max-probability needed to exit
+            exit_heads (dict): state_dict of `self.exit_heads` to load
+        """
+        super().__init__()
+
+        num_layers = model.encoder.config.num_hidden_layers
+        exit_layers = sorted(set(exit_layers))
+        if not all(0 < k < num_layers for k in exit_layers):
+            raise ValueError(f"Exit layers must be in [1, {num_layers - 1}], got {exit_layers}")
+
+        self.model = model
+        self.exit_layers = exit_layers
+        self.threshold = threshold
+
+        hidden_size = model.encoder.config.hidden_size
+        num_classes = model.classifier.out_features
+        self.exit_heads = nn.ModuleDict({
+            str(k): nn.Linear(hidden_size, num_classes) for k in exit_layers
+        })
+        if exit_heads is not None:
+            self.exit_heads.load_state_dict(exit_heads)
+
+        # Same head interface as PhoBERTClassifier (final exit)
+        self.classifier = model.classifier
+
+    def exit_cls(self, input_ids, attention_mask) -> torch.Tensor:
+        """
+        CLS states after every exit layer, concatenated:
+        [batch, len(exit_layers) * hidden_size] (training the exit heads).
+        """
+        outputs = self.model.encoder(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            output_hidden_states=True,
+            return_dict=True
+        )
+        # hidden_states[0] = embeddings, hidden_states[k] = after layer k
+        return torch.cat([outputs.hidden_states[k][:, 0, :] for k in self.exit_layers], dim=-1)
+
+    def forward_with_exits(self, input_ids, attention_mask) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        (logits [batch, num_classes], number of layers run per row [batch]).
+        """
+        encoder = self.model.encoder
+        layers = encoder.encoder.layer
+
+        hidden = encoder.embeddings(input_ids=input_ids)
+        # Additive mask [batch, 1, 1, seq] (0 = attend, dtype min = padding)
+        mask = (1.0 - attention_mask[:, None, None, :].to(hidden.dtype)) * torch.finfo(hidden.dtype).min
+
+        logits = hidden.new_zeros((input_ids.size(0), self.classifier.out_features))
+        layers_run = torch.full((input_ids.size(0),), len(layers), dtype=torch.long)
+        active = torch.arange(input_ids.size(0), device=input_ids.device)
+
+        for depth, layer in enumerate(layers, start=1):
+            out = layer(hidden, attention_mask=mask)
+            hidden = out[0] if isinstance(out, tuple) else out
+
+            if depth == len(layers):
+                logits[active] = self.classifier(hidden[:, 0, :]).to(logits.dtype)
+                break
+
+            head = self.exit_heads[str(depth)] if str(depth) in self.exit_heads else None
+            if head is None:
+                continue
+
+            exit_logits = head(hidden[:, 0, :])
+            done = torch.softmax(exit_logits.float(), dim=-1).max(dim=-1).values >= self.threshold
+            if not done.any():
+                continue
+
+            logits[active[done]] = exit_logits[done].to(logits.dtype)
+            layers_run[active[done].cpu()] = depth
+
+            # Continue with the rows that are still unsure
+            keep = ~done
+            if not keep.any():
+                break
+            active, hidden, mask = active[keep], hidden[keep], mask[keep]
+
+        return logits, layers_run
+
+    def forward(self, input_ids, attention_mask):
+        logits, _ = self.forward_with_exits(input_ids, attention_mask)
+        return logits
+
+
+# =========================================================
+# Exit heads file
+# =========================================================
+
+def load_early_exit(
+    model: PhoBERTClassifier,
+    path,
+    threshold: float,
+    checkpoint_path=None
+) -> EarlyExitClassifier:
+    """
+    Wrap `model` with the exit heads saved by src/train/early_exit.py.
+    With `checkpoint_path`, refuse heads trained on another checkpoint.
+    """
+    saved = torch.load(path, map_location="cpu")
+    if checkpoint_path is not None and saved["source"] != file_fingerprint(checkpoint_path):
+        raise ValueError(
+            f"Exit heads {path} were trained on another checkpoint than "
+            f"{checkpoint_path}; rerun src/train/early_exit.py"
+        )
+    wrapped = EarlyExitClassifier(
+        model, saved["exit_layers"], threshold=threshold, exit_heads=saved["state_dict"]
+    )
+    param = next(model.parameters())
+    return wrapped.to(param.device).eval()
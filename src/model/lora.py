@@ -0,0 +1,167 @@
+# model/lora.py
+
+import math
+from typing import Dict, Sequence
+
+import torch
+import torch.nn as nn
+
+from src.model.model import PhoBERTClassifier
+
+
+class LoRALinear(nn.Module):
+    def __init__(self, base: nn.Linear, rank: int, alpha: float, dropout: float = 0.0):
+        """
+        Frozen nn.Linear plus a trainable low-rank update:
+        y = base(x) + (alpha / rank) * B(A(dropout(x))).
+
+        B starts at zero, so the wrapped layer initially computes exactly
+        `base`. merge() folds the update into a plain nn.Linear (no extra
+        cost at inference).
+
+        Args:
+            base (nn.Linear): pretrained projection (kept frozen)
+            rank (int): rank of the update
+            alpha (float): scaling numerator
+            dropout (float): dropout on the adapter input
+        """
+        super().__init__()
+        if rank <= 0:
+            raise ValueError(f"LoRA rank must be positive, got {rank}")
+
+        self.base = base
+        for param in self.base.parameters():
+            param.requires_grad = False
+
+        self.rank = rank
+        self.scaling = alpha / rank
+        self.dropout = nn.Dropout(dropout)
+
+        weight = base.weight
+        self.lora_A = nn.Parameter(torch.empty(rank, base.in_features, device=weight.device, dtype=weight.dtype))
+        self.lora_B = nn.Parameter(torch.zeros(base.out_features, rank, device=weight.device, dtype=weight.dtype))
+        nn.init.kaiming_uniform_(self.lora_A, a=math.sqrt(5))
+
+    def forward(self, x):
+        update = self.dropout(x) @ self.lora_A.t() @ self.lora_B.t()
+        return self.base(x) + update * self.scaling
+
+    def merge(self) -> nn.Linear:
+        """
+        nn.Linear with W + scaling * B @ A.
+        """
+        merged = nn.Linear(
+            self.base.in_features, self.base.out_features, bias=self.base.bias is not None
+        ).to(device=self.base.weight.device, dtype=self.base.weight.dtype)
+        with torch.no_grad():
+            merged.weight.copy_(self.base.weight + self.scaling * (self.lora_B @ self.lora_A))
+            if self.base.bias is not None:
+                merged.bias.copy_(self.base.bias)
+        return merged
+
+
+# =========================================================
+# Model surgery
+# =========================================================
+
+def _attention_projections(model: PhoBERTClassifier, targets: Sequence[str]):
+    """
+    (module owning the projection, attribute name) for every targeted
+    projection of every encoder layer (query / key / value).
+    """
+    for layer in model.encoder.encoder.layer:
+        for name in targets:
+            if not hasattr(layer.attention.self, name):
+                raise ValueError(f"Unknown LoRA target: {name}")
+            yield layer.attention.self, name
+
+
+def apply_lora(
+    model: PhoBERTClassifier,
+    rank: int,
+    alpha: float,
+    dropout: float = 0.0,
+    targets: Sequence[str] = ("query", "key", "value")
+) -> PhoBERTClassifier:
+    """
+    Freeze the whole encoder and wrap the targeted attention projections
+    with LoRALinear; only the adapters and the classifier head train.
+    The settings are kept on `model.lora_config` (saved with the adapters).
+    """
+    for param in model.encoder.parameters():
+        param.requires_grad = False
+
+    for owner, name in _attention_projections(model, targets):
+        setattr(owner, name, LoRALinear(getattr(owner, name), rank, alpha, dropout))
+
+    for param in model.classifier.parameters():
+        param.requires_grad = True
+
+    model.lora_config = {"rank": rank, "alpha": alpha, "dropout": dropout, "targets": list(targets)}
+    return model
+
+
+def lora_state_dict(model: PhoBERTClassifier) -> Dict[str, torch.Tensor]:
+    """
+    Trainable tensors only (adapters + classifier head): the adapter checkpoint.
+    """
+    trainable = {name for name, param in model.named_parameters() if param.requires_grad}
+    return {k: v for k, v in model.state_dict().items() if k in trainable}
+
+
+def merge_lora(model: PhoBERTClassifier) -> PhoBERTClassifier:
+    """
+    Replace every LoRALinear by its merged nn.Linear (in place): same
+    parameter names and cost as the base model, plain checkpoint layout.
+    """
+    for layer in model.encoder.encoder.layer:
+        owner = layer.attention.self
+        for name, child in list(owner.named_children()):
+            if isinstance(child, LoRALinear):
+                setattr(owner, name, child.merge())
+    model.lora_config = None
+    return model
+
+
+# =========================================================
+# Adapter checkpoint
+# =========================================================
+
+def pack_adapter(model: PhoBERTClassifier, base: str) -> Dict:
+    """
+    Metadata stored next to the adapter tensors (see load_adapter).
+    """
+    return {"lora": dict(model.lora_config), "base": base}
+
+
+def load_adapter(
+    adapter,
+    model_name: str,
+    num_classes: int,
+    merge: bool = True,
+    map_location="cpu"
+) -> PhoBERTClassifier:
+    """
+    Pretrained backbone + saved adapters (path or loaded dict), merged into
+    a plain PhoBERTClassifier by default (eval mode).
+    """
+    if not isinstance(adapter, dict):
+        adapter = torch.load(adapter, map_location=map_location)
+    if adapter["base"] != model_name:
+        raise ValueError(f"Adapters were trained on {adapter['base']}, not {model_name}")
+
+    settings = adapter["lora"]
+    model = PhoBERTClassifier(model_name=model_name, num_classes=num_classes)
+    apply_lora(model, settings["rank"], settings["alpha"], settings["dropout"], settings["targets"])
+
+    missing = set(lora_state_dict(model)) - set(adapter["state_dict"])
+    if missing:
+        raise ValueError(f"Adapter checkpoint is missing {sorted(missing)[:3]}...")
+    model.load_state_dict(
+        {k: v.float() if v.is_floating_point() else v for k, v in adapter["state_dict"].items()},
+        strict=False
+    )
+
+    if merge:
+        merge_lora(model)
+    return model.eval()
@@ -1,8 +1,12 @@
 # model.py
 
+from typing import Any, Dict, Optional, Tuple
+
 import torch
 import torch.nn as nn
-from transformers import AutoModel
+from transformers import AutoConfig, AutoModel
+
+from src.model.pruning import STRUCTURE_KEYS, apply_structure
 
 
 class PhoBERTClassifier(nn.Module):
@@ -11,7 +15,9 @@ class PhoBERTClassifier(nn.Module):
         model_name: str,
         num_classes: int,
         dropout_rate: float = 0.1,
-        freeze_encoder: bool = False
+        freeze_encoder: bool = False,
+        pretrained: bool = True,
+        encoder_config: Optional[Dict[str, Any]] = None
     ):
         """
         PhoBERT-based classifier for text classification
@@ -21,29 +27,132 @@ class PhoBERTClassifier(nn.Module):
             num_classes (int): number of output classes
             dropout_rate (float): dropout probability
             freeze_encoder (bool): whether to freeze PhoBERT encoder
+            pretrained (bool): load the pretrained backbone weights.
+                Use False when a fine-tuned checkpoint is loaded right after
+                (architecture only, no weight download / copy)
+            encoder_config (dict): overrides of the backbone config
+                (e.g. num_hidden_layers / hidden_size of a distilled
+                student, per-layer heads / FFN size of a pruned model);
+                implies an architecture-only encoder
         """
         super().__init__()
 
-        self.encoder = AutoModel.from_pretrained(model_name)
+        # Kept so the checkpoint can be written in the matching layout
+        self.encoder_config = encoder_config or None
+
+        if encoder_config:
+            config = AutoConfig.from_pretrained(
+                model_name,
+                **{k: v for k, v in encoder_config.items() if k not in STRUCTURE_KEYS}
+            )
+            self.encoder = AutoModel.from_config(config)
+        elif pretrained:
+            self.encoder = AutoModel.from_pretrained(model_name)
+        else:
+            self.encoder = AutoModel.from_config(AutoConfig.from_pretrained(model_name))
         hidden_size = self.encoder.config.hidden_size
 
+        # Structurally pruned heads / FFN neurons (src/train/prune.py)
+        apply_structure(self.encoder, encoder_config)
+
         if freeze_encoder:
             for param in self.encoder.parameters():
                 param.requires_grad = False
 
+        # The pooler output is never used (logits come from the CLS hidden
+        # state): keep it out of autograd, DDP requires a grad for every
+        # trainable parameter
+        pooler = getattr(self.encoder, "pooler", None)
+        if pooler is not None:
+            for param in pooler.parameters():
+                param.requires_grad = False
+
         self.dropout = nn.Dropout(dropout_rate)
         self.classifier = nn.Linear(hidden_size, num_classes)
 
-    def forward(self, input_ids, attention_mask):
+    def encode(self, input_ids, attention_mask):
+        """
+        CLS token embedding (before dropout), shape [batch, hidden_size]
+        """
         outputs = self.encoder(
             input_ids=input_ids,
             attention_mask=attention_mask,
             return_dict=True
         )
+        return outputs.last_hidden_state[:, 0, :]
 
+    def forward(self, input_ids, attention_mask):
         # CLS token embedding
-        cls_embedding = outputs.last_hidden_state[:, 0, :]
+        cls_embedding = self.encode(input_ids, attention_mask)
         cls_embedding = self.dropout(cls_embedding)
 
         logits = self.classifier(cls_embedding)
         return logits
+
+
+# =========================================================
+# Checkpoint format
+# =========================================================
+
+def unpack_checkpoint(checkpoint) -> Tuple[Dict[str, torch.Tensor], Optional[Dict[str, Any]]]:
+    """
+    (state_dict, encoder_config) of a loaded checkpoint file.
+
+    Models with the stock backbone are saved as a plain state_dict; models
+    with a different encoder shape (distilled students, pruned heads / FFN,
+    pruned vocabulary) as
+    {"encoder_config": overrides, "state_dict": state_dict}. A pruned
+    vocabulary also stores "vocab_ids" (see src/infer/vocab_prune.py).
+    """
+    if "state_dict" in checkpoint and "encoder_config" in checkpoint:
+        return checkpoint["state_dict"], checkpoint["encoder_config"]
+    return checkpoint, None
+
+
+def pack_checkpoint(
+    state_dict,
+    encoder_config: Optional[Dict[str, Any]] = None,
+    vocab_ids: Optional[torch.Tensor] = None
+):
+    """
+    Object to torch.save: a plain state_dict unless the encoder is resized.
+    `vocab_ids` (original token id of each kept embedding row) is stored
+    with a pruned vocabulary.
+    """
+    if not encoder_config:
+        return state_dict
+    packed = {"encoder_config": dict(encoder_config), "state_dict": state_dict}
+    if vocab_ids is not None:
+        packed["vocab_ids"] = vocab_ids
+    return packed
+
+
+def load_classifier(
+    checkpoint_path,
+    model_name: str,
+    num_classes: int,
+    map_location="cpu",
+    allow_pruned_vocab: bool = False
+) -> PhoBERTClassifier:
+    """
+    PhoBERTClassifier (eval mode) rebuilt from either checkpoint layout.
+
+    A pruned vocabulary is refused unless `allow_pruned_vocab`: the caller
+    must then tokenize with src.infer.vocab_prune.wrap_tokenizer, the stock
+    token ids index past the end of the pruned embedding.
+    """
+    checkpoint = torch.load(checkpoint_path, map_location=map_location)
+    if "vocab_ids" in checkpoint and not allow_pruned_vocab:
+        raise ValueError(
+            f"{checkpoint_path} has a pruned vocabulary: tokenize with "
+            "src.infer.vocab_prune.wrap_tokenizer and pass allow_pruned_vocab=True"
+        )
+    state_dict, encoder_config = unpack_checkpoint(checkpoint)
+    model = PhoBERTClassifier(
+        model_name=model_name,
+        num_classes=num_classes,
+        pretrained=False,
+        encoder_config=encoder_config
+    )
+    model.load_state_dict(state_dict)
+    return model.eval()
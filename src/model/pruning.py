@@ -0,0 +1,113 @@
+# model/pruning.py
+
+from typing import Dict, List, Optional, Sequence
+
+import torch
+import torch.nn as nn
+
+# encoder_config keys handled here rather than by the HF config
+STRUCTURE_KEYS = ("layer_num_heads", "layer_intermediate_sizes")
+
+
+# =========================================================
+# Linear slicing
+# =========================================================
+
+def _keep_outputs(linear: nn.Linear, index: torch.Tensor) -> nn.Linear:
+    """
+    Copy of `linear` with only the output features in `index`.
+    """
+    index = index.to(linear.weight.device)
+    pruned = nn.Linear(linear.in_features, len(index), bias=linear.bias is not None)
+    pruned = pruned.to(device=linear.weight.device, dtype=linear.weight.dtype)
+    with torch.no_grad():
+        pruned.weight.copy_(linear.weight.index_select(0, index))
+        if linear.bias is not None:
+            pruned.bias.copy_(linear.bias.index_select(0, index))
+    return pruned
+
+
+def _keep_inputs(linear: nn.Linear, index: torch.Tensor) -> nn.Linear:
+    """
+    Copy of `linear` with only the input features in `index`.
+    """
+    index = index.to(linear.weight.device)
+    pruned = nn.Linear(len(index), linear.out_features, bias=linear.bias is not None)
+    pruned = pruned.to(device=linear.weight.device, dtype=linear.weight.dtype)
+    with torch.no_grad():
+        pruned.weight.copy_(linear.weight.index_select(1, index))
+        if linear.bias is not None:
+            pruned.bias.copy_(linear.bias)
+    return pruned
+
+
+# =========================================================
+# Encoder structure
+# =========================================================
+
+def prune_heads(encoder, heads_to_keep: Dict[int, Sequence[int]]) -> None:
+    """
+    Keep only the listed attention heads (0-based) of each layer (0-based):
+    Q / K / V lose the rows of the removed heads, the attention output
+    projection the matching columns. Layers not in the dict are unchanged.
+    """
+    for layer_idx, heads in heads_to_keep.items():
+        attention = encoder.encoder.layer[layer_idx].attention
+        self_attn = attention.self
+        head_size = self_attn.attention_head_size
+
+        heads = sorted(int(h) for h in heads)
+        if not heads:
+            raise ValueError(f"Layer {layer_idx} must keep at least one attention head")
+        index = torch.cat([torch.arange(h * head_size, (h + 1) * head_size) for h in heads])
+
+        self_attn.query = _keep_outputs(self_attn.query, index)
+        self_attn.key = _keep_outputs(self_attn.key, index)
+        self_attn.value = _keep_outputs(self_attn.value, index)
+        attention.output.dense = _keep_inputs(attention.output.dense, index)
+
+        self_attn.num_attention_heads = len(heads)
+        self_attn.all_head_size = len(heads) * head_size
+
+
+def prune_ffn(encoder, neurons_to_keep: Dict[int, Sequence[int]]) -> None:
+    """
+    Keep only the listed intermediate (FFN) neurons of each layer.
+    """
+    for layer_idx, neurons in neurons_to_keep.items():
+        layer = encoder.encoder.layer[layer_idx]
+        index = torch.as_tensor(sorted(int(n) for n in neurons), dtype=torch.long)
+        if len(index) == 0:
+            raise ValueError(f"Layer {layer_idx} must keep at least one FFN neuron")
+
+        layer.intermediate.dense = _keep_outputs(layer.intermediate.dense, index)
+        layer.output.dense = _keep_inputs(layer.output.dense, index)
+
+
+def encoder_structure(encoder) -> Dict[str, List[int]]:
+    """
+    Attention heads and FFN size of every layer, as encoder_config
+    overrides (stored in the checkpoint, see apply_structure).
+    """
+    layers = encoder.encoder.layer
+    return {
+        "layer_num_heads": [int(layer.attention.self.num_attention_heads) for layer in layers],
+        "layer_intermediate_sizes": [int(layer.intermediate.dense.out_features) for layer in layers],
+    }
+
+
+def apply_structure(encoder, encoder_config: Optional[Dict]) -> None:
+    """
+    Resize a freshly built encoder to the per-layer shapes recorded by
+    encoder_structure (`layer_num_heads` / `layer_intermediate_sizes` of
+    encoder_config); no-op when they are absent. The weights are meant to be
+    overwritten by the checkpoint right after.
+    """
+    encoder_config = encoder_config or {}
+    num_heads: Optional[List[int]] = encoder_config.get("layer_num_heads")
+    sizes: Optional[List[int]] = encoder_config.get("layer_intermediate_sizes")
+
+    if num_heads is not None:
+        prune_heads(encoder, {i: range(n) for i, n in enumerate(num_heads)})
+    if sizes is not None:
+        prune_ffn(encoder, {i: range(n) for i, n in enumerate(sizes)})
@@ -0,0 +1,170 @@
+# train/checkpoint_manager.py
+"""
+On-disk training state for crash recovery and resume.
+
+- last.pt (in TRAIN_STATE_DIR): model, optimizer, scheduler, RNG states,
+  sampler position (epoch + batches consumed), early-stopping state,
+  partial epoch metrics and history. Written every CHECKPOINT_EVERY_STEPS
+  optimizer steps and at the end of every epoch.
+- CHECKPOINT_PATH (phobert_best.pt): best weights, written when the
+  validation loss improves, instead of a deepcopy held in RAM
+  (FINETUNE_MODE = "lora": the adapters only, LORA_ADAPTER_PATH).
+
+Every file is written to a temporary name, fsync'ed and renamed, so a crash
+never leaves a truncated checkpoint. With CHECKPOINT_ASYNC the write runs in
+a background thread on a CPU snapshot; at most one write is in flight.
+"""
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import torch
+
+import configs.config_train as config
+from src.utils.precision import cast_state_dict
+
+
+def _snapshot(obj):
+    """
+    Detached CPU copy of every tensor in a nested state (dict / list / tuple).
+    """
+    if torch.is_tensor(obj):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _snapshot(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_snapshot(v) for v in obj)
+    return obj
+
+
+def _atomic_save(obj, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        torch.save(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def rng_state() -> Dict[str, Any]:
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state: Dict[str, Any]):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+class CheckpointManager:
+    def __init__(
+        self,
+        state_dir: str = config.TRAIN_STATE_DIR,
+        best_path: str = None,
+        async_write: bool = config.CHECKPOINT_ASYNC,
+    ):
+        """
+        Args:
+            state_dir (str): directory of the resumable training state
+            best_path (str): where the best model weights go (phobert_best.pt)
+            async_write (bool): write in a background thread
+        """
+        self.last_path = os.path.join(state_dir, "last.pt")
+        self.best_path = best_path
+        self.async_write = async_write
+
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    # =====================================================
+    # ----------------- WRITE -----------------------------
+    # =====================================================
+    def _write(self, obj, path: str):
+        t0 = time.perf_counter()
+        try:
+            _atomic_save(obj, path)
+        except BaseException as e:  # re-raised on the training thread
+            self._error = e
+            return
+        print(f"[Checkpoint] {os.path.basename(path)} written in {time.perf_counter() - t0:.1f}s")
+
+    def _submit(self, obj, path: str):
+        self.wait()
+        if not self.async_write:
+            self._write(obj, path)
+            self.wait()
+            return
+
+        # Snapshot now: training keeps mutating the live tensors
+        obj = _snapshot(obj)
+        self._thread = threading.Thread(target=self._write, args=(obj, path), daemon=False)
+        self._thread.start()
+
+    def wait(self):
+        """
+        Block until the pending write is on disk; raise its error if it failed.
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Checkpoint write failed") from error
+
+    # =====================================================
+    # ----------------- SAVE ------------------------------
+    # =====================================================
+    def save_state(self, state: Dict[str, Any]):
+        """
+        Resumable training state -> last.pt (RNG states added here).
+        """
+        state = dict(state, rng=rng_state())
+        self._submit(state, self.last_path)
+
+    def save_best(self, model_state: Dict[str, torch.Tensor], metadata: Optional[Dict[str, Any]] = None):
+        """
+        Best weights in the usual checkpoint format (CHECKPOINT_DTYPE applied).
+        With `metadata` (LoRA adapters) the file is {**metadata, "state_dict": ...}.
+        """
+        state = cast_state_dict(model_state, config.CHECKPOINT_DTYPE)
+        if metadata is not None:
+            state = {**metadata, "state_dict": state}
+        self._submit(state, self.best_path)
+
+    # =====================================================
+    # ----------------- RESUME ----------------------------
+    # =====================================================
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Latest training state, or None when there is nothing to resume.
+        RNG states are restored by the caller (after model / data setup).
+        """
+        if not os.path.exists(self.last_path):
+            return None
+        state = torch.load(self.last_path, map_location="cpu", weights_only=False)
+        print(
+            f"[Checkpoint] Resuming from {self.last_path} "
+            f"(epoch {state['epoch'] + 1}, batch {state['step_in_epoch']})"
+        )
+        return state
+
+    def clear_state(self):
+        """
+        Remove the resumable state once training has finished.
+        """
+        self.wait()
+        if os.path.exists(self.last_path):
+            os.remove(self.last_path)
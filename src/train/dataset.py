@@ -1,9 +1,15 @@
 # dataset.py
 
+import os
+
+import numpy as np
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import DataLoader, Dataset, DistributedSampler
+from transformers import DataCollatorWithPadding
 import pandas as pd
 
+import configs.config_train as config
+
 
 class FakeNewsDataset(Dataset):
     def __init__(self, csv_path, tokenizer, max_len):
@@ -22,6 +28,11 @@ class FakeNewsDataset(Dataset):
         self.texts = self.df["text"].astype(str).tolist()
         self.labels = self.df["label"].astype(int).tolist()
 
+        # Cheap length proxy for length bucketing (segmented words + <s> </s>)
+        self.lengths = np.minimum(
+            [len(t.split()) + 2 for t in self.texts], max_len
+        )
+
         self.tokenizer = tokenizer
         self.max_len = max_len
 
@@ -44,3 +55,135 @@ class FakeNewsDataset(Dataset):
             "attention_mask": encoding["attention_mask"].squeeze(0),
             "labels": torch.tensor(label, dtype=torch.long)
         }
+
+
+class ShardedTokenDataset(Dataset):
+    def __init__(self, shard_dir):
+        """
+        Pre-tokenized split served from memory-mapped shards (see token_shards.py).
+        Samples are views on the mapped file: nothing is tokenized or copied
+        per item, and RAM does not grow with the size of the split.
+
+        Args:
+            shard_dir (str): directory written by token_shards.build_shards
+        """
+        self.shard_dir = shard_dir
+        self.lengths = np.load(os.path.join(shard_dir, "lengths.npy"))
+        self.offsets = np.load(os.path.join(shard_dir, "offsets.npy"))
+        self.labels = np.load(os.path.join(shard_dir, "labels.npy"))
+
+        # Opened lazily: a memmap would be pickled as a full copy into
+        # DataLoader worker processes
+        self._input_ids = None
+
+    @property
+    def input_ids(self):
+        if self._input_ids is None:
+            path = os.path.join(self.shard_dir, "input_ids.bin")
+            # copy-on-write: writable views (torch.from_numpy), file never modified
+            self._input_ids = np.memmap(path, dtype=np.int32, mode="c")
+        return self._input_ids
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_input_ids"] = None
+        return state
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, idx):
+        start = self.offsets[idx]
+        ids = self.input_ids[start:start + self.lengths[idx]]
+
+        return {
+            "input_ids": torch.from_numpy(ids),
+            "labels": torch.tensor(self.labels[idx], dtype=torch.long)
+        }
+
+
+class ShardCollator:
+    def __init__(self, pad_token_id):
+        """
+        Dynamic padding for ShardedTokenDataset samples
+        (same output as DataCollatorWithPadding).
+        """
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, samples):
+        max_len = max(s["input_ids"].size(0) for s in samples)
+        input_ids = torch.full((len(samples), max_len), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(samples), max_len), dtype=torch.long)
+
+        for row, s in enumerate(samples):
+            n = s["input_ids"].size(0)
+            input_ids[row, :n] = s["input_ids"]
+            attention_mask[row, :n] = 1
+
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": torch.stack([s["labels"] for s in samples])
+        }
+
+
+def _loader_generator():
+    """
+    Private RNG for DataLoader iterators: creating one must not consume the
+    global torch RNG, or a resumed run would get different dropout masks.
+    """
+    return torch.Generator().manual_seed(config.RANDOM_SEED)
+
+
+def build_loader(dataset, collate_fn, batch_size, shuffle, num_replicas=1, rank=0):
+    """
+    DataLoader over a dataset from build_dataset.
+    With LENGTH_BUCKETING, batches group samples of similar length; without
+    shuffle that means a global sort, shortest first. Unshuffled loaders of
+    batch_size=1 have no padding to save and keep the CSV order.
+    With num_replicas > 1 (DDP) each rank only iterates over its own share.
+    Shuffled loaders are deterministic per epoch: call
+    loader.batch_sampler.set_epoch(epoch[, start_batch]) before each epoch.
+    """
+    from src.train.samplers import LengthBucketBatchSampler, ResumableBatchSampler
+
+    if config.LENGTH_BUCKETING and (shuffle or batch_size > 1):
+        batch_sampler = LengthBucketBatchSampler(
+            dataset.lengths,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            num_replicas=num_replicas,
+            rank=rank
+        )
+        return DataLoader(
+            dataset, batch_sampler=batch_sampler, collate_fn=collate_fn, generator=_loader_generator()
+        )
+
+    if shuffle or num_replicas > 1:
+        sampler = DistributedSampler(
+            dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle, seed=config.RANDOM_SEED
+        )
+        batch_sampler = ResumableBatchSampler(sampler, batch_size)
+        return DataLoader(
+            dataset, batch_sampler=batch_sampler, collate_fn=collate_fn, generator=_loader_generator()
+        )
+
+    return DataLoader(
+        dataset, batch_size=batch_size, shuffle=False, collate_fn=collate_fn, generator=_loader_generator()
+    )
+
+
+def build_dataset(csv_path, tokenizer, max_len):
+    """
+    Dataset + collate_fn for a processed split.
+    With USE_TOKEN_SHARDS the split is tokenized once into memory-mapped
+    shards and reused across epochs / runs; otherwise FakeNewsDataset.
+    """
+    if config.USE_TOKEN_SHARDS:
+        from src.train.token_shards import ensure_shards
+
+        shard_dir = ensure_shards(csv_path, tokenizer, max_len)
+        return ShardedTokenDataset(shard_dir), ShardCollator(tokenizer.pad_token_id)
+
+    dataset = FakeNewsDataset(csv_path=csv_path, tokenizer=tokenizer, max_len=max_len)
+    return dataset, DataCollatorWithPadding(tokenizer=tokenizer)
@@ -0,0 +1,351 @@
+# train/distill.py
+"""
+Knowledge distillation of the fine-tuned PhoBERTClassifier into a smaller
+student.
+
+1. Teacher (TEACHER_CHECKPOINT_PATH) logits on train are computed once and
+   cached as a memory-mapped array (TEACHER_LOGITS_DIR, see output_cache.py).
+2. Student = STUDENT_NUM_LAYERS encoder layers taken evenly spaced from the
+   teacher, optionally narrowed to STUDENT_HIDDEN_SIZE; every weight is
+   initialized by slicing the corresponding teacher weight.
+3. Loss = DISTILL_ALPHA * KL(teacher || student, temperature T) * T^2
+        + (1 - DISTILL_ALPHA) * cross-entropy on the gold labels.
+   Best student (val macro-F1) -> STUDENT_CHECKPOINT_PATH, written as
+   {"encoder_config", "state_dict"} so NewsInferencer / evaluate.py rebuild
+   the smaller encoder when loading it.
+4. Teacher vs student table on test: layers, hidden size, parameters,
+   checkpoint size, batch-1 latency, throughput, macro-F1.
+
+    python src/train/distill.py                 # distill + compare
+    python src/train/distill.py --compare-only  # compare existing checkpoints
+"""
+import argparse
+import os
+import re
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from torch.optim import AdamW
+from torch.utils.data import Dataset
+from sklearn.metrics import accuracy_score, f1_score
+from transformers import AutoTokenizer, get_linear_schedule_with_warmup
+from tqdm import tqdm
+
+from src.model.model import PhoBERTClassifier, load_classifier, pack_checkpoint
+from src.train.dataset import build_dataset, build_loader
+from src.train.output_cache import ensure_outputs
+from src.train.train import eval_epoch, set_seed
+from src.utils.precision import autocast, cast_state_dict
+import configs.config_train as config
+
+_LAYER_KEY = re.compile(r"^encoder\.encoder\.layer\.(\d+)\.(.*)$")
+
+
+# =========================================================
+# Student initialization
+# =========================================================
+
+def student_layer_map(teacher_layers: int, student_layers: int) -> List[int]:
+    """
+    Teacher layer copied into each student layer: evenly spaced, last
+    layer always kept (e.g. 12 -> 4: [2, 5, 8, 11]).
+    """
+    if not 0 < student_layers <= teacher_layers:
+        raise ValueError(f"STUDENT_NUM_LAYERS must be in [1, {teacher_layers}]")
+    return [round((i + 1) * teacher_layers / student_layers) - 1 for i in range(student_layers)]
+
+
+def student_encoder_config(teacher_config, num_layers: int, hidden_size: int = None) -> Dict:
+    """
+    Backbone config overrides of the student.
+    A narrower hidden size keeps the head dimension and scales the number
+    of heads and the FFN size in proportion.
+    """
+    overrides = {"num_hidden_layers": num_layers}
+    if hidden_size is None or hidden_size == teacher_config.hidden_size:
+        return overrides
+
+    head_dim = teacher_config.hidden_size // teacher_config.num_attention_heads
+    if hidden_size > teacher_config.hidden_size or hidden_size % head_dim:
+        raise ValueError(
+            f"STUDENT_HIDDEN_SIZE must be a multiple of {head_dim} "
+            f"and at most {teacher_config.hidden_size}"
+        )
+    overrides.update({
+        "hidden_size": hidden_size,
+        "num_attention_heads": hidden_size // head_dim,
+        "intermediate_size": teacher_config.intermediate_size * hidden_size // teacher_config.hidden_size,
+    })
+    return overrides
+
+
+def init_student(teacher: PhoBERTClassifier, num_layers: int, hidden_size: int = None) -> PhoBERTClassifier:
+    """
+    Student whose every tensor is the leading slice of the matching teacher
+    tensor (selected layers, first `hidden_size` dimensions / heads).
+    """
+    teacher_config = teacher.encoder.config
+    student = PhoBERTClassifier(
+        model_name=config.MODEL_NAME,
+        num_classes=config.NUM_CLASSES,
+        dropout_rate=config.DROPOUT_RATE,
+        pretrained=False,
+        encoder_config=student_encoder_config(teacher_config, num_layers, hidden_size)
+    )
+    layer_map = student_layer_map(teacher_config.num_hidden_layers, num_layers)
+
+    teacher_state = teacher.state_dict()
+    state = {}
+    for key, tensor in student.state_dict().items():
+        source_key = key
+        match = _LAYER_KEY.match(key)
+        if match:
+            source_key = f"encoder.encoder.layer.{layer_map[int(match.group(1))]}.{match.group(2)}"
+        source = teacher_state[source_key]
+        state[key] = source[tuple(slice(0, n) for n in tensor.shape)].clone()
+    student.load_state_dict(state)
+
+    print(
+        f"[Distill] Student: layers {layer_map} of {teacher_config.num_hidden_layers}, "
+        f"hidden {student.encoder.config.hidden_size}, "
+        f"{sum(p.numel() for p in student.parameters()) / 1e6:.1f}M params"
+    )
+    return student
+
+
+# =========================================================
+# Data: samples + cached teacher logits
+# =========================================================
+
+class TeacherLogitsDataset(Dataset):
+    def __init__(self, dataset, teacher_logits):
+        """
+        Args:
+            dataset: split from build_dataset
+            teacher_logits: [len(dataset), NUM_CLASSES] (memmap), same row order
+        """
+        self.dataset = dataset
+        self.teacher_logits = teacher_logits
+        self.lengths = dataset.lengths  # length bucketing
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        sample = dict(self.dataset[idx])
+        sample["teacher_logits"] = torch.from_numpy(np.array(self.teacher_logits[idx]))
+        return sample
+
+
+class DistillCollator:
+    def __init__(self, collate_fn):
+        """
+        Wrap the split's collator; teacher logits are stacked separately.
+        """
+        self.collate_fn = collate_fn
+
+    def __call__(self, samples):
+        teacher_logits = torch.stack([s.pop("teacher_logits") for s in samples])
+        batch = self.collate_fn(samples)
+        batch["teacher_logits"] = teacher_logits
+        return batch
+
+
+def distillation_loss(student_logits, teacher_logits, labels, temperature, alpha):
+    """
+    alpha * T^2 * KL(softmax(teacher / T) || softmax(student / T))
+    + (1 - alpha) * CE(student, labels)
+    """
+    kl = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.log_softmax(teacher_logits / temperature, dim=-1),
+        reduction="batchmean",
+        log_target=True,
+    ) * temperature ** 2
+    ce = F.cross_entropy(student_logits, labels)
+    return alpha * kl + (1 - alpha) * ce
+
+
+# =========================================================
+# Training
+# =========================================================
+
+def distill() -> str:
+    set_seed(config.RANDOM_SEED)
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+
+    teacher = load_classifier(
+        config.TEACHER_CHECKPOINT_PATH, config.MODEL_NAME, config.NUM_CLASSES
+    ).to(device)
+
+    train_path = os.path.join(config.DATA_DIR, "train.csv")
+    teacher_logits, _ = ensure_outputs(
+        config.TEACHER_LOGITS_DIR, teacher, config.NUM_CLASSES, "logits",
+        train_path, tokenizer, device,
+        checkpoint_path=config.TEACHER_CHECKPOINT_PATH
+    )
+
+    student = init_student(teacher, config.STUDENT_NUM_LAYERS, config.STUDENT_HIDDEN_SIZE).to(device)
+    del teacher
+
+    train_dataset, collator = build_dataset(train_path, tokenizer, config.MAX_SEQ_LENGTH)
+    val_dataset, _ = build_dataset(
+        os.path.join(config.DATA_DIR, "val.csv"), tokenizer, config.MAX_SEQ_LENGTH
+    )
+    train_loader = build_loader(
+        TeacherLogitsDataset(train_dataset, teacher_logits), DistillCollator(collator),
+        batch_size=config.BATCH_SIZE, shuffle=True
+    )
+    val_loader = build_loader(val_dataset, collator, batch_size=config.BATCH_SIZE, shuffle=False)
+
+    optimizer = AdamW(
+        student.parameters(), lr=config.DISTILL_LEARNING_RATE, weight_decay=config.WEIGHT_DECAY
+    )
+    total_steps = len(train_loader) * config.DISTILL_EPOCHS
+    scheduler = get_linear_schedule_with_warmup(
+        optimizer, num_warmup_steps=int(0.1 * total_steps), num_training_steps=total_steps
+    )
+
+    history = {"epoch": [], "train_loss": [], "val_loss": [], "val_acc": [], "val_macro_f1": []}
+    best_f1 = -1.0
+
+    for epoch in range(config.DISTILL_EPOCHS):
+        print(f"\nEpoch {epoch + 1}/{config.DISTILL_EPOCHS}")
+        train_loader.batch_sampler.set_epoch(epoch)
+        student.train()
+        total_loss = torch.zeros((), device=device)
+
+        for batch in tqdm(train_loader, desc="Distilling"):
+            with autocast(device, config.AUTOCAST_DTYPE):
+                logits = student(
+                    input_ids=batch["input_ids"].to(device),
+                    attention_mask=batch["attention_mask"].to(device)
+                )
+            loss = distillation_loss(
+                logits.float(),
+                batch["teacher_logits"].to(device),
+                batch["labels"].to(device),
+                config.DISTILL_TEMPERATURE,
+                config.DISTILL_ALPHA,
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            total_loss += loss.detach()
+
+        val_loss, val_acc, val_macro_f1 = eval_epoch(student, val_loader, device)
+        train_loss = total_loss.item() / len(train_loader)
+        print(
+            f"Train Loss: {train_loss:.4f} | Val Loss: {val_loss:.4f} | "
+            f"Val Acc: {val_acc:.4f} | Val Macro-F1: {val_macro_f1:.4f}"
+        )
+
+        history["epoch"].append(epoch + 1)
+        history["train_loss"].append(train_loss)
+        history["val_loss"].append(val_loss)
+        history["val_acc"].append(val_acc)
+        history["val_macro_f1"].append(val_macro_f1)
+
+        if val_macro_f1 > best_f1:
+            best_f1 = val_macro_f1
+            os.makedirs(os.path.dirname(config.STUDENT_CHECKPOINT_PATH), exist_ok=True)
+            torch.save(
+                pack_checkpoint(
+                    cast_state_dict(student.state_dict(), config.CHECKPOINT_DTYPE),
+                    student.encoder_config
+                ),
+                config.STUDENT_CHECKPOINT_PATH
+            )
+
+    history_path = os.path.join(root_dir, "result/train/distillation_history.csv")
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    pd.DataFrame(history).to_csv(history_path, index=False)
+
+    print(f"Best student (Val Macro-F1 {best_f1:.4f}) saved to {config.STUDENT_CHECKPOINT_PATH}")
+    return config.STUDENT_CHECKPOINT_PATH
+
+
+# =========================================================
+# Teacher vs student
+# =========================================================
+
+def compare_models(num_latency_samples: int = 100) -> pd.DataFrame:
+    from src.train.evaluate import TEST_PATH, build_eval_loader, predict_loader, sample_single_batches
+    from src.utils.benchmark import latency_summary, save_report, time_calls
+
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+    test_loader = build_eval_loader(tokenizer, TEST_PATH)
+    # Random over the split: the first items of a length-sorted loader are the shortest
+    single_batches = sample_single_batches(tokenizer, TEST_PATH, num_latency_samples)
+
+    rows = []
+    for name, path in (
+        ("teacher", config.TEACHER_CHECKPOINT_PATH),
+        ("student", config.STUDENT_CHECKPOINT_PATH),
+    ):
+        model = load_classifier(path, config.MODEL_NAME, config.NUM_CLASSES).to(device)
+
+        latencies = time_calls(
+            lambda b: model(
+                input_ids=b["input_ids"].to(device), attention_mask=b["attention_mask"].to(device)
+            ),
+            single_batches,
+        )
+        t0 = time.perf_counter()
+        preds, labels = predict_loader(model, test_loader, device, config.AUTOCAST_DTYPE)
+        elapsed = time.perf_counter() - t0
+
+        rows.append({
+            "model": name,
+            "layers": model.encoder.config.num_hidden_layers,
+            "hidden_size": model.encoder.config.hidden_size,
+            "params_m": round(sum(p.numel() for p in model.parameters()) / 1e6, 2),
+            "checkpoint_mb": round(os.path.getsize(path) / 1024 ** 2, 2),
+            "latency_batch1_p50_ms": latency_summary(latencies)["p50_ms"],
+            "latency_batch1_p95_ms": latency_summary(latencies)["p95_ms"],
+            "throughput_samples_per_s": round(len(labels) / elapsed, 2),
+            "accuracy": round(accuracy_score(labels, preds), 4),
+            "macro_f1": round(f1_score(labels, preds, average="macro"), 4),
+        })
+        del model
+
+    table = pd.DataFrame(rows).set_index("model")
+    print(table.to_string())
+
+    teacher, student = rows
+    save_report("distillation", {
+        "num_test_samples": len(labels),
+        "models": rows,
+        "student_vs_teacher": {
+            "latency_speedup": round(
+                teacher["latency_batch1_p50_ms"] / student["latency_batch1_p50_ms"], 3
+            ),
+            "throughput_speedup": round(
+                student["throughput_samples_per_s"] / teacher["throughput_samples_per_s"], 3
+            ),
+            "size_ratio": round(student["checkpoint_mb"] / teacher["checkpoint_mb"], 3),
+            "macro_f1_delta": round(student["macro_f1"] - teacher["macro_f1"], 4),
+        },
+    })
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill PhoBERT into a smaller student")
+    parser.add_argument("--compare-only", action="store_true")
+    args = parser.parse_args()
+
+    if not args.compare_only:
+        distill()
+    compare_models()
@@ -0,0 +1,227 @@
+# train/distributed.py
+"""
+Multi-process DistributedDataParallel (gloo backend, CPU).
+
+train() switches to DDP when launched by torchrun (WORLD_SIZE > 1):
+
+    # 4 processes on one machine
+    torchrun --nproc_per_node 4 src/train/train.py
+
+    # 2 machines x 4 processes (run on each node, node_rank 0 / 1)
+    torchrun --nnodes 2 --node_rank 0 --nproc_per_node 4 \
+             --master_addr 10.0.0.1 --master_port 29500 src/train/train.py
+
+Every rank trains on its own share of the batches; gradients are averaged
+by DDP. Validation metrics are gathered over all ranks, so the early
+stopping decision is identical everywhere, and only rank 0 writes the
+checkpoint / history.
+
+Scaling report (samples/s against process count, one machine):
+    python src/train/distributed.py --procs 1 2 4 --max-batches 20
+"""
+import argparse
+import os
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import torch
+import torch.distributed as dist
+
+import configs.config_train as config
+
+
+# =========================================================
+# Process group
+# =========================================================
+
+def init_distributed():
+    """
+    Join the process group described by the torchrun environment.
+    Returns (rank, world_size); (0, 1) when not launched distributed.
+    """
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    if world_size == 1:
+        return 0, 1
+
+    if not dist.is_initialized():
+        dist.init_process_group(backend=config.DDP_BACKEND)
+
+    # Split the node's cores between the local processes
+    local_world_size = int(os.environ.get("LOCAL_WORLD_SIZE", 1))
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // local_world_size))
+
+    return dist.get_rank(), dist.get_world_size()
+
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def is_main_process() -> bool:
+    return not is_distributed() or dist.get_rank() == 0
+
+
+def is_local_main_process() -> bool:
+    return int(os.environ.get("LOCAL_RANK", 0)) == 0
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def cleanup():
+    if is_distributed():
+        dist.destroy_process_group()
+
+
+# =========================================================
+# Collectives for metrics
+# =========================================================
+
+def all_reduce_sum(*values):
+    """
+    Sum python numbers over all ranks (identity when not distributed).
+    """
+    if not is_distributed():
+        return values
+    tensor = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tuple(tensor.tolist())
+
+
+def all_gather_list(items: list) -> list:
+    """
+    Concatenate a python list over all ranks (rank order).
+    """
+    if not is_distributed():
+        return items
+    gathered = [None] * dist.get_world_size()
+    dist.all_gather_object(gathered, items)
+    return [x for part in gathered for x in part]
+
+
+def broadcast_flag(flag: bool) -> bool:
+    """
+    Rank 0's value of `flag` on every rank.
+    """
+    if not is_distributed():
+        return flag
+    tensor = torch.tensor([int(flag)])
+    dist.broadcast(tensor, src=0)
+    return bool(tensor.item())
+
+
+# =========================================================
+# Scaling report
+# =========================================================
+
+def _scaling_worker(rank, world_size, port, max_batches, results):
+    os.environ.update({
+        "MASTER_ADDR": "127.0.0.1",
+        "MASTER_PORT": str(port),
+        "WORLD_SIZE": str(world_size),
+        "RANK": str(rank),
+        "LOCAL_RANK": str(rank),
+        "LOCAL_WORLD_SIZE": str(world_size),
+    })
+
+    from torch.nn.parallel import DistributedDataParallel
+    from transformers import AutoTokenizer
+
+    from src.model.model import PhoBERTClassifier
+    from src.train.dataset import build_dataset, build_loader
+    from src.train.train import set_seed
+
+    init_distributed()
+    set_seed(config.RANDOM_SEED)
+
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+    dataset, collator = build_dataset(
+        os.path.join(config.DATA_DIR, "train.csv"), tokenizer, config.MAX_SEQ_LENGTH
+    )
+    loader = build_loader(
+        dataset, collator, config.BATCH_SIZE, shuffle=True,
+        num_replicas=world_size, rank=rank
+    )
+
+    model = PhoBERTClassifier(
+        model_name=config.MODEL_NAME,
+        num_classes=config.NUM_CLASSES,
+        dropout_rate=config.DROPOUT_RATE
+    )
+    if world_size > 1:
+        model = DistributedDataParallel(model)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=config.LEARNING_RATE)
+    model.train()
+
+    def step(batch):
+        optimizer.zero_grad()
+        logits = model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"])
+        torch.nn.functional.cross_entropy(logits, batch["labels"]).backward()
+        optimizer.step()
+
+    batches = iter(loader)
+    step(next(batches))  # warm-up (DDP bucket building, allocator)
+    barrier()
+
+    num_samples = 0
+    t0 = time.perf_counter()
+    for _, batch in zip(range(max_batches), batches):
+        step(batch)
+        num_samples += batch["input_ids"].size(0)
+    barrier()
+    elapsed = time.perf_counter() - t0
+
+    (total_samples,) = all_reduce_sum(num_samples)
+    if rank == 0:
+        results[world_size] = {
+            "processes": world_size,
+            "threads_per_process": torch.get_num_threads(),
+            "samples_per_s": round(total_samples / elapsed, 2),
+        }
+    cleanup()
+
+
+def scaling_report(procs=(1, 2, 4), max_batches: int = 20, port: int = 29517) -> dict:
+    """
+    Global training samples/s for each process count on this machine
+    (same total core budget, split between the processes).
+    """
+    import torch.multiprocessing as mp
+
+    from src.utils.benchmark import save_report
+
+    manager = mp.Manager()
+    results = manager.dict()
+    for n in procs:
+        mp.spawn(_scaling_worker, args=(n, port, max_batches, results), nprocs=n, join=True)
+        print(results[n])
+        port += 1
+
+    rows = [dict(results[n]) for n in procs]
+    base = rows[0]["samples_per_s"]
+    for row in rows:
+        row["speedup"] = round(row["samples_per_s"] / base, 3)
+        row["efficiency"] = round(row["speedup"] * procs[0] / row["processes"], 3)
+
+    report = {
+        "backend": config.DDP_BACKEND,
+        "cpu_count": os.cpu_count(),
+        "batch_size_per_process": config.BATCH_SIZE,
+        "timed_batches_per_process": max_batches,
+        "runs": rows,
+    }
+    save_report("ddp_scaling", report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DDP scaling report")
+    parser.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-batches", type=int, default=20)
+    args = parser.parse_args()
+
+    scaling_report(tuple(args.procs), args.max_batches)
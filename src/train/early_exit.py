@@ -0,0 +1,190 @@
+# train/early_exit.py
+"""
+Exit heads for confidence-based early-exit inference.
+
+1. The fine-tuned classifier (EXIT_BASE_CHECKPOINT) stays frozen; the CLS
+   state after every layer of EXIT_LAYERS is computed once per split and
+   cached (EXIT_CACHE_DIR, see output_cache.py).
+2. One Linear head per exit layer is trained on those states (HEAD_*
+   settings, same loop as head_only.py) and saved with the fingerprint of
+   the base checkpoint to EXIT_HEADS_PATH.
+3. Report on test, batch of 1, for several thresholds: average number of
+   layers executed, latency against the full model, accuracy / macro-F1
+   and agreement with the full model.
+
+Serve with EARLY_EXIT = True in configs/config_infer.py
+(threshold EARLY_EXIT_THRESHOLD, CONFIDENCE_HIGH by default).
+
+    python src/train/early_exit.py                # train heads + report
+    python src/train/early_exit.py --report-only
+"""
+import argparse
+import os
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+import torch
+from sklearn.metrics import accuracy_score, f1_score
+from transformers import AutoTokenizer
+
+from src.model.early_exit import EarlyExitClassifier, load_early_exit
+from src.model.model import load_classifier
+from src.train.head_only import train_head
+from src.train.output_cache import ensure_outputs
+from src.train.train import set_seed
+from src.utils.benchmark import latency_summary, save_report
+from src.utils.checkpoint import file_fingerprint
+import configs.config_train as config
+
+REPORT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def train_exit_heads(checkpoint_path=config.EXIT_BASE_CHECKPOINT) -> str:
+    set_seed(config.RANDOM_SEED)
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+
+    model = load_classifier(checkpoint_path, config.MODEL_NAME, config.NUM_CLASSES).to(device)
+    wrapped = EarlyExitClassifier(model, config.EXIT_LAYERS).to(device).eval()
+    hidden_size = model.encoder.config.hidden_size
+
+    # CLS states of all exit layers side by side, one cache per layer set
+    cache_root = os.path.join(
+        config.EXIT_CACHE_DIR, "layers-" + "-".join(map(str, wrapped.exit_layers))
+    )
+    data = {}
+    for split in ("train", "val"):
+        data[split] = ensure_outputs(
+            cache_root, wrapped.exit_cls, hidden_size * len(wrapped.exit_layers), "exit_cls",
+            os.path.join(config.DATA_DIR, f"{split}.csv"), tokenizer, device,
+            checkpoint_path=checkpoint_path
+        )
+
+    state_dict = {}
+    for k, layer in enumerate(wrapped.exit_layers):
+        print(f"\n[EarlyExit] Exit head after layer {layer}")
+        columns = slice(k * hidden_size, (k + 1) * hidden_size)
+        best_state, _ = train_head(
+            (data["train"][0][:, columns], data["train"][1]),
+            (data["val"][0][:, columns], data["val"][1]),
+            hidden_size,
+            device
+        )
+        for name, tensor in best_state.items():
+            state_dict[f"{layer}.{name}"] = tensor.cpu()
+
+    os.makedirs(os.path.dirname(config.EXIT_HEADS_PATH), exist_ok=True)
+    torch.save(
+        {
+            "exit_layers": wrapped.exit_layers,
+            "state_dict": state_dict,
+            "source": file_fingerprint(checkpoint_path),
+        },
+        config.EXIT_HEADS_PATH
+    )
+    print(f"Exit heads saved to {config.EXIT_HEADS_PATH}")
+    return config.EXIT_HEADS_PATH
+
+
+# =========================================================
+# Threshold report
+# =========================================================
+
+def report_early_exit(
+    checkpoint_path=config.EXIT_BASE_CHECKPOINT,
+    thresholds=REPORT_THRESHOLDS,
+    max_samples: int = 500
+) -> dict:
+    """
+    Items of the test split one by one (batch of 1, the serving worst case),
+    `max_samples` drawn at random (seeded) over the whole split: full model
+    vs early exit at each threshold.
+    """
+    from src.train.evaluate import TEST_PATH, sample_single_batches
+    from configs.config_infer import CONFIDENCE_HIGH
+
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+    batches = [
+        {k: v.to(device) for k, v in b.items()}
+        for b in sample_single_batches(tokenizer, TEST_PATH, max_samples)
+    ]
+    labels = [int(b["labels"][0]) for b in batches]
+
+    model = load_classifier(checkpoint_path, config.MODEL_NAME, config.NUM_CLASSES).to(device)
+    wrapped = load_early_exit(model, config.EXIT_HEADS_PATH, 1.0, checkpoint_path)
+    num_layers = model.encoder.config.num_hidden_layers
+
+    def run(fn):
+        preds, depths, latencies = [], [], []
+        with torch.no_grad():
+            for b in batches[:2]:  # warm-up
+                fn(b)
+            for b in batches:
+                t0 = time.perf_counter()
+                logits, depth = fn(b)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                preds.append(int(logits.argmax(dim=-1)[0]))
+                depths.append(int(depth[0]))
+        return preds, depths, latencies
+
+    full_preds, _, full_latencies = run(lambda b: (
+        model(input_ids=b["input_ids"], attention_mask=b["attention_mask"]),
+        torch.tensor([num_layers]),
+    ))
+    full_ms = float(np.mean(full_latencies))
+
+    rows = []
+    for threshold in sorted(set(thresholds) | {CONFIDENCE_HIGH}):
+        wrapped.threshold = threshold
+        preds, depths, latencies = run(
+            lambda b: wrapped.forward_with_exits(b["input_ids"], b["attention_mask"])
+        )
+        mean_ms = float(np.mean(latencies))
+        rows.append({
+            "threshold": threshold,
+            "avg_layers": round(float(np.mean(depths)), 3),
+            "exit_share": {
+                str(layer): round(depths.count(layer) / len(depths), 4)
+                for layer in wrapped.exit_layers + [num_layers]
+            },
+            "latency": latency_summary(latencies),
+            "latency_saved_pct": round(100 * (1 - mean_ms / full_ms), 2),
+            "accuracy": round(accuracy_score(labels, preds), 4),
+            "macro_f1": round(f1_score(labels, preds, average="macro"), 4),
+            "agreement_with_full": round(
+                sum(a == b for a, b in zip(preds, full_preds)) / len(preds), 4
+            ),
+        })
+        print(
+            f"threshold {threshold}: {rows[-1]['avg_layers']} layers, "
+            f"{rows[-1]['latency_saved_pct']}% latency saved, macro-F1 {rows[-1]['macro_f1']}"
+        )
+
+    report = {
+        "num_test_samples": len(batches),
+        "num_layers": num_layers,
+        "exit_layers": wrapped.exit_layers,
+        "full_model": {
+            "latency": latency_summary(full_latencies),
+            "accuracy": round(accuracy_score(labels, full_preds), 4),
+            "macro_f1": round(f1_score(labels, full_preds, average="macro"), 4),
+        },
+        "thresholds": rows,
+    }
+    save_report("early_exit", report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Early-exit heads: train + threshold report")
+    parser.add_argument("--report-only", action="store_true")
+    parser.add_argument("--max-samples", type=int, default=500)
+    args = parser.parse_args()
+
+    if not args.report_only:
+        train_exit_heads()
+    report_early_exit(max_samples=args.max_samples)
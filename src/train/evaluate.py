@@ -4,9 +4,9 @@ import sys
 import json
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 sys.path.insert(0, root_dir)
+import numpy as np
 import torch
-from torch.utils.data import DataLoader
-from transformers import AutoTokenizer, DataCollatorWithPadding
+from transformers import AutoTokenizer
 from sklearn.metrics import (
     classification_report,
     accuracy_score,
@@ -14,71 +14,103 @@ from sklearn.metrics import (
     confusion_matrix
 )
 
-from src.train.dataset import FakeNewsDataset
-from src.model.model import PhoBERTClassifier
+from src.train.dataset import build_dataset, build_loader
+from src.model.model import load_classifier
+from src.infer.vocab_prune import wrap_tokenizer
+from src.utils.precision import autocast
 import configs.config_train as config
 
 
-def evaluate():
-    device = torch.device(config.DEVICE)
-
-    TEST_PATH  = os.path.join(root_dir,"dataset/data_processed/test.csv")
-    CHECKPOINT_PATH = os.path.join(root_dir,"checkpoints/phobert_best.pt")
+TEST_PATH = os.path.join(root_dir, "dataset/data_processed/test.csv")
+CHECKPOINT_PATH = os.path.join(root_dir, "checkpoints/phobert_best.pt")
 
-    # Tokenizer (same as training)
-    tokenizer = AutoTokenizer.from_pretrained(
-        config.MODEL_NAME,
-        use_fast=False
-    )
 
-    # Test dataset & loader
-    test_dataset = FakeNewsDataset(
-        csv_path=TEST_PATH,
+def build_eval_loader(tokenizer, csv_path=TEST_PATH, batch_size=None):
+    """
+    DataLoader over a processed split (no shuffle, dynamic padding).
+    With LENGTH_BUCKETING and batch_size > 1 the batches come sorted by
+    length, shortest first; use sample_single_batches for latency samples.
+    """
+    dataset, data_collator = build_dataset(
+        csv_path=csv_path,
         tokenizer=tokenizer,
         max_len=config.MAX_SEQ_LENGTH
     )
 
-    data_collator = DataCollatorWithPadding(tokenizer)
-
-    test_loader = DataLoader(
-        test_dataset,
-        batch_size=config.BATCH_SIZE,
-        shuffle=False,
-        collate_fn=data_collator
+    return build_loader(
+        dataset,
+        data_collator,
+        batch_size=batch_size or config.BATCH_SIZE,
+        shuffle=False
     )
 
-    # Model
-    model = PhoBERTClassifier(
-        model_name=config.MODEL_NAME,
-        num_classes=config.NUM_CLASSES,
-        dropout_rate=config.DROPOUT_RATE,
-        freeze_encoder=False
-    ).to(device)
 
-    # Load best trained weights
-    model.load_state_dict(
-        torch.load(CHECKPOINT_PATH, map_location=device)
+def sample_single_batches(tokenizer, csv_path=TEST_PATH, num_samples=100, seed=config.RANDOM_SEED):
+    """
+    Batches of ONE sample, drawn at random (seeded) over the whole split,
+    so latency measurements cover every text length.
+    """
+    dataset, data_collator = build_dataset(
+        csv_path=csv_path,
+        tokenizer=tokenizer,
+        max_len=config.MAX_SEQ_LENGTH
     )
+    rng = np.random.default_rng(seed)
+    indices = rng.choice(len(dataset), size=min(num_samples, len(dataset)), replace=False)
+    return [data_collator([dataset[int(i)]]) for i in indices]
+
+
+def predict_loader(model, dataloader, device, autocast_dtype=None):
+    """
+    Run the model over a loader and collect predictions + gold labels.
+    `autocast_dtype`: None (fp32) or "bf16".
+    """
     model.eval()
 
     all_preds = []
     all_labels = []
 
     with torch.no_grad():
-        for batch in test_loader:
+        for batch in dataloader:
             input_ids = batch["input_ids"].to(device)
             attention_mask = batch["attention_mask"].to(device)
             labels = batch["labels"].to(device)
 
-            logits = model(
-                input_ids=input_ids,
-                attention_mask=attention_mask
-            )
+            with autocast(device, autocast_dtype):
+                logits = model(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask
+                )
             preds = torch.argmax(logits, dim=1)
 
             all_preds.extend(preds.cpu().tolist())
             all_labels.extend(labels.cpu().tolist())
 
+    return all_preds, all_labels
+
+
+def evaluate():
+    device = torch.device(config.DEVICE)
+
+    # Tokenizer (same as training; remapped ids for a pruned vocabulary)
+    tokenizer = wrap_tokenizer(
+        AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False),
+        CHECKPOINT_PATH
+    )
+
+    # Test dataset & loader
+    test_loader = build_eval_loader(tokenizer, TEST_PATH)
+
+    # Model with the best trained weights (stock or distilled encoder)
+    model = load_classifier(
+        CHECKPOINT_PATH, config.MODEL_NAME, config.NUM_CLASSES,
+        map_location=device, allow_pruned_vocab=True
+    ).to(device)
+
+    all_preds, all_labels = predict_loader(
+        model, test_loader, device, config.AUTOCAST_DTYPE
+    )
+
     acc = accuracy_score(all_labels, all_preds)
     macro_f1 = f1_score(all_labels, all_preds, average="macro")
     cm = confusion_matrix(all_labels, all_preds)
@@ -0,0 +1,229 @@
+# train/head_only.py
+"""
+Head-only retraining on cached frozen-encoder embeddings.
+
+1. The frozen encoder runs once over train / val / test; the CLS embedding
+   (before dropout) of every sample is stored in a memory-mapped array
+   EMBEDDING_CACHE_DIR/<split>-<digest>/embeddings.npy (see output_cache.py),
+   rebuilt when the encoder weights (HEAD_ENCODER_CHECKPOINT or the
+   pretrained backbone), tokenizer, MAX_SEQ_LENGTH or CSV change.
+
+2. Only the `classifier` head (dropout + Linear, as in PhoBERTClassifier) is
+   trained on those arrays, with early stopping on the validation loss
+   (HEAD_* settings in configs/config_train.py).
+
+3. The encoder + best head are written as a normal PhoBERTClassifier state
+   dict (HEAD_CHECKPOINT_PATH), loadable by evaluate.py / NewsInferencer.
+
+    python src/train/head_only.py [--encoder-checkpoint checkpoints/phobert_best.pt]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from sklearn.metrics import accuracy_score, f1_score
+from transformers import AutoTokenizer
+
+from src.model.model import PhoBERTClassifier, load_classifier, pack_checkpoint
+from src.train.output_cache import ensure_outputs, model_identity
+from src.train.train import set_seed
+from src.utils.benchmark import save_report
+from src.utils.precision import cast_state_dict
+import configs.config_train as config
+
+SPLITS = ("train", "val", "test")
+
+
+# =========================================================
+# Encoder
+# =========================================================
+
+def load_frozen_model(checkpoint_path=None, device="cpu") -> PhoBERTClassifier:
+    """
+    PhoBERTClassifier with a frozen encoder: pretrained backbone, or the
+    weights of a fine-tuned checkpoint.
+    """
+    if checkpoint_path is None:
+        model = PhoBERTClassifier(
+            model_name=config.MODEL_NAME,
+            num_classes=config.NUM_CLASSES,
+            dropout_rate=config.DROPOUT_RATE,
+            freeze_encoder=True
+        )
+    else:
+        model = load_classifier(checkpoint_path, config.MODEL_NAME, config.NUM_CLASSES)
+        model.requires_grad_(False)
+    return model.to(device).eval()
+
+
+# =========================================================
+# Head training
+# =========================================================
+
+def _batches(num_samples, batch_size, rng=None):
+    order = rng.permutation(num_samples) if rng is not None else np.arange(num_samples)
+    for start in range(0, num_samples, batch_size):
+        # Sorted indices: sequential reads from the memmap
+        yield np.sort(order[start:start + batch_size])
+
+
+def _evaluate_head(head, embeddings, labels, device):
+    head.eval()
+    total_loss, preds = 0.0, []
+    with torch.no_grad():
+        for idx in _batches(len(labels), config.HEAD_BATCH_SIZE):
+            x = torch.from_numpy(np.asarray(embeddings[idx])).to(device)
+            y = torch.from_numpy(labels[idx]).to(device)
+            logits = head(x)
+            total_loss += F.cross_entropy(logits, y, reduction="sum").item()
+            preds.extend(logits.argmax(dim=1).cpu().tolist())
+
+    return {
+        "loss": total_loss / len(labels),
+        "acc": accuracy_score(labels, preds),
+        "macro_f1": f1_score(labels, preds, average="macro"),
+    }
+
+
+def train_head(train_data, val_data, hidden_size, device):
+    """
+    Train dropout + Linear on cached embeddings.
+    Returns (best head state_dict, history dict).
+    """
+    train_x, train_y = train_data
+    head = torch.nn.Linear(hidden_size, config.NUM_CLASSES).to(device)
+    optimizer = torch.optim.AdamW(
+        head.parameters(), lr=config.HEAD_LEARNING_RATE, weight_decay=config.WEIGHT_DECAY
+    )
+    class_weights = None
+    if config.HEAD_CLASS_WEIGHTS is not None:
+        class_weights = torch.tensor(config.HEAD_CLASS_WEIGHTS, dtype=torch.float, device=device)
+
+    rng = np.random.default_rng(config.RANDOM_SEED)
+    history = {
+        "epoch": [], "train_loss": [], "val_loss": [], "val_acc": [], "val_macro_f1": []
+    }
+    best_val_loss, best_state, patience_counter = float("inf"), None, 0
+
+    for epoch in range(config.HEAD_EPOCHS):
+        head.train()
+        total_loss = torch.zeros((), device=device)
+        for idx in _batches(len(train_y), config.HEAD_BATCH_SIZE, rng):
+            x = torch.from_numpy(np.asarray(train_x[idx])).to(device)
+            y = torch.from_numpy(train_y[idx]).to(device)
+
+            logits = head(F.dropout(x, p=config.DROPOUT_RATE, training=True))
+            loss = F.cross_entropy(logits, y, weight=class_weights)
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.detach() * len(idx)
+
+        val = _evaluate_head(head, *val_data, device)
+        history["epoch"].append(epoch + 1)
+        history["train_loss"].append(total_loss.item() / len(train_y))
+        history["val_loss"].append(val["loss"])
+        history["val_acc"].append(val["acc"])
+        history["val_macro_f1"].append(val["macro_f1"])
+
+        if val["loss"] < best_val_loss:
+            best_val_loss = val["loss"]
+            best_state = copy.deepcopy(head.state_dict())
+            patience_counter = 0
+        else:
+            patience_counter += 1
+            if patience_counter >= config.HEAD_PATIENCE:
+                print(f"Early stopping at epoch {epoch + 1}.")
+                break
+
+    print(
+        f"Head: {len(history['epoch'])} epochs | best Val Loss: {best_val_loss:.4f} | "
+        f"Val Macro-F1: {max(history['val_macro_f1']):.4f}"
+    )
+    return best_state, history
+
+
+# =========================================================
+# Main pipeline
+# =========================================================
+
+def train_head_only(encoder_checkpoint=config.HEAD_ENCODER_CHECKPOINT) -> dict:
+    set_seed(config.RANDOM_SEED)
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+
+    # Frozen encoder: loaded once, used for missing caches and the export
+    model = load_frozen_model(encoder_checkpoint, device)
+
+    # ===== 1. Embedding cache =====
+    t0 = time.perf_counter()
+    hidden_size = model.encoder.config.hidden_size
+    data = {}
+    for split in SPLITS:
+        data[split] = ensure_outputs(
+            config.EMBEDDING_CACHE_DIR, model.encode, hidden_size, "embeddings",
+            os.path.join(config.DATA_DIR, f"{split}.csv"), tokenizer, device,
+            checkpoint_path=encoder_checkpoint
+        )
+    cache_seconds = time.perf_counter() - t0
+
+    # ===== 2. Head =====
+    t0 = time.perf_counter()
+    best_state, history = train_head(data["train"], data["val"], hidden_size, device)
+    head_seconds = time.perf_counter() - t0
+
+    head = torch.nn.Linear(hidden_size, config.NUM_CLASSES).to(device)
+    head.load_state_dict(best_state)
+    val = _evaluate_head(head, *data["val"], device)
+    test = _evaluate_head(head, *data["test"], device)
+
+    # ===== 3. Normal checkpoint (encoder + new head) =====
+    model.classifier.load_state_dict(best_state)
+    os.makedirs(os.path.dirname(config.HEAD_CHECKPOINT_PATH), exist_ok=True)
+    torch.save(
+        pack_checkpoint(
+            cast_state_dict(model.state_dict(), config.CHECKPOINT_DTYPE), model.encoder_config
+        ),
+        config.HEAD_CHECKPOINT_PATH
+    )
+    print(f"Head-only model saved to {config.HEAD_CHECKPOINT_PATH}")
+
+    history_path = os.path.join(root_dir, "result/train/head_only_history.csv")
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    pd.DataFrame(history).to_csv(history_path, index=False)
+
+    report = {
+        "encoder": model_identity(encoder_checkpoint),
+        "num_samples": {split: int(len(data[split][1])) for split in SPLITS},
+        "hidden_size": hidden_size,
+        "embedding_cache_seconds": round(cache_seconds, 2),
+        "head_train_seconds": round(head_seconds, 2),
+        "head_epochs": len(history["epoch"]),
+        "class_weights": config.HEAD_CLASS_WEIGHTS,
+        "val": {k: round(v, 4) for k, v in val.items()},
+        "test": {k: round(v, 4) for k, v in test.items()},
+        "checkpoint": config.HEAD_CHECKPOINT_PATH,
+    }
+    print(f"Test Accuracy: {test['acc']:.4f} | Test Macro-F1: {test['macro_f1']:.4f}")
+    save_report("head_only", report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Head-only retraining on cached embeddings")
+    parser.add_argument(
+        "--encoder-checkpoint", default=config.HEAD_ENCODER_CHECKPOINT,
+        help="fine-tuned checkpoint for the encoder weights (default: pretrained backbone)"
+    )
+    args = parser.parse_args()
+
+    train_head_only(args.encoder_checkpoint)
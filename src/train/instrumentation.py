@@ -0,0 +1,106 @@
+# train/instrumentation.py
+"""
+Training-loop instrumentation.
+
+- PhaseTimer : wall time per phase of train_epoch
+               (data_wait, forward, backward, optimizer)
+- build_profiler : opt-in torch.profiler window over N training steps,
+               exported as a Chrome trace (chrome://tracing, Perfetto).
+               Enabled by PROFILE_STEPS in configs/config_train.py, or
+               without touching the code through the environment:
+
+    FAKENEWS_PROFILE_STEPS=20:5 python src/train/train.py
+"""
+import contextlib
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+import torch
+
+import configs.config_train as config
+
+PHASES = ("data_wait", "forward", "backward", "optimizer")
+
+
+class PhaseTimer:
+    def __init__(self, device, label_for_profiler: bool = False, sync_cuda: Optional[bool] = None):
+        """
+        Args:
+            device: training device
+            label_for_profiler (bool): also emit a record_function range per
+                phase (visible in the profiler trace)
+            sync_cuda (bool): synchronize CUDA at every phase boundary so the
+                time lands in the right phase (one device sync per phase);
+                default PHASE_TIMING_SYNC. Without it, phases measure host
+                time and queued GPU work is paid by whichever phase blocks.
+        """
+        if sync_cuda is None:
+            sync_cuda = config.PHASE_TIMING_SYNC
+        self.sync_cuda = sync_cuda and torch.device(device).type == "cuda"
+        self.label_for_profiler = label_for_profiler
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        label = (
+            torch.profiler.record_function(name)
+            if self.label_for_profiler else contextlib.nullcontext()
+        )
+        with label:
+            t0 = time.perf_counter()
+            try:
+                yield
+            finally:
+                if self.sync_cuda:
+                    torch.cuda.synchronize()
+                self.seconds[name] += time.perf_counter() - t0
+
+    def summary(self) -> Dict[str, float]:
+        return {f"{name}_s": round(self.seconds[name], 3) for name in PHASES}
+
+
+def profile_window():
+    """
+    (start_step, num_steps) of the profiler window, or None when disabled.
+    """
+    if not config.PROFILE_STEPS:
+        return None
+    start, _, count = str(config.PROFILE_STEPS).partition(":")
+    return int(start), int(count or 1)
+
+
+def build_profiler(rank: int = 0) -> Optional[torch.profiler.profile]:
+    """
+    torch.profiler over micro-batches [start, start + num_steps) of the run;
+    call .step() after every micro-batch. The trace is written to
+    PROFILE_DIR/train_trace_rank<rank>.json when the window closes.
+    """
+    window = profile_window()
+    if window is None:
+        return None
+    start, num_steps = window
+
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    trace_path = os.path.join(config.PROFILE_DIR, f"train_trace_rank{rank}.json")
+
+    def export(prof):
+        prof.export_chrome_trace(trace_path)
+        print(f"[Profiler] Chrome trace of steps {start}-{start + num_steps - 1} saved to {trace_path}")
+
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+    # One warm-up step before the window when possible (profiler overhead)
+    warmup = 1 if start > 0 else 0
+    return torch.profiler.profile(
+        activities=activities,
+        schedule=torch.profiler.schedule(
+            skip_first=start - warmup, wait=0, warmup=warmup, active=num_steps, repeat=1
+        ),
+        on_trace_ready=export,
+        record_shapes=True,
+        profile_memory=True,
+    )
@@ -0,0 +1,195 @@
+# train/lora.py
+"""
+LoRA vs full fine-tuning, same data and number of epochs.
+
+For each mode the model is trained from the pretrained backbone with
+train_epoch (FINETUNE_MODE = "full" / "lora" settings of train()), then:
+- step time (epoch wall time per micro-batch, data loading included: the
+  same for both modes) and samples/s
+- peak RSS during training (and peak CUDA memory on GPU)
+- trainable parameters and AdamW state size
+- size of the checkpoint each mode writes (full state dict / adapters)
+- macro-F1 on test; LoRA is evaluated after merging, and the merged logits
+  are checked against the unmerged model
+
+    python src/train/lora.py                 # compare (1 epoch each)
+    python src/train/lora.py --epochs 3
+    python src/train/lora.py --merge         # LORA_ADAPTER_PATH -> phobert_best.pt
+"""
+import argparse
+import os
+import sys
+import tempfile
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import pandas as pd
+import torch
+from torch.optim import AdamW
+from sklearn.metrics import accuracy_score, f1_score
+from transformers import AutoTokenizer, get_linear_schedule_with_warmup
+
+from src.model.lora import apply_lora, load_adapter, lora_state_dict, merge_lora, pack_adapter
+from src.model.model import PhoBERTClassifier
+from src.train.checkpoint_manager import _atomic_save
+from src.train.dataset import build_dataset, build_loader
+from src.train.train import set_seed, train_epoch
+from src.utils.memory import PeakRSSMonitor
+from src.utils.precision import cast_state_dict
+import configs.config_train as config
+
+CHECKPOINT_PATH = os.path.join(config.OUTPUT_DIR, "phobert_best.pt")
+
+
+def merge_adapter(adapter_path=config.LORA_ADAPTER_PATH, out_path=CHECKPOINT_PATH) -> str:
+    """
+    Saved adapters merged into the pretrained backbone -> plain checkpoint.
+    """
+    merged = load_adapter(adapter_path, config.MODEL_NAME, config.NUM_CLASSES)
+    # out_path is the served checkpoint (possibly mmap'ed by web workers):
+    # never rewrite it in place
+    _atomic_save(cast_state_dict(merged.state_dict(), config.CHECKPOINT_DTYPE), str(out_path))
+    print(f"[LoRA] {adapter_path} merged into {out_path}")
+    return out_path
+
+
+def _state_mb(tensors) -> float:
+    return round(sum(t.numel() * t.element_size() for t in tensors) / 1024 ** 2, 2)
+
+
+def _run_mode(mode: str, train_loader, test_loader, device, epochs: int) -> dict:
+    from src.train.evaluate import predict_loader
+
+    set_seed(config.RANDOM_SEED)
+    model = PhoBERTClassifier(
+        model_name=config.MODEL_NAME,
+        num_classes=config.NUM_CLASSES,
+        dropout_rate=config.DROPOUT_RATE
+    ).to(device)
+
+    lora = mode == "lora"
+    if lora:
+        apply_lora(model, config.LORA_RANK, config.LORA_ALPHA, config.LORA_DROPOUT, config.LORA_TARGETS)
+    trainable = [p for p in model.parameters() if p.requires_grad]
+
+    optimizer = AdamW(
+        trainable,
+        lr=config.LORA_LEARNING_RATE if lora else config.LEARNING_RATE,
+        weight_decay=config.WEIGHT_DECAY
+    )
+    total_steps = len(train_loader) * epochs
+    scheduler = get_linear_schedule_with_warmup(
+        optimizer, num_warmup_steps=int(0.1 * total_steps), num_training_steps=total_steps
+    )
+
+    if device.type == "cuda":
+        torch.cuda.reset_peak_memory_stats(device)
+
+    epoch_s = 0.0
+    with PeakRSSMonitor() as memory_monitor:
+        for epoch in range(epochs):
+            print(f"\n[{mode}] Epoch {epoch + 1}/{epochs}")
+            train_loader.batch_sampler.set_epoch(epoch)
+            _, _, stats = train_epoch(model, train_loader, optimizer, scheduler, device)
+            epoch_s += stats["epoch_time_s"]
+
+    row = {
+        "mode": mode,
+        "trainable_params_m": round(sum(p.numel() for p in trainable) / 1e6, 3),
+        "trainable_pct": round(
+            100 * sum(p.numel() for p in trainable) / sum(p.numel() for p in model.parameters()), 2
+        ),
+        "optimizer_state_mb": _state_mb(
+            t for state in optimizer.state.values() for t in state.values()
+            if torch.is_tensor(t) and t.dim() > 0
+        ),
+        "step_time_ms": round(1000 * epoch_s / (len(train_loader) * epochs), 2),
+        "samples_per_s": round(len(train_loader.dataset) * epochs / epoch_s, 2),
+        "peak_rss_mb": memory_monitor.peak_mb,
+        "peak_rss_delta_mb": memory_monitor.delta_mb,
+    }
+    if device.type == "cuda":
+        row["peak_cuda_mb"] = round(torch.cuda.max_memory_allocated(device) / 1024 ** 2, 1)
+
+    # Checkpoint written by train() in this mode
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "checkpoint.pt")
+        if lora:
+            state = {
+                **pack_adapter(model, config.MODEL_NAME),
+                "state_dict": cast_state_dict(lora_state_dict(model), config.CHECKPOINT_DTYPE),
+            }
+        else:
+            state = cast_state_dict(model.state_dict(), config.CHECKPOINT_DTYPE)
+        torch.save(state, path)
+        row["checkpoint_mb"] = round(os.path.getsize(path) / 1024 ** 2, 2)
+
+    model.eval()
+    if lora:
+        batch = next(iter(test_loader))
+        inputs = {
+            "input_ids": batch["input_ids"].to(device),
+            "attention_mask": batch["attention_mask"].to(device),
+        }
+        with torch.no_grad():
+            unmerged = model(**inputs)
+            merge_lora(model)
+            row["merge_max_abs_logit_diff"] = float((model(**inputs) - unmerged).abs().max())
+
+    preds, labels = predict_loader(model, test_loader, device, config.AUTOCAST_DTYPE)
+    row["accuracy"] = round(accuracy_score(labels, preds), 4)
+    row["macro_f1"] = round(f1_score(labels, preds, average="macro"), 4)
+
+    del model, optimizer
+    return row
+
+
+def compare_finetune_modes(epochs: int = 1) -> pd.DataFrame:
+    from src.train.evaluate import TEST_PATH, build_eval_loader
+    from src.utils.benchmark import save_report
+
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+    train_dataset, collator = build_dataset(
+        os.path.join(config.DATA_DIR, "train.csv"), tokenizer, config.MAX_SEQ_LENGTH
+    )
+    train_loader = build_loader(train_dataset, collator, batch_size=config.BATCH_SIZE, shuffle=True)
+    test_loader = build_eval_loader(tokenizer, TEST_PATH)
+
+    rows = [_run_mode(mode, train_loader, test_loader, device, epochs) for mode in ("full", "lora")]
+
+    table = pd.DataFrame(rows).set_index("mode")
+    print(table.to_string())
+
+    full, lora = rows
+    save_report("lora_vs_full", {
+        "epochs": epochs,
+        "batch_size": config.BATCH_SIZE,
+        "lora": {
+            "rank": config.LORA_RANK,
+            "alpha": config.LORA_ALPHA,
+            "targets": config.LORA_TARGETS,
+            "learning_rate": config.LORA_LEARNING_RATE,
+        },
+        "modes": rows,
+        "lora_vs_full": {
+            "step_time_speedup": round(full["step_time_ms"] / lora["step_time_ms"], 3),
+            "peak_rss_saved_mb": round(full["peak_rss_mb"] - lora["peak_rss_mb"], 1),
+            "optimizer_state_ratio": round(lora["optimizer_state_mb"] / full["optimizer_state_mb"], 4),
+            "checkpoint_size_ratio": round(lora["checkpoint_mb"] / full["checkpoint_mb"], 4),
+            "macro_f1_delta": round(lora["macro_f1"] - full["macro_f1"], 4),
+        },
+    })
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LoRA vs full fine-tuning / merge adapters")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--merge", action="store_true", help="only merge LORA_ADAPTER_PATH")
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_adapter()
+    else:
+        compare_finetune_modes(epochs=args.epochs)
@@ -0,0 +1,145 @@
+# train/mixed_precision.py
+"""
+fp32 vs bf16 autocast on the processed splits.
+
+For each precision, starting from the same pretrained weights and seed:
+- a short fine-tuning run on train (samples/s, peak RSS)
+- evaluation on val (samples/s, macro-F1)
+plus the checkpoint size in fp32 and bf16.
+
+    python src/train/mixed_precision.py [--max-batches 50]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import torch
+from sklearn.metrics import f1_score
+from transformers import AutoTokenizer
+
+from src.model.model import PhoBERTClassifier
+from src.train.dataset import build_dataset, build_loader
+from src.train.evaluate import predict_loader
+from src.train.train import set_seed
+from src.utils.benchmark import save_report
+from src.utils.memory import PeakRSSMonitor
+from src.utils.precision import autocast, cast_state_dict
+import configs.config_train as config
+
+PRECISIONS = (None, "bf16")
+
+
+def _cpu_bf16_flags():
+    """
+    CPU features that give native bf16 matmuls (Linux only).
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = set(next(l for l in f if l.startswith("flags")).split())
+    except (OSError, StopIteration):
+        return None
+    return sorted(flags & {"avx512_bf16", "amx_bf16", "amx_tile"})
+
+
+def _serialized_mb(state_dict) -> float:
+    buffer = io.BytesIO()
+    torch.save(state_dict, buffer)
+    return round(buffer.tell() / 1024 ** 2, 2)
+
+
+def compare_precisions(max_batches: int = 50) -> dict:
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+
+    train_dataset, collator = build_dataset(
+        os.path.join(config.DATA_DIR, "train.csv"), tokenizer, config.MAX_SEQ_LENGTH
+    )
+    val_dataset, _ = build_dataset(
+        os.path.join(config.DATA_DIR, "val.csv"), tokenizer, config.MAX_SEQ_LENGTH
+    )
+
+    rows = {}
+    for precision in PRECISIONS:
+        name = precision or "fp32"
+        set_seed(config.RANDOM_SEED)
+
+        model = PhoBERTClassifier(
+            model_name=config.MODEL_NAME,
+            num_classes=config.NUM_CLASSES,
+            dropout_rate=config.DROPOUT_RATE
+        ).to(device)
+        optimizer = torch.optim.AdamW(
+            model.parameters(), lr=config.LEARNING_RATE, weight_decay=config.WEIGHT_DECAY
+        )
+        train_loader = build_loader(train_dataset, collator, config.BATCH_SIZE, shuffle=True)
+
+        # -------- train --------
+        model.train()
+        num_samples = 0
+        with PeakRSSMonitor() as mon:
+            t0 = time.perf_counter()
+            for step, batch in enumerate(train_loader):
+                if step >= max_batches:
+                    break
+                optimizer.zero_grad()
+                with autocast(device, precision):
+                    logits = model(
+                        input_ids=batch["input_ids"].to(device),
+                        attention_mask=batch["attention_mask"].to(device)
+                    )
+                loss = torch.nn.functional.cross_entropy(
+                    logits.float(), batch["labels"].to(device)
+                )
+                loss.backward()
+                optimizer.step()
+                num_samples += batch["input_ids"].size(0)
+            train_elapsed = time.perf_counter() - t0
+
+        # -------- eval --------
+        val_loader = build_loader(val_dataset, collator, config.BATCH_SIZE, shuffle=False)
+        t0 = time.perf_counter()
+        preds, labels = predict_loader(model, val_loader, device, precision)
+        eval_elapsed = time.perf_counter() - t0
+
+        rows[name] = {
+            "train_samples_per_s": round(num_samples / train_elapsed, 2),
+            "train_peak_rss_mb": mon.peak_mb,
+            "train_peak_rss_delta_mb": mon.delta_mb,
+            "eval_samples_per_s": round(len(labels) / eval_elapsed, 2),
+            "val_macro_f1": round(f1_score(labels, preds, average="macro"), 4),
+            "checkpoint_mb": _serialized_mb(cast_state_dict(model.state_dict(), precision)),
+        }
+        print(name, rows[name])
+        del model, optimizer
+
+    report = {
+        "device": str(device),
+        "torch_threads": torch.get_num_threads(),
+        "cpu_bf16_flags": _cpu_bf16_flags(),
+        "batch_size": config.BATCH_SIZE,
+        "train_batches": max_batches,
+        **rows,
+        "delta": {
+            "train_speedup": round(
+                rows["bf16"]["train_samples_per_s"] / rows["fp32"]["train_samples_per_s"], 3
+            ),
+            "eval_speedup": round(
+                rows["bf16"]["eval_samples_per_s"] / rows["fp32"]["eval_samples_per_s"], 3
+            ),
+            "val_macro_f1": round(rows["bf16"]["val_macro_f1"] - rows["fp32"]["val_macro_f1"], 4),
+        },
+    }
+    save_report("mixed_precision_bf16", report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fp32 vs bf16 autocast")
+    parser.add_argument("--max-batches", type=int, default=50)
+    args = parser.parse_args()
+
+    compare_precisions(args.max_batches)
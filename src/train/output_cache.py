@@ -0,0 +1,155 @@
+# train/output_cache.py
+"""
+Per-sample model outputs computed once and cached as memory-mapped arrays.
+
+Used for the frozen-encoder CLS embeddings of head_only.py and the teacher
+logits of distill.py. Layout of one cache directory (one per split):
+
+    <cache_root>/<split>-<digest>/
+        <name>.npy : float32 [num_samples, width], rows in CSV order
+                     (np.load(..., mmap_mode="r"))
+        labels.npy : int64
+        meta.json  : model, tokenizer, MAX_SEQ_LENGTH, source CSV fingerprint
+
+The digest covers the model weights (checkpoint fingerprint, or the
+pretrained backbone), the tokenizer, MAX_SEQ_LENGTH, AUTOCAST_DTYPE and the
+CSV fingerprint, so the cache is rebuilt when any of them changes.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Callable
+
+import numpy as np
+import torch
+
+from src.train.dataset import build_dataset, build_loader
+from src.train.token_shards import tokenizer_identity
+from src.utils.checkpoint import file_fingerprint
+from src.utils.precision import autocast
+import configs.config_train as config
+
+# Bump when the cache layout changes
+OUTPUT_CACHE_VERSION = 1
+
+
+def model_identity(checkpoint_path=None) -> str:
+    if checkpoint_path is None:
+        return f"{config.MODEL_NAME}:pretrained"
+    fp = file_fingerprint(checkpoint_path)
+    return f"{config.MODEL_NAME}:{fp['path']}:{fp['size']}:{fp['mtime_ns']}"
+
+
+def output_dir_for(cache_root, csv_path, tokenizer, checkpoint_path=None) -> str:
+    fp = file_fingerprint(csv_path)
+    payload = (
+        f"v{OUTPUT_CACHE_VERSION}|{model_identity(checkpoint_path)}|"
+        f"{tokenizer_identity(tokenizer)}|{config.MAX_SEQ_LENGTH}|{config.AUTOCAST_DTYPE}|"
+        f"{fp['path']}|{fp['size']}|{fp['mtime_ns']}"
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    split = os.path.splitext(os.path.basename(str(csv_path)))[0]
+    return os.path.join(cache_root, f"{split}-{digest}")
+
+
+def build_outputs(
+    output_fn: Callable,
+    width: int,
+    name: str,
+    csv_path,
+    tokenizer,
+    out_dir: str,
+    device,
+    identity: str,
+) -> str:
+    """
+    Run `output_fn(input_ids, attention_mask) -> [batch, width]` over
+    `csv_path` and write one row per CSV row to `out_dir/<name>.npy`;
+    the directory appears atomically.
+    """
+    t0 = time.perf_counter()
+    dataset, collator = build_dataset(csv_path, tokenizer, config.MAX_SEQ_LENGTH)
+    loader = build_loader(dataset, collator, batch_size=config.BATCH_SIZE, shuffle=False)
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    outputs = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, f"{name}.npy"), mode="w+",
+        dtype=np.float32, shape=(len(dataset), width)
+    )
+    labels = np.zeros(len(dataset), dtype=np.int64)
+
+    # Length-bucketed batches are not in CSV order: write rows by index
+    with torch.no_grad():
+        for indices, batch in zip(loader.batch_sampler, loader):
+            with autocast(device, config.AUTOCAST_DTYPE):
+                out = output_fn(
+                    input_ids=batch["input_ids"].to(device),
+                    attention_mask=batch["attention_mask"].to(device)
+                )
+            outputs[indices] = out.float().cpu().numpy()
+            labels[indices] = batch["labels"].numpy()
+
+    outputs.flush()
+    del outputs
+    np.save(os.path.join(tmp_dir, "labels.npy"), labels)
+
+    meta = {
+        "format_version": OUTPUT_CACHE_VERSION,
+        "name": name,
+        "model": identity,
+        "tokenizer": tokenizer_identity(tokenizer),
+        "max_len": config.MAX_SEQ_LENGTH,
+        "autocast_dtype": config.AUTOCAST_DTYPE,
+        "source": file_fingerprint(csv_path),
+        "num_samples": int(len(labels)),
+        "width": width,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4, ensure_ascii=False)
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(tmp_dir)
+    else:
+        os.replace(tmp_dir, out_dir)
+
+    print(
+        f"[OutputCache] {meta['num_samples']} x {width} {name} "
+        f"written to {out_dir} in {time.perf_counter() - t0:.1f}s"
+    )
+    return out_dir
+
+
+def load_outputs(cache_dir, name: str):
+    """
+    (outputs memmap [N, width], labels [N]) of a cache directory.
+    """
+    outputs = np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+    labels = np.load(os.path.join(cache_dir, "labels.npy"))
+    return outputs, labels
+
+
+def ensure_outputs(
+    cache_root,
+    output_fn: Callable,
+    width: int,
+    name: str,
+    csv_path,
+    tokenizer,
+    device,
+    checkpoint_path=None,
+):
+    """
+    Cached outputs of the model loaded from `checkpoint_path` (None: the
+    pretrained backbone) on `csv_path`, computed first if needed.
+    """
+    out_dir = output_dir_for(cache_root, csv_path, tokenizer, checkpoint_path)
+    if not os.path.exists(os.path.join(out_dir, "meta.json")):
+        build_outputs(
+            output_fn, width, name, csv_path, tokenizer, out_dir, device,
+            model_identity(checkpoint_path)
+        )
+    return load_outputs(out_dir, name)
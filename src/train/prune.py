@@ -0,0 +1,334 @@
+# train/prune.py
+"""
+Structured pruning of the PhoBERT encoder (attention heads + FFN neurons).
+
+1. Importance on val: for every head and every FFN neuron, the first-order
+   Taylor estimate of the loss change when it is removed,
+   |sum(weight * grad)| over its Q / K / V rows and output-projection
+   columns (heads) or its intermediate row and output column (neurons),
+   accumulated per batch and normalized per layer.
+2. For each sparsity level, the lowest-ranked share of heads and of FFN
+   neurons (global ranking, at least one of each kept per layer) is cut
+   out of the weight matrices: the model really gets smaller and faster,
+   no masks.
+3. Optional short fine-tuning on train (PRUNE_FINETUNE_EPOCHS).
+4. Sweep table on test: parameters, CPU latency (batch of 1; random test
+   items and full MAX_SEQ_LENGTH inputs), macro-F1.
+   PRUNE_TARGET_SPARSITY is written to PRUNE_CHECKPOINT_PATH with its
+   per-layer structure, loadable by NewsInferencer / load_classifier.
+
+    python src/train/prune.py
+    python src/train/prune.py --no-finetune --levels 0.3 0.5
+"""
+import argparse
+import copy
+import os
+import sys
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+from typing import Dict, List
+
+import pandas as pd
+import torch
+import torch.nn.functional as F
+from torch.optim import AdamW
+from sklearn.metrics import accuracy_score, f1_score
+from transformers import AutoTokenizer, get_linear_schedule_with_warmup
+from tqdm import tqdm
+
+from src.model.model import PhoBERTClassifier, load_classifier, pack_checkpoint
+from src.model.pruning import encoder_structure, prune_ffn, prune_heads
+from src.train.dataset import build_dataset, build_loader
+from src.train.train import eval_epoch, set_seed
+from src.utils.precision import autocast, cast_state_dict
+import configs.config_train as config
+
+
+# =========================================================
+# Importance
+# =========================================================
+
+def _taylor_rows(linear) -> torch.Tensor:
+    """sum(w * grad) per output feature (weight row + bias)."""
+    contrib = (linear.weight * linear.weight.grad).sum(dim=1)
+    if linear.bias is not None:
+        contrib = contrib + linear.bias * linear.bias.grad
+    return contrib
+
+
+def _taylor_columns(linear) -> torch.Tensor:
+    """sum(w * grad) per input feature (weight column)."""
+    return (linear.weight * linear.weight.grad).sum(dim=0)
+
+
+def score_importance(model: PhoBERTClassifier, loader, device):
+    """
+    (head_scores, ffn_scores): one tensor per layer, [num_heads] and
+    [intermediate_size], each L2-normalized within its layer so that
+    layers can be ranked against each other.
+    """
+    layers = model.encoder.encoder.layer
+    head_scores = [
+        torch.zeros(layer.attention.self.num_attention_heads, device=device) for layer in layers
+    ]
+    ffn_scores = [
+        torch.zeros(layer.intermediate.dense.out_features, device=device) for layer in layers
+    ]
+
+    # Dropout off, gradients on
+    model.eval()
+    for batch in tqdm(loader, desc="Scoring heads / FFN"):
+        model.zero_grad(set_to_none=False)
+        logits = model(
+            input_ids=batch["input_ids"].to(device),
+            attention_mask=batch["attention_mask"].to(device)
+        )
+        F.cross_entropy(logits.float(), batch["labels"].to(device)).backward()
+
+        with torch.no_grad():
+            for i, layer in enumerate(layers):
+                attn = layer.attention.self
+                per_dim = (
+                    _taylor_rows(attn.query) + _taylor_rows(attn.key) + _taylor_rows(attn.value)
+                    + _taylor_columns(layer.attention.output.dense)
+                )
+                head_scores[i] += per_dim.view(-1, attn.attention_head_size).sum(dim=1).abs()
+                ffn_scores[i] += (
+                    _taylor_rows(layer.intermediate.dense) + _taylor_columns(layer.output.dense)
+                ).abs()
+
+    model.zero_grad(set_to_none=True)
+
+    def normalize(scores):
+        return [(s / s.norm().clamp_min(1e-12)).cpu() for s in scores]
+
+    return normalize(head_scores), normalize(ffn_scores)
+
+
+def select_kept(scores: List[torch.Tensor], sparsity: float) -> Dict[int, List[int]]:
+    """
+    Indices kept per layer after removing the `sparsity` share of units
+    with the lowest score across all layers (never the last one of a layer).
+    """
+    ranked = sorted(
+        (float(score), layer_idx, unit)
+        for layer_idx, layer_scores in enumerate(scores)
+        for unit, score in enumerate(layer_scores)
+    )
+    remaining = [len(layer_scores) for layer_scores in scores]
+    budget = int(round(sparsity * sum(remaining)))
+
+    removed = set()
+    for _, layer_idx, unit in ranked:
+        if len(removed) >= budget:
+            break
+        if remaining[layer_idx] == 1:
+            continue
+        removed.add((layer_idx, unit))
+        remaining[layer_idx] -= 1
+
+    return {
+        layer_idx: [u for u in range(len(layer_scores)) if (layer_idx, u) not in removed]
+        for layer_idx, layer_scores in enumerate(scores)
+    }
+
+
+def prune_model(model: PhoBERTClassifier, head_scores, ffn_scores, sparsity: float) -> PhoBERTClassifier:
+    """
+    Pruned copy of `model`; its encoder_config records the new structure.
+    """
+    pruned = copy.deepcopy(model)
+    prune_heads(pruned.encoder, select_kept(head_scores, sparsity))
+    prune_ffn(pruned.encoder, select_kept(ffn_scores, sparsity))
+    pruned.encoder_config = {**(model.encoder_config or {}), **encoder_structure(pruned.encoder)}
+    return pruned
+
+
+# =========================================================
+# Fine-tuning
+# =========================================================
+
+def finetune(model: PhoBERTClassifier, train_loader, val_loader, device, epochs: int) -> float:
+    """
+    Short cross-entropy fine-tuning of a pruned model; returns val macro-F1.
+    """
+    optimizer = AdamW(
+        model.parameters(), lr=config.PRUNE_LEARNING_RATE, weight_decay=config.WEIGHT_DECAY
+    )
+    total_steps = len(train_loader) * epochs
+    scheduler = get_linear_schedule_with_warmup(
+        optimizer, num_warmup_steps=int(0.1 * total_steps), num_training_steps=total_steps
+    )
+
+    val_macro_f1 = None
+    for epoch in range(epochs):
+        train_loader.batch_sampler.set_epoch(epoch)
+        model.train()
+        for batch in tqdm(train_loader, desc=f"Fine-tuning {epoch + 1}/{epochs}"):
+            with autocast(device, config.AUTOCAST_DTYPE):
+                logits = model(
+                    input_ids=batch["input_ids"].to(device),
+                    attention_mask=batch["attention_mask"].to(device)
+                )
+            loss = F.cross_entropy(logits.float(), batch["labels"].to(device))
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+
+        val_loss, val_acc, val_macro_f1 = eval_epoch(model, val_loader, device)
+        print(f"Val Loss: {val_loss:.4f} | Val Acc: {val_acc:.4f} | Val Macro-F1: {val_macro_f1:.4f}")
+
+    model.eval()
+    return val_macro_f1
+
+
+# =========================================================
+# Sweep
+# =========================================================
+
+def _predict(model, loader, device):
+    from src.train.evaluate import predict_loader
+
+    return predict_loader(model, loader, device, config.AUTOCAST_DTYPE)
+
+
+def _max_len_batches(tokenizer, runs: int = 20) -> List[dict]:
+    """
+    `runs` copies of one input of exactly MAX_SEQ_LENGTH tokens (random ids):
+    latency where the encoder, not fixed overhead, dominates.
+    """
+    generator = torch.Generator().manual_seed(config.RANDOM_SEED)
+    input_ids = torch.randint(5, len(tokenizer), (1, config.MAX_SEQ_LENGTH), generator=generator)
+    input_ids[0, 0], input_ids[0, -1] = tokenizer.bos_token_id, tokenizer.eos_token_id
+    batch = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+    return [batch] * runs
+
+
+def _test_metrics(model, test_loader, single_batches, max_len_batches, device) -> dict:
+    from src.utils.benchmark import latency_summary, time_calls
+
+    preds, labels = _predict(model, test_loader, device)
+
+    # Latency on CPU (serving fleet), fp32, one item per call: test items
+    # drawn at random, then full-length inputs
+    cpu_model = copy.deepcopy(model).cpu().eval()
+
+    def forward(b):
+        return cpu_model(input_ids=b["input_ids"], attention_mask=b["attention_mask"])
+
+    latency = latency_summary(time_calls(forward, single_batches))
+    latency_max_len = latency_summary(time_calls(forward, max_len_batches))
+    del cpu_model
+
+    return {
+        "params_m": round(sum(p.numel() for p in model.parameters()) / 1e6, 2),
+        "cpu_latency_p50_ms": latency["p50_ms"],
+        "cpu_latency_p95_ms": latency["p95_ms"],
+        "cpu_latency_max_len_p50_ms": latency_max_len["p50_ms"],
+        "accuracy": round(accuracy_score(labels, preds), 4),
+        "macro_f1": round(f1_score(labels, preds, average="macro"), 4),
+    }
+
+
+def prune_sweep(
+    checkpoint_path=config.PRUNE_BASE_CHECKPOINT,
+    levels=config.PRUNE_SPARSITY_LEVELS,
+    finetune_epochs: int = config.PRUNE_FINETUNE_EPOCHS,
+    num_latency_samples: int = 100
+) -> pd.DataFrame:
+    from src.train.evaluate import TEST_PATH, build_eval_loader, sample_single_batches
+    from src.utils.benchmark import save_report
+
+    set_seed(config.RANDOM_SEED)
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+
+    train_dataset, collator = build_dataset(
+        os.path.join(config.DATA_DIR, "train.csv"), tokenizer, config.MAX_SEQ_LENGTH
+    )
+    train_loader = build_loader(train_dataset, collator, batch_size=config.BATCH_SIZE, shuffle=True)
+    val_loader = build_eval_loader(tokenizer, os.path.join(config.DATA_DIR, "val.csv"))
+    test_loader = build_eval_loader(tokenizer, TEST_PATH)
+    single_batches = sample_single_batches(tokenizer, TEST_PATH, num_latency_samples)
+    max_len_batches = _max_len_batches(tokenizer)
+
+    base = load_classifier(checkpoint_path, config.MODEL_NAME, config.NUM_CLASSES).to(device)
+    head_scores, ffn_scores = score_importance(base, val_loader, device)
+
+    total_heads = sum(len(s) for s in head_scores)
+    total_neurons = sum(len(s) for s in ffn_scores)
+
+    rows = [{"sparsity": 0.0, "heads": total_heads, "ffn_neurons": total_neurons,
+             **_test_metrics(base, test_loader, single_batches, max_len_batches, device)}]
+    print(f"Unpruned: {rows[0]['cpu_latency_p50_ms']} ms p50, macro-F1 {rows[0]['macro_f1']}")
+
+    for sparsity in sorted(set(levels) | {config.PRUNE_TARGET_SPARSITY}):
+        print(f"\n[Prune] Sparsity {sparsity}")
+        model = prune_model(base, head_scores, ffn_scores, sparsity)
+        structure = model.encoder_config
+
+        row = {
+            "sparsity": sparsity,
+            "heads": sum(structure["layer_num_heads"]),
+            "ffn_neurons": sum(structure["layer_intermediate_sizes"]),
+        }
+        if finetune_epochs > 0:
+            preds, labels = _predict(model, test_loader, device)
+            row["macro_f1_before_finetune"] = round(f1_score(labels, preds, average="macro"), 4)
+            finetune(model, train_loader, val_loader, device, finetune_epochs)
+
+        row.update(_test_metrics(model, test_loader, single_batches, max_len_batches, device))
+        row["latency_saved_pct"] = round(
+            100 * (1 - row["cpu_latency_p50_ms"] / rows[0]["cpu_latency_p50_ms"]), 2
+        )
+        row["latency_saved_max_len_pct"] = round(
+            100 * (1 - row["cpu_latency_max_len_p50_ms"] / rows[0]["cpu_latency_max_len_p50_ms"]), 2
+        )
+        row["macro_f1_delta"] = round(row["macro_f1"] - rows[0]["macro_f1"], 4)
+        rows.append(row)
+        print(
+            f"{row['heads']}/{total_heads} heads, {row['ffn_neurons']}/{total_neurons} FFN neurons: "
+            f"{row['latency_saved_pct']}% CPU latency saved "
+            f"({row['latency_saved_max_len_pct']}% at {config.MAX_SEQ_LENGTH} tokens), macro-F1 {row['macro_f1']}"
+        )
+
+        if sparsity == config.PRUNE_TARGET_SPARSITY:
+            os.makedirs(os.path.dirname(config.PRUNE_CHECKPOINT_PATH), exist_ok=True)
+            torch.save(
+                pack_checkpoint(
+                    cast_state_dict(model.state_dict(), config.CHECKPOINT_DTYPE),
+                    model.encoder_config
+                ),
+                config.PRUNE_CHECKPOINT_PATH
+            )
+            print(f"Pruned model saved to {config.PRUNE_CHECKPOINT_PATH}")
+        del model
+
+    table = pd.DataFrame(rows).set_index("sparsity")
+    print(table.to_string())
+
+    save_report("structured_pruning", {
+        "checkpoint": str(checkpoint_path),
+        "num_test_samples": len(test_loader.dataset),
+        "num_latency_samples": len(single_batches),
+        "max_len_latency_tokens": config.MAX_SEQ_LENGTH,
+        "finetune_epochs": finetune_epochs,
+        "target_sparsity": config.PRUNE_TARGET_SPARSITY,
+        "pruned_checkpoint": config.PRUNE_CHECKPOINT_PATH,
+        "sweep": rows,
+    })
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Structured head / FFN pruning sweep")
+    parser.add_argument("--levels", type=float, nargs="+", default=config.PRUNE_SPARSITY_LEVELS)
+    parser.add_argument("--no-finetune", action="store_true")
+    args = parser.parse_args()
+
+    prune_sweep(
+        levels=args.levels,
+        finetune_epochs=0 if args.no_finetune else config.PRUNE_FINETUNE_EPOCHS
+    )
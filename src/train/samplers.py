@@ -0,0 +1,269 @@
+# train/samplers.py
+"""
+Length-bucketed batch sampler.
+
+Batches group samples of similar token length, so dynamic padding only pads
+up to lengths that are actually close:
+- shuffle=True  : indices are shuffled, cut into chunks of
+                  batch_size * chunk_batches, each chunk is sorted by length
+                  and split into batches, then the batch order is shuffled.
+                  Call set_epoch(epoch) to get a different permutation per epoch;
+                  set_epoch(epoch, start_batch) resumes mid-epoch.
+- shuffle=False : global sort by length, shortest first (evaluation,
+                  deterministic). The first batches are NOT a representative
+                  sample; build_loader keeps CSV order for batch_size=1.
+
+With num_replicas > 1 (DDP) every rank builds the same batch list from the
+same seed and keeps every num_replicas-th batch. When shuffling, the list is
+padded by repeating batches so all ranks run the same number of steps.
+
+Run as a script to measure padding ratio and samples/s, random vs bucketed:
+    python src/train/samplers.py
+"""
+import itertools
+import os
+import sys
+import time
+from typing import Iterator, List
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+from torch.utils.data import BatchSampler, Sampler
+
+import configs.config_train as config
+
+
+class LengthBucketBatchSampler(Sampler[List[int]]):
+    def __init__(
+        self,
+        lengths,
+        batch_size: int,
+        shuffle: bool = True,
+        chunk_batches: int = config.BUCKET_CHUNK_BATCHES,
+        drop_last: bool = False,
+        seed: int = config.RANDOM_SEED,
+        num_replicas: int = 1,
+        rank: int = 0,
+    ):
+        """
+        Args:
+            lengths: token length (or a proxy) of every sample
+            batch_size (int): samples per batch
+            shuffle (bool): randomize chunks and batch order (training)
+            chunk_batches (int): batches per sorted chunk; larger = less
+                padding, less randomness
+            drop_last (bool): drop the last incomplete batch of each chunk
+            seed (int): base seed, combined with the epoch
+            num_replicas (int): number of DDP ranks sharing the batches
+            rank (int): rank of this process
+        """
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.chunk_size = batch_size * max(1, chunk_batches)
+        self.drop_last = drop_last
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+        self.start_batch = 0
+
+    def set_epoch(self, epoch: int, start_batch: int = 0):
+        """
+        Seed the permutation with `epoch`; skip the first `start_batch`
+        batches of this rank (resume after a checkpoint).
+        """
+        self.epoch = epoch
+        self.start_batch = start_batch
+
+    def _batches(self) -> List[List[int]]:
+        if not self.shuffle:
+            order = np.argsort(self.lengths, kind="stable")
+            chunks = [order]
+        else:
+            rng = np.random.default_rng(self.seed + self.epoch)
+            order = rng.permutation(len(self.lengths))
+            chunks = [
+                order[start:start + self.chunk_size]
+                for start in range(0, len(order), self.chunk_size)
+            ]
+
+        batches = []
+        for chunk in chunks:
+            chunk = chunk[np.argsort(self.lengths[chunk], kind="stable")]
+            for start in range(0, len(chunk), self.batch_size):
+                batch = chunk[start:start + self.batch_size]
+                if self.drop_last and len(batch) < self.batch_size:
+                    continue
+                batches.append(batch.tolist())
+
+        if self.shuffle:
+            rng.shuffle(batches)
+        return batches
+
+    def _shard(self, batches: List[List[int]]) -> List[List[int]]:
+        if self.num_replicas == 1:
+            return batches
+        if self.shuffle and batches:
+            # Equal number of steps on every rank (DDP all-reduce in backward)
+            missing = -len(batches) % self.num_replicas
+            batches = batches + batches[:missing]
+        return batches[self.rank::self.num_replicas]
+
+    def _num_batches(self) -> int:
+        if self.drop_last:
+            return len(self._batches())
+        if not self.shuffle:
+            return -(-len(self.lengths) // self.batch_size)
+        full, rest = divmod(len(self.lengths), self.chunk_size)
+        return full * (self.chunk_size // self.batch_size) + -(-rest // self.batch_size)
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return iter(self._shard(self._batches())[self.start_batch:])
+
+    def __len__(self) -> int:
+        total = self._num_batches()
+        if self.num_replicas > 1:
+            if self.shuffle:
+                total = -(-total // self.num_replicas)
+            else:
+                total = len(range(self.rank, total, self.num_replicas))
+        return max(0, total - self.start_batch)
+
+
+class ResumableBatchSampler(BatchSampler):
+    """
+    BatchSampler over a per-epoch deterministic sampler (DistributedSampler)
+    that forwards set_epoch and can start mid-epoch, like
+    LengthBucketBatchSampler. Used when LENGTH_BUCKETING is off.
+    """
+
+    def __init__(self, sampler, batch_size: int, drop_last: bool = False):
+        super().__init__(sampler, batch_size, drop_last)
+        self.start_batch = 0
+
+    def set_epoch(self, epoch: int, start_batch: int = 0):
+        if hasattr(self.sampler, "set_epoch"):
+            self.sampler.set_epoch(epoch)
+        self.start_batch = start_batch
+
+    def __iter__(self) -> Iterator[List[int]]:
+        return itertools.islice(super().__iter__(), self.start_batch, None)
+
+    def __len__(self) -> int:
+        return max(0, super().__len__() - self.start_batch)
+
+
+def padding_ratio(lengths, batches) -> float:
+    """
+    Share of padded positions over all positions fed to the encoder.
+    """
+    lengths = np.asarray(lengths)
+    real = padded = 0
+    for batch in batches:
+        batch_lengths = lengths[batch]
+        real += int(batch_lengths.sum())
+        padded += int(batch_lengths.max()) * len(batch)
+    return 1.0 - real / padded if padded else 0.0
+
+
+# =========================================================
+# Random vs bucketed batches on the processed splits
+# =========================================================
+
+def benchmark_bucketing(max_batches: int = 30, warmup: int = 3) -> dict:
+    """
+    Padding ratio over a full epoch (train: shuffled, val: eval order) and
+    samples/s of a training step / eval forward over the first `max_batches`
+    batches, for random batches and length-bucketed batches.
+
+    The first `warmup` batches of each sampler are also run once beforehand
+    and not timed, so neither sampler pays for the cold start (allocator,
+    kernel selection) of the other.
+    """
+    import torch
+    from torch.utils.data import DataLoader, RandomSampler, SequentialSampler
+    from transformers import AutoTokenizer
+
+    from src.model.model import PhoBERTClassifier
+    from src.train.dataset import build_dataset
+    from src.utils.benchmark import save_report
+
+    device = torch.device(config.DEVICE)
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+    model = PhoBERTClassifier(
+        model_name=config.MODEL_NAME,
+        num_classes=config.NUM_CLASSES,
+        dropout_rate=config.DROPOUT_RATE
+    ).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=config.LEARNING_RATE)
+
+    def train_step(batch):
+        model.train()
+        optimizer.zero_grad()
+        logits = model(
+            input_ids=batch["input_ids"].to(device),
+            attention_mask=batch["attention_mask"].to(device)
+        )
+        torch.nn.functional.cross_entropy(logits, batch["labels"].to(device)).backward()
+        optimizer.step()
+
+    def eval_step(batch):
+        model.eval()
+        with torch.no_grad():
+            model(
+                input_ids=batch["input_ids"].to(device),
+                attention_mask=batch["attention_mask"].to(device)
+            )
+
+    def sync():
+        if device.type == "cuda":
+            torch.cuda.synchronize()
+
+    report = {"batch_size": config.BATCH_SIZE, "timed_batches": max_batches, "warmup_batches": warmup}
+    for split, shuffle, step in (("train", True, train_step), ("val", False, eval_step)):
+        csv_path = os.path.join(config.DATA_DIR, f"{split}.csv")
+        dataset, collator = build_dataset(csv_path, tokenizer, config.MAX_SEQ_LENGTH)
+
+        base = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+        samplers = {
+            "random": BatchSampler(base, config.BATCH_SIZE, drop_last=False),
+            "bucketed": LengthBucketBatchSampler(
+                dataset.lengths, config.BATCH_SIZE, shuffle=shuffle
+            ),
+        }
+
+        report[split] = {}
+        for name, batch_sampler in samplers.items():
+            batches = list(batch_sampler)
+            loader = DataLoader(dataset, batch_sampler=batches[:max_batches], collate_fn=collator)
+
+            for batch in DataLoader(dataset, batch_sampler=batches[:warmup], collate_fn=collator):
+                step(batch)
+            sync()
+
+            num_samples = 0
+            t0 = time.perf_counter()
+            for batch in loader:
+                step(batch)
+                num_samples += batch["input_ids"].size(0)
+            sync()
+            elapsed = time.perf_counter() - t0
+
+            report[split][name] = {
+                "padding_ratio": round(padding_ratio(dataset.lengths, batches), 4),
+                "samples_per_s": round(num_samples / elapsed, 2),
+            }
+            print(split, name, report[split][name])
+
+        report[split]["speedup"] = round(
+            report[split]["bucketed"]["samples_per_s"] / report[split]["random"]["samples_per_s"], 3
+        )
+
+    save_report("length_bucketing", report)
+    return report
+
+
+if __name__ == "__main__":
+    benchmark_bucketing()
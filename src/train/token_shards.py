@@ -0,0 +1,132 @@
+# train/token_shards.py
+"""
+One-time tokenization of the processed splits into memory-mapped shards.
+
+Layout of one shard directory (one per split):
+    input_ids.bin : every sequence back to back, int32 (special tokens included)
+    offsets.npy   : start of each sequence in input_ids.bin, int64
+    lengths.npy   : number of tokens of each sequence, int32
+    labels.npy    : int64
+    meta.json     : tokenizer, MAX_SEQ_LENGTH, source CSV fingerprint, counts
+
+The directory name hashes the tokenizer identity, max length and the CSV
+fingerprint (path + size + mtime), so editing the CSV or changing
+MAX_SEQ_LENGTH builds a new shard instead of serving stale ids.
+
+Build every split ahead of time (otherwise built on first use):
+    python src/train/token_shards.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
+
+import numpy as np
+import pandas as pd
+
+from src.utils.checkpoint import file_fingerprint
+import configs.config_train as config
+
+# Bump when the shard layout changes
+SHARD_FORMAT_VERSION = 1
+
+
+def tokenizer_identity(tokenizer) -> str:
+    return f"{tokenizer.name_or_path}:{type(tokenizer).__name__}:{len(tokenizer)}"
+
+
+def shard_dir_for(csv_path, tokenizer, max_len: int) -> str:
+    """
+    Shard directory of a CSV for this tokenizer / max length.
+    """
+    fp = file_fingerprint(csv_path)
+    payload = (
+        f"v{SHARD_FORMAT_VERSION}|{tokenizer_identity(tokenizer)}|{max_len}|"
+        f"{fp['path']}|{fp['size']}|{fp['mtime_ns']}"
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    split = os.path.splitext(os.path.basename(str(csv_path)))[0]
+    return os.path.join(config.TOKEN_SHARD_DIR, f"{split}-{max_len}-{digest}")
+
+
+def build_shards(csv_path, tokenizer, max_len: int, out_dir: str) -> str:
+    """
+    Tokenize `csv_path` chunk by chunk and write the shard to `out_dir`.
+    The CSV is never fully loaded; the shard appears atomically when done.
+    """
+    t0 = time.perf_counter()
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    lengths, labels = [], []
+    with open(os.path.join(tmp_dir, "input_ids.bin"), "wb") as f:
+        for chunk in pd.read_csv(csv_path, chunksize=config.TOKENIZE_CHUNK_ROWS):
+            if "text" not in chunk.columns or "label" not in chunk.columns:
+                raise ValueError("CSV file must contain 'text' and 'label' columns")
+
+            encoded = tokenizer(
+                chunk["text"].astype(str).tolist(),
+                truncation=True,
+                max_length=max_len,
+            )["input_ids"]
+
+            for ids in encoded:
+                np.asarray(ids, dtype=np.int32).tofile(f)
+                lengths.append(len(ids))
+            labels.extend(chunk["label"].astype(int).tolist())
+
+    lengths = np.asarray(lengths, dtype=np.int32)
+    offsets = np.zeros(len(lengths), dtype=np.int64)
+    if len(lengths) > 1:
+        np.cumsum(lengths[:-1], out=offsets[1:])
+
+    np.save(os.path.join(tmp_dir, "lengths.npy"), lengths)
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_dir, "labels.npy"), np.asarray(labels, dtype=np.int64))
+
+    meta = {
+        "format_version": SHARD_FORMAT_VERSION,
+        "tokenizer": tokenizer_identity(tokenizer),
+        "max_len": max_len,
+        "source": file_fingerprint(csv_path),
+        "num_samples": int(len(lengths)),
+        "num_tokens": int(lengths.sum()),
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4, ensure_ascii=False)
+
+    # Another process may have finished the same shard meanwhile
+    if os.path.isdir(out_dir):
+        shutil.rmtree(tmp_dir)
+    else:
+        os.replace(tmp_dir, out_dir)
+
+    print(
+        f"[TokenShards] {meta['num_samples']} samples / {meta['num_tokens']} tokens "
+        f"written to {out_dir} in {time.perf_counter() - t0:.1f}s"
+    )
+    return out_dir
+
+
+def ensure_shards(csv_path, tokenizer, max_len: int) -> str:
+    """
+    Shard directory for `csv_path`, tokenizing it first if needed.
+    """
+    out_dir = shard_dir_for(csv_path, tokenizer, max_len)
+    if not os.path.exists(os.path.join(out_dir, "meta.json")):
+        build_shards(csv_path, tokenizer, max_len, out_dir)
+    return out_dir
+
+
+if __name__ == "__main__":
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(config.MODEL_NAME, use_fast=False)
+    for split in ("train", "val", "test"):
+        csv_path = os.path.join(config.DATA_DIR, f"{split}.csv")
+        print(ensure_shards(csv_path, tokenizer, config.MAX_SEQ_LENGTH))
@@ -1,20 +1,41 @@
 # train.py
 import os
 import sys
+import math
 import random
+import time
+import itertools
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, root_dir)
 import numpy as np
 import torch
-from torch.utils.data import DataLoader
 from torch.optim import AdamW
+from torch.nn.parallel import DistributedDataParallel
 from transformers import get_linear_schedule_with_warmup
-from transformers import AutoTokenizer, DataCollatorWithPadding
+from transformers import AutoTokenizer
 from tqdm import tqdm
 import pandas as pd
-import copy
+import contextlib
 from sklearn.metrics import f1_score
 
-from src.train.dataset import FakeNewsDataset
+from src.train.dataset import build_dataset, build_loader
+from src.train.instrumentation import PhaseTimer, build_profiler
+from src.train.checkpoint_manager import CheckpointManager, set_rng_state
+from src.train.distributed import (
+    init_distributed,
+    is_main_process,
+    is_local_main_process,
+    barrier,
+    cleanup,
+    all_reduce_sum,
+    all_gather_list,
+    broadcast_flag,
+)
 from src.model.model import PhoBERTClassifier
+from src.model.lora import apply_lora, lora_state_dict, pack_adapter
+from src.utils.memory import PeakRSSMonitor
+from src.utils.checkpoint import file_fingerprint
+from src.utils.precision import autocast
 import configs.config_train  as config
 
 
@@ -32,42 +53,132 @@ def set_seed(seed):
 # =========================
 # Training for one epoch
 # =========================
-def train_epoch(model, dataloader, optimizer, scheduler, device):
+def train_epoch(
+    model,
+    dataloader,
+    optimizer,
+    scheduler,
+    device,
+    accum_steps=1,
+    start_step=0,
+    progress=None,
+    on_optimizer_step=None,
+    profiler=None
+):
+    """
+    One pass over `dataloader`; one optimizer + scheduler step every
+    `accum_steps` micro-batches (and on the last, possibly shorter, group).
+
+    Resume: `dataloader` already skips the first `start_step` batches of the
+    epoch and `progress` holds the metric sums accumulated before them.
+    `on_optimizer_step(step, progress)` is called after every optimizer
+    step with the number of batches consumed in this epoch; the loss /
+    correct sums in `progress` may be (device) tensors.
+
+    `profiler` (torch.profiler, optional) is stepped after every micro-batch.
+
+    Returns (avg_loss, accuracy, stats): stats holds the seconds spent per
+    phase on this rank, the epoch wall time and samples/s, tokens/s summed
+    over all ranks.
+    """
     model.train()
-    total_loss = 0.0
-    correct = 0
-    total = 0
-
-    for batch in tqdm(dataloader, desc="Training"):
-        optimizer.zero_grad()
-
-        input_ids = batch["input_ids"].to(device)
-        attention_mask = batch["attention_mask"].to(device)
-        labels = batch["labels"].to(device)
-
-        logits = model(input_ids=input_ids, attention_mask=attention_mask)
-        loss = torch.nn.functional.cross_entropy(logits, labels)
-
-        loss.backward()
-        optimizer.step()
-        scheduler.step()
-
-        total_loss += loss.item()
-
-        preds = torch.argmax(logits, dim=1)
-        correct += (preds == labels).sum().item()
-        total += labels.size(0)
-
-    avg_loss = total_loss / len(dataloader)
+    progress = dict(progress or {"total_loss": 0.0, "num_batches": 0, "correct": 0, "total": 0})
+    timer = PhaseTimer(device, label_for_profiler=profiler is not None)
+    num_samples = num_tokens = 0
+
+    num_batches = start_step + len(dataloader)
+    optimizer.zero_grad()
+
+    bar = tqdm(dataloader, desc="Training", disable=not is_main_process())
+    batches = iter(bar)
+    epoch_start = time.perf_counter()
+    for step in itertools.count(start_step):
+        # Time blocked on the DataLoader (collate, workers) + host -> device copy
+        with timer.phase("data_wait"):
+            batch = next(batches, None)
+            if batch is None:
+                break
+            input_ids = batch["input_ids"].to(device, non_blocking=True)
+            attention_mask = batch["attention_mask"].to(device, non_blocking=True)
+            labels = batch["labels"].to(device, non_blocking=True)
+
+        # Counted on the CPU batch: no device sync
+        num_samples += batch["labels"].size(0)
+        num_tokens += int(batch["attention_mask"].sum())
+
+        # Average over the micro-batches of this optimizer step
+        group_start = step - step % accum_steps
+        group_size = min(accum_steps, num_batches - group_start)
+        is_step_end = step - group_start + 1 == group_size
+
+        # DDP: all-reduce gradients only on the last micro-batch of the group
+        sync = contextlib.nullcontext()
+        if isinstance(model, DistributedDataParallel) and not is_step_end:
+            sync = model.no_sync()
+
+        with sync:
+            with timer.phase("forward"):
+                with autocast(device, config.AUTOCAST_DTYPE):
+                    logits = model(input_ids=input_ids, attention_mask=attention_mask)
+
+                # Loss in fp32 on upcast logits
+                loss = torch.nn.functional.cross_entropy(logits.float(), labels)
+
+            with timer.phase("backward"):
+                (loss / group_size).backward()
+
+        # Sums stay on the device (no .item() sync per step; PhaseTimer only
+        # syncs with PHASE_TIMING_SYNC)
+        progress["total_loss"] += loss.detach()
+        progress["num_batches"] += 1
+
+        preds = torch.argmax(logits.detach(), dim=1)
+        progress["correct"] += (preds == labels).sum()
+        progress["total"] += labels.size(0)
+
+        if is_step_end:
+            with timer.phase("optimizer"):
+                optimizer.step()
+                scheduler.step()
+                optimizer.zero_grad()
+
+            if on_optimizer_step is not None:
+                on_optimizer_step(step + 1, progress)
+
+        if profiler is not None:
+            profiler.step()
+
+    epoch_time = time.perf_counter() - epoch_start
+
+    # Totals over all ranks (DDP)
+    total_loss, num_batches, correct, total, num_samples, num_tokens = all_reduce_sum(
+        float(progress["total_loss"]), progress["num_batches"],
+        float(progress["correct"]), progress["total"],
+        num_samples, num_tokens
+    )
+    avg_loss = total_loss / num_batches
     accuracy = correct / total
 
-    return avg_loss, accuracy
+    stats = {
+        **timer.summary(),
+        "epoch_time_s": round(epoch_time, 3),
+        "samples_per_s": round(num_samples / epoch_time, 2),
+        "tokens_per_s": round(num_tokens / epoch_time, 1),
+    }
+    return avg_loss, accuracy, stats
 
 
 # =========================
 # Validation for one epoch
 # =========================
 def eval_epoch(model, dataloader, device):
+    """
+    Validation metrics; with DDP each rank evaluates its own share and the
+    metrics are computed over all ranks (identical on every rank).
+    """
+    # No DDP wrapper in eval: its forward would sync buffers across ranks
+    if isinstance(model, DistributedDataParallel):
+        model = model.module
     model.eval()
     total_loss = 0.0
     correct = 0
@@ -82,8 +193,9 @@ def eval_epoch(model, dataloader, device):
             attention_mask = batch["attention_mask"].to(device)
             labels = batch["labels"].to(device)
 
-            logits = model(input_ids=input_ids, attention_mask=attention_mask)
-            loss = torch.nn.functional.cross_entropy(logits, labels)
+            with autocast(device, config.AUTOCAST_DTYPE):
+                logits = model(input_ids=input_ids, attention_mask=attention_mask)
+            loss = torch.nn.functional.cross_entropy(logits.float(), labels)
 
             total_loss += loss.item()
 
@@ -94,7 +206,13 @@ def eval_epoch(model, dataloader, device):
             all_preds.extend(preds.cpu().numpy())
             all_labels.extend(labels.cpu().numpy())
 
-    avg_loss = total_loss / len(dataloader)
+    total_loss, num_batches, correct, total = all_reduce_sum(
+        total_loss, len(dataloader), correct, total
+    )
+    all_preds = all_gather_list([int(p) for p in all_preds])
+    all_labels = all_gather_list([int(l) for l in all_labels])
+
+    avg_loss = total_loss / num_batches
     accuracy = correct / total
     macro_f1 = f1_score(all_labels, all_preds, average="macro")
 
@@ -105,17 +223,21 @@ def eval_epoch(model, dataloader, device):
 # Main training pipeline
 # =========================
 def train():
- 
-    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-    data_processed_dir(root_dir,"dataset/data_processed")
-    
+
+    data_processed_dir = os.path.join(root_dir, "dataset/data_processed")
+
     TRAIN_PATH = os.path.join(data_processed_dir,"train.csv")
     VAL_PATH   = os.path.join(data_processed_dir,"val.csv")
-    TEST_PATH  = os.path.join(data_processed_dir,"test")
+    TEST_PATH  = os.path.join(data_processed_dir,"test.csv")
     
     CHECKPOINT_PATH = os.path.join(os.path.abspath(os.path.join(data_processed_dir,"../..")),"checkpoints/phobert_best.pt")
     RESULT_PATH = os.path.join(os.path.abspath(os.path.join(data_processed_dir,"../..")),"result/train/training_history.csv")
     
+    # DDP when launched by torchrun (WORLD_SIZE > 1)
+    rank, world_size = init_distributed()
+    if world_size > 1:
+        print(f"[DDP] rank {rank}/{world_size} ({config.DDP_BACKEND})")
+
     set_seed(config.RANDOM_SEED)
     device = torch.device(config.DEVICE)
 
@@ -125,34 +247,40 @@ def train():
         use_fast=False
     )
 
-    # Datasets
-    train_dataset = FakeNewsDataset(
-        csv_path=TRAIN_PATH,
-        tokenizer=tokenizer,
-        max_len=config.MAX_SEQ_LENGTH
-    )
-
-    val_dataset = FakeNewsDataset(
-        csv_path=VAL_PATH,
-        tokenizer=tokenizer,
-        max_len=config.MAX_SEQ_LENGTH
-    )
-
-    # Dynamic padding
-    data_collator = DataCollatorWithPadding(tokenizer=tokenizer)
-
-    train_loader = DataLoader(
+    # Datasets (pre-tokenized shards) + dynamic padding.
+    # One process per node builds missing shards, the others wait and reuse them
+    for build_now in (is_local_main_process(), not is_local_main_process()):
+        if build_now:
+            train_dataset, data_collator = build_dataset(
+                csv_path=TRAIN_PATH,
+                tokenizer=tokenizer,
+                max_len=config.MAX_SEQ_LENGTH
+            )
+
+            val_dataset, _ = build_dataset(
+                csv_path=VAL_PATH,
+                tokenizer=tokenizer,
+                max_len=config.MAX_SEQ_LENGTH
+            )
+        barrier()
+
+    # Length-bucketed batches (LENGTH_BUCKETING), sharded across DDP ranks
+    train_loader = build_loader(
         train_dataset,
+        data_collator,
         batch_size=config.BATCH_SIZE,
         shuffle=True,
-        collate_fn=data_collator
+        num_replicas=world_size,
+        rank=rank
     )
 
-    val_loader = DataLoader(
+    val_loader = build_loader(
         val_dataset,
+        data_collator,
         batch_size=config.BATCH_SIZE,
         shuffle=False,
-        collate_fn=data_collator
+        num_replicas=world_size,
+        rank=rank
     )
 
     # Model
@@ -163,15 +291,41 @@ def train():
         freeze_encoder=False
     ).to(device)
 
-    # Optimizer
+    # LoRA: frozen encoder, only the adapters and the classifier head train
+    lora = config.FINETUNE_MODE == "lora"
+    if lora:
+        apply_lora(
+            model, config.LORA_RANK, config.LORA_ALPHA, config.LORA_DROPOUT, config.LORA_TARGETS
+        )
+        num_trainable = sum(p.numel() for p in model.parameters() if p.requires_grad)
+        if is_main_process():
+            print(
+                f"[LoRA] {num_trainable:,} trainable parameters "
+                f"({100 * num_trainable / sum(p.numel() for p in model.parameters()):.2f}%)"
+            )
+    elif config.FINETUNE_MODE != "full":
+        raise ValueError(f"Unknown FINETUNE_MODE: {config.FINETUNE_MODE}")
+
+    # Activation checkpointing on the encoder layers
+    if config.GRADIENT_CHECKPOINTING:
+        model.encoder.gradient_checkpointing_enable(
+            gradient_checkpointing_kwargs={"use_reentrant": False}
+        )
+
+    unwrapped_model = model
+    if world_size > 1:
+        model = DistributedDataParallel(model)
+
+    # Optimizer (LoRA: states for the trainable tensors only)
     optimizer = AdamW(
-        model.parameters(),
-        lr=config.LEARNING_RATE,
+        [p for p in model.parameters() if p.requires_grad] if lora else model.parameters(),
+        lr=config.LORA_LEARNING_RATE if lora else config.LEARNING_RATE,
         weight_decay=config.WEIGHT_DECAY
     )
 
-    # Scheduler
-    total_steps = len(train_loader) * config.EPOCHS
+    # Scheduler (counts optimizer steps, not micro-batches)
+    steps_per_epoch = math.ceil(len(train_loader) / config.GRAD_ACCUM_STEPS)
+    total_steps = steps_per_epoch * config.EPOCHS
     scheduler = get_linear_schedule_with_warmup(
         optimizer,
         num_warmup_steps=int(0.1 * total_steps),
@@ -185,22 +339,130 @@ def train():
         "train_acc": [],
         "val_loss": [],
         "val_acc": [],
-        "val_macro_f1": []
+        "val_macro_f1": [],
+        "peak_rss_mb": [],
+        "batch_size": [],
+        "grad_accum_steps": [],
+        "gradient_checkpointing": [],
+        # Throughput (train_epoch): seconds per phase, global samples / tokens per second
+        "data_wait_s": [],
+        "forward_s": [],
+        "backward_s": [],
+        "optimizer_s": [],
+        "epoch_time_s": [],
+        "samples_per_s": [],
+        "tokens_per_s": []
     }
 
     # Early stopping
     best_val_loss = float("inf")
-    best_model_state = None
     patience = 2
     patience_counter = 0
 
-    # Training loop
-    for epoch in range(config.EPOCHS):
-        print(f"\nEpoch {epoch + 1}/{config.EPOCHS}")
+    # ===== On-disk checkpoints (written by rank 0) =====
+    checkpoints = CheckpointManager(best_path=config.LORA_ADAPTER_PATH if lora else CHECKPOINT_PATH)
+    # A leftover last.pt is only resumed by a run with the same settings / data
+    run_config = {
+        "world_size": world_size,
+        "batch_size": config.BATCH_SIZE,
+        "grad_accum_steps": config.GRAD_ACCUM_STEPS,
+        "finetune_mode": config.FINETUNE_MODE,
+        "lora": unwrapped_model.lora_config if lora else None,
+        "model_name": config.MODEL_NAME,
+        "learning_rate": optimizer.defaults["lr"],
+        "weight_decay": config.WEIGHT_DECAY,
+        "epochs": config.EPOCHS,
+        "max_seq_length": config.MAX_SEQ_LENGTH,
+        "random_seed": config.RANDOM_SEED,
+        "train_data": file_fingerprint(TRAIN_PATH),
+    }
 
-        train_loss, train_acc = train_epoch(
-            model, train_loader, optimizer, scheduler, device
-        )
+    def model_state():
+        # LoRA: the frozen backbone is the pretrained one, not worth saving
+        return lora_state_dict(unwrapped_model) if lora else unwrapped_model.state_dict()
+
+    def training_state(epoch, step_in_epoch, epoch_progress):
+        return {
+            "epoch": epoch,
+            "step_in_epoch": step_in_epoch,
+            "model": model_state(),
+            "optimizer": optimizer.state_dict(),
+            "scheduler": scheduler.state_dict(),
+            "epoch_progress": epoch_progress,
+            "early_stopping": {
+                "best_val_loss": best_val_loss,
+                "patience_counter": patience_counter,
+            },
+            "history": history,
+            "run": run_config,
+        }
+
+    def on_optimizer_step(step_in_epoch, epoch_progress):
+        # scheduler.last_epoch = optimizer steps so far, identical on every rank
+        if not config.CHECKPOINT_EVERY_STEPS or scheduler.last_epoch % config.CHECKPOINT_EVERY_STEPS:
+            return
+        # Partial epoch metrics summed over all ranks (device sums -> floats)
+        values = [float(v) for v in epoch_progress.values()]
+        totals = dict(zip(epoch_progress, all_reduce_sum(*values)))
+        if is_main_process():
+            checkpoints.save_state(training_state(epoch, step_in_epoch, totals))
+
+    # ===== Resume =====
+    start_epoch, start_step, resume_progress = 0, 0, None
+    resume_state = checkpoints.load_state() if config.RESUME_TRAINING else None
+    if resume_state is not None:
+        if resume_state["run"] != run_config:
+            changed = sorted(
+                k for k in set(run_config) | set(resume_state["run"])
+                if resume_state["run"].get(k) != run_config.get(k)
+            )
+            raise ValueError(
+                f"Cannot resume from {config.TRAIN_STATE_DIR}/last.pt: {', '.join(changed)} "
+                f"changed since it was written (delete it or set RESUME_TRAINING = False)"
+            )
+        unwrapped_model.load_state_dict(resume_state["model"], strict=not lora)
+        optimizer.load_state_dict(resume_state["optimizer"])
+        scheduler.load_state_dict(resume_state["scheduler"])
+        history = resume_state["history"]
+        best_val_loss = resume_state["early_stopping"]["best_val_loss"]
+        patience_counter = resume_state["early_stopping"]["patience_counter"]
+        start_epoch = resume_state["epoch"]
+        start_step = resume_state["step_in_epoch"]
+
+        # Saved metric sums are global: count them once (rank 0)
+        if start_step > 0 and is_main_process():
+            resume_progress = resume_state["epoch_progress"]
+
+        set_rng_state(resume_state["rng"])
+        del resume_state
+
+        if patience_counter >= patience:
+            print("Early stopping was already triggered in the resumed run.")
+            start_epoch = config.EPOCHS
+
+    # Opt-in profiler window (PROFILE_STEPS / FAKENEWS_PROFILE_STEPS)
+    profiler = build_profiler(rank)
+    if profiler is not None:
+        profiler.start()
+
+    # Training loop
+    for epoch in range(start_epoch, config.EPOCHS):
+        if is_main_process():
+            print(f"\nEpoch {epoch + 1}/{config.EPOCHS}")
+
+        # Same permutation as an uninterrupted run; skip batches already done
+        train_loader.batch_sampler.set_epoch(epoch, start_batch=start_step)
+
+        with PeakRSSMonitor() as memory_monitor:
+            train_loss, train_acc, train_stats = train_epoch(
+                model, train_loader, optimizer, scheduler, device,
+                accum_steps=config.GRAD_ACCUM_STEPS,
+                start_step=start_step,
+                progress=resume_progress,
+                on_optimizer_step=on_optimizer_step,
+                profiler=profiler
+            )
+        start_step, resume_progress = 0, None
 
         val_loss, val_acc, val_macro_f1 = eval_epoch(
             model, val_loader, device
@@ -212,39 +474,81 @@ def train():
         history["val_loss"].append(val_loss)
         history["val_acc"].append(val_acc)
         history["val_macro_f1"].append(val_macro_f1)
-
-        print(
-            f"Train Loss: {train_loss:.4f} | "
-            f"Train Acc: {train_acc:.4f} | "
-            f"Val Loss: {val_loss:.4f} | "
-            f"Val Acc: {val_acc:.4f} | "
-            f"Val Macro-F1: {val_macro_f1:.4f}"
-        )
+        history["peak_rss_mb"].append(memory_monitor.peak_mb)
+        history["batch_size"].append(config.BATCH_SIZE)
+        history["grad_accum_steps"].append(config.GRAD_ACCUM_STEPS)
+        history["gradient_checkpointing"].append(config.GRADIENT_CHECKPOINTING)
+        for key, value in train_stats.items():
+            history[key].append(value)
+
+        if is_main_process():
+            print(
+                f"Train Loss: {train_loss:.4f} | "
+                f"Train Acc: {train_acc:.4f} | "
+                f"Val Loss: {val_loss:.4f} | "
+                f"Val Acc: {val_acc:.4f} | "
+                f"Val Macro-F1: {val_macro_f1:.4f} | "
+                f"Peak RSS: {memory_monitor.peak_mb} MB"
+            )
+            print(
+                f"Throughput: {train_stats['samples_per_s']} samples/s | "
+                f"{train_stats['tokens_per_s']} tokens/s | "
+                f"data {train_stats['data_wait_s']}s, fwd {train_stats['forward_s']}s, "
+                f"bwd {train_stats['backward_s']}s, optim {train_stats['optimizer_s']}s"
+            )
 
         # ===== Early Stopping =====
-        if val_loss < best_val_loss:
+        # val_loss is already reduced over all ranks; rank 0's decision is
+        # still broadcast so every rank leaves the loop at the same epoch
+        improved = broadcast_flag(val_loss < best_val_loss)
+        if improved:
             best_val_loss = val_loss
-            best_model_state = copy.deepcopy(model.state_dict())
             patience_counter = 0
+            # Best weights go straight to disk (no copy kept in RAM)
+            if is_main_process():
+                checkpoints.save_best(
+                    model_state(),
+                    pack_adapter(unwrapped_model, config.MODEL_NAME) if lora else None
+                )
         else:
             patience_counter += 1
-            print(f"EarlyStopping counter: {patience_counter}/{patience}")
+            if is_main_process():
+                print(f"EarlyStopping counter: {patience_counter}/{patience}")
+
+        stop = broadcast_flag(patience_counter >= patience)
+
+        if is_main_process():
+            checkpoints.save_state(training_state(epoch + 1, 0, None))
 
-            if patience_counter >= patience:
+            # Save history (every epoch: survives a crash)
+            df = pd.DataFrame(history)
+            os.makedirs(os.path.dirname(RESULT_PATH), exist_ok=True)
+            df.to_csv(RESULT_PATH, index=False)
+
+        if stop:
+            if is_main_process():
                 print("Early stopping triggered.")
-                break
+            break
+
+    if profiler is not None:
+        profiler.stop()
+
+    if is_main_process():
+        checkpoints.wait()
+        # Finished: nothing left to resume
+        checkpoints.clear_state()
+
+        # Fold the best adapters into the backbone: plain checkpoint, base-model cost
+        if lora:
+            from src.train.lora import merge_adapter
 
-    # Save best model
-    os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
-    torch.save(best_model_state, CHECKPOINT_PATH)
-    print(f"Best model saved to {CHECKPOINT_PATH}")
+            print(f"Best adapters saved to {config.LORA_ADAPTER_PATH}")
+            merge_adapter(config.LORA_ADAPTER_PATH, CHECKPOINT_PATH)
+        print(f"Best model saved to {CHECKPOINT_PATH}")
+        print("Training history saved to training_history.csv")
 
-    # Save history
-    df = pd.DataFrame(history)
-    os.makedirs(os.path.dirname(RESULT_PATH), exist_ok=True)
-    df.to_csv(RESULT_PATH, index=False)
-    print("Training history saved to training_history.csv")
+    cleanup()
 
 
 if __name__ == "__main__":
-    train("g:\VsCode\Python\ANM\Fake_news_Classify\dataset\data_processed")
+    train()
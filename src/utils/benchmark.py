@@ -0,0 +1,76 @@
+# utils/benchmark.py
+
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+import torch
+
+from configs.shared import ROOT_DIR
+
+REPORT_DIR = ROOT_DIR / "result" / "benchmark"
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """
+    p50 / p95 / p99 / mean of a list of latencies (milliseconds).
+    """
+    if not latencies_ms:
+        return {"count": 0}
+    arr = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        "count": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+    }
+
+
+def time_calls(fn: Callable, inputs: Iterable, warmup: int = 2) -> List[float]:
+    """
+    Call `fn(x)` for every input under no_grad and return per-call latency (ms).
+    The first `warmup` inputs are also run once beforehand and not timed.
+    """
+    inputs = list(inputs)
+    latencies = []
+
+    with torch.no_grad():
+        for x in inputs[:warmup]:
+            fn(x)
+
+        for x in inputs:
+            t0 = time.perf_counter()
+            fn(x)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    return latencies
+
+
+def state_dict_size_mb(model: torch.nn.Module) -> float:
+    """
+    Size in MB of the model's tensors as they would be serialized.
+    Quantized modules keep their weights in packed params, so go through
+    state_dict() rather than parameters().
+    """
+    total = 0
+    for value in model.state_dict().values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):  # packed (weight, bias) of quantized Linear
+            total += sum(v.numel() * v.element_size() for v in value if isinstance(v, torch.Tensor))
+    return round(total / 1024 ** 2, 2)
+
+
+def save_report(name: str, report: Dict) -> str:
+    """
+    Write a JSON report to result/benchmark/<name>.json and return its path.
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.join(REPORT_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"Report saved to {path}")
+    return path
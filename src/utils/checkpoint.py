@@ -0,0 +1,17 @@
+# utils/checkpoint.py
+
+import os
+from typing import Dict, Any
+
+
+def file_fingerprint(path) -> Dict[str, Any]:
+    """
+    Cheap identity of a file on disk (path + size + mtime).
+    Used to detect that a derived artifact is stale.
+    """
+    path = os.path.abspath(str(path))
+    if not os.path.exists(path):
+        return {"path": path, "size": None, "mtime_ns": None}
+
+    st = os.stat(path)
+    return {"path": path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
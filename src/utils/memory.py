@@ -0,0 +1,113 @@
+# utils/memory.py
+
+import os
+import sys
+import threading
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _read_proc_kb(path: str, fields) -> Dict[str, int]:
+    values = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    values[name] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def process_memory() -> Dict[str, Optional[float]]:
+    """
+    Memory usage of the current process, in MB.
+
+    - rss_mb     : resident set size
+    - private_mb : anonymous pages owned by this process only
+    - shared_mb  : file-backed + shmem pages (e.g. mmap'ed checkpoint weights),
+                   shared with every other process mapping the same file
+    - pss_mb     : proportional set size (shared pages divided by #sharers)
+    - peak_rss_mb: high-water mark of RSS
+
+    On platforms without /proc only `peak_rss_mb` is available (None on Windows).
+    """
+    status = _read_proc_kb(
+        "/proc/self/status", {"VmRSS", "RssAnon", "RssFile", "RssShmem", "VmHWM"}
+    )
+    rollup = _read_proc_kb("/proc/self/smaps_rollup", {"Pss"})
+
+    def mb(kb):
+        return round(kb / 1024, 1) if kb is not None else None
+
+    shared_kb = None
+    if "RssFile" in status:
+        shared_kb = status["RssFile"] + status.get("RssShmem", 0)
+
+    peak_kb = status.get("VmHWM")
+    if peak_kb is None and resource is not None:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_kb = peak // 1024 if sys.platform == "darwin" else peak
+
+    return {
+        "pid": os.getpid(),
+        "rss_mb": mb(status.get("VmRSS")),
+        "private_mb": mb(status.get("RssAnon")),
+        "shared_mb": mb(shared_kb),
+        "pss_mb": mb(rollup.get("Pss")),
+        "peak_rss_mb": mb(peak_kb),
+    }
+
+
+class PeakRSSMonitor:
+    """
+    Sample RSS in a background thread and keep the maximum.
+    Unlike VmHWM (peak over the whole process life), this gives the peak of
+    one phase, e.g. one training run among several in the same process.
+
+        with PeakRSSMonitor() as mon:
+            ...
+        mon.peak_mb, mon.start_mb
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.start_mb = None
+        self.peak_mb = None
+        self._stop = None
+        self._thread = None
+
+    def _sample(self):
+        rss = process_memory()["rss_mb"]
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = process_memory()["rss_mb"]
+        self.peak_mb = self.start_mb
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+    @property
+    def delta_mb(self) -> Optional[float]:
+        if self.peak_mb is None or self.start_mb is None:
+            return None
+        return round(self.peak_mb - self.start_mb, 1)
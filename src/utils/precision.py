@@ -0,0 +1,55 @@
+# utils/precision.py
+
+import contextlib
+from typing import Dict, Optional
+
+import torch
+
+# Autocast precisions supported on CPU and GPU without a gradient scaler
+_DTYPES = {
+    None: None,
+    "bf16": torch.bfloat16,
+}
+
+
+def resolve_dtype(name: Optional[str]) -> Optional[torch.dtype]:
+    """
+    Config value (None / "bf16") -> torch dtype (None means full fp32).
+    """
+    if name not in _DTYPES:
+        raise ValueError(f"Unknown AUTOCAST_DTYPE: {name} (expected one of {list(_DTYPES)})")
+    return _DTYPES[name]
+
+
+def autocast(device, name: Optional[str]):
+    """
+    torch.autocast for `device` in the configured precision, no-op for fp32.
+    Matmuls / linears run in bf16; reductions (softmax, layer norm, loss)
+    stay in fp32.
+    """
+    dtype = resolve_dtype(name)
+    if dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=torch.device(device).type, dtype=dtype)
+
+
+def cast_state_dict(state_dict: Dict[str, torch.Tensor], name: Optional[str]) -> Dict[str, torch.Tensor]:
+    """
+    Copy of `state_dict` with floating tensors stored in the given precision
+    (checkpoint size halves with "bf16"). Integer buffers are untouched.
+    """
+    dtype = resolve_dtype(name)
+    if dtype is None:
+        return state_dict
+    return {
+        k: v.to(dtype) if torch.is_tensor(v) and v.is_floating_point() else v
+        for k, v in state_dict.items()
+    }
+
+
+def is_fp32_state_dict(state_dict: Dict[str, torch.Tensor]) -> bool:
+    return all(
+        v.dtype == torch.float32
+        for v in state_dict.values()
+        if torch.is_tensor(v) and v.is_floating_point()
+    )
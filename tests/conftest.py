@@ -0,0 +1,82 @@
+# tests/conftest.py
+"""
+Shared fixtures: a tiny RoBERTa backbone and word-level tokenizer saved to a
+temporary directory, used as `model_name` (no download, runs on CPU in
+seconds).
+"""
+import os
+import sys
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, root_dir)
+
+import pytest
+import torch
+
+NUM_CLASSES = 3
+
+WORDS = "tin tức tài_khoản của bạn bị hạn_chế vui_lòng xác_minh mật_khẩu ngân_hàng otp".split()
+
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory):
+    """
+    Directory with a 3-layer RoBERTa (4 heads, FFN 48) and its tokenizer:
+    <s>=0, <pad>=1, </s>=2, <unk>=3, then one id per word of WORDS.
+    """
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast, RobertaConfig, RobertaModel
+
+    model_dir = str(tmp_path_factory.mktemp("tiny-phobert"))
+
+    vocab = {"<s>": 0, "<pad>": 1, "</s>": 2, "<unk>": 3}
+    for word in WORDS:
+        vocab[word] = len(vocab)
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    backend.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 2)]
+    )
+    PreTrainedTokenizerFast(
+        tokenizer_object=backend,
+        bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>",
+        cls_token="<s>", sep_token="</s>",
+    ).save_pretrained(model_dir)
+
+    torch.manual_seed(0)
+    config = RobertaConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=3,
+        num_attention_heads=4,
+        intermediate_size=48,
+        max_position_embeddings=40,
+        pad_token_id=1, bos_token_id=0, eos_token_id=2,
+    )
+    RobertaModel(config).save_pretrained(model_dir)
+    return model_dir
+
+
+@pytest.fixture(scope="session")
+def tiny_tokenizer(tiny_model_dir):
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(tiny_model_dir)
+
+
+@pytest.fixture
+def classifier(tiny_model_dir):
+    from src.model.model import PhoBERTClassifier
+
+    torch.manual_seed(0)
+    return PhoBERTClassifier(model_name=tiny_model_dir, num_classes=NUM_CLASSES).eval()
+
+
+@pytest.fixture
+def batch(tiny_tokenizer):
+    """Two texts of different length (the second one padded)."""
+    encoded = tiny_tokenizer(
+        ["tin tức tài_khoản của bạn bị hạn_chế vui_lòng xác_minh", "mật_khẩu ngân_hàng"],
+        padding=True,
+        return_tensors="pt",
+    )
+    return encoded["input_ids"], encoded["attention_mask"]
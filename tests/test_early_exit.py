@@ -0,0 +1,27 @@
+# tests/test_early_exit.py
+
+import torch
+
+from src.model.early_exit import EarlyExitClassifier
+
+
+def test_threshold_above_one_gives_base_logits(classifier, batch):
+    wrapped = EarlyExitClassifier(classifier, exit_layers=[1, 2], threshold=1.01).eval()
+
+    with torch.no_grad():
+        logits, layers_run = wrapped.forward_with_exits(*batch)
+        base = classifier(*batch)
+
+    assert torch.allclose(logits, base, atol=1e-5)
+    assert layers_run.tolist() == [3, 3]
+
+
+def test_threshold_zero_exits_at_first_head(classifier, batch):
+    wrapped = EarlyExitClassifier(classifier, exit_layers=[1, 2], threshold=0.0).eval()
+
+    with torch.no_grad():
+        logits, layers_run = wrapped.forward_with_exits(*batch)
+        first_cls = wrapped.exit_cls(*batch)[:, :classifier.encoder.config.hidden_size]
+
+    assert layers_run.tolist() == [1, 1]
+    assert torch.allclose(logits, wrapped.exit_heads["1"](first_cls), atol=1e-5)
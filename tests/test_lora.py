@@ -0,0 +1,50 @@
+# tests/test_lora.py
+
+import torch
+
+from src.model.lora import LoRALinear, apply_lora, load_adapter, lora_state_dict, merge_lora, pack_adapter
+
+from conftest import NUM_CLASSES
+
+
+def _lora_model(classifier):
+    apply_lora(classifier, rank=4, alpha=8, dropout=0.0, targets=("query", "value"))
+    # B starts at zero: give the adapters a non-trivial update
+    torch.manual_seed(1)
+    for name, param in classifier.named_parameters():
+        if name.endswith("lora_B"):
+            torch.nn.init.normal_(param, std=0.1)
+    return classifier.eval()
+
+
+def test_only_adapters_and_head_train(classifier):
+    _lora_model(classifier)
+    trainable = set(lora_state_dict(classifier))
+
+    assert trainable
+    assert all("lora_" in k or k.startswith("classifier.") for k in trainable)
+    assert any(k.endswith("query.lora_A") for k in trainable)
+    assert not any("key.lora" in k for k in trainable)
+
+
+def test_merge_matches_unmerged(classifier, batch):
+    _lora_model(classifier)
+    with torch.no_grad():
+        unmerged = classifier(*batch)
+        merge_lora(classifier)
+        merged = classifier(*batch)
+
+    assert not any(isinstance(m, LoRALinear) for m in classifier.modules())
+    assert torch.allclose(merged, unmerged, atol=1e-5)
+
+
+def test_adapter_checkpoint_round_trip(classifier, batch, tiny_model_dir):
+    _lora_model(classifier)
+    adapter = {
+        **pack_adapter(classifier, tiny_model_dir),
+        "state_dict": lora_state_dict(classifier),
+    }
+
+    reloaded = load_adapter(adapter, tiny_model_dir, NUM_CLASSES)
+    with torch.no_grad():
+        assert torch.allclose(reloaded(*batch), classifier(*batch), atol=1e-5)
@@ -0,0 +1,47 @@
+# tests/test_pruning.py
+
+import torch
+
+from src.model.model import load_classifier, pack_checkpoint
+from src.model.pruning import encoder_structure, prune_ffn, prune_heads
+
+from conftest import NUM_CLASSES
+
+
+def _prune(model):
+    prune_heads(model.encoder, {0: [1, 3], 2: [0]})
+    prune_ffn(model.encoder, {0: range(0, 48, 2), 1: [5, 7, 11]})
+    model.encoder_config = encoder_structure(model.encoder)
+    return model
+
+
+def test_pruned_shapes_and_structure(classifier):
+    num_params = sum(p.numel() for p in classifier.parameters())
+    _prune(classifier)
+
+    assert classifier.encoder_config == {
+        "layer_num_heads": [2, 4, 1],
+        "layer_intermediate_sizes": [24, 3, 48],
+    }
+    assert classifier.encoder.encoder.layer[0].attention.self.query.out_features == 2 * 8
+    assert sum(p.numel() for p in classifier.parameters()) < num_params
+
+
+def test_pruned_save_reload_forward(classifier, batch, tiny_model_dir, tmp_path):
+    _prune(classifier)
+    path = tmp_path / "pruned.pt"
+    torch.save(pack_checkpoint(classifier.state_dict(), classifier.encoder_config), path)
+
+    reloaded = load_classifier(path, tiny_model_dir, NUM_CLASSES)
+
+    assert reloaded.encoder_config == classifier.encoder_config
+    with torch.no_grad():
+        assert torch.equal(reloaded(*batch), classifier(*batch))
+
+
+def test_keeping_everything_is_identity(classifier, batch):
+    with torch.no_grad():
+        before = classifier(*batch)
+        prune_heads(classifier.encoder, {i: range(4) for i in range(3)})
+        prune_ffn(classifier.encoder, {i: range(48) for i in range(3)})
+        assert torch.allclose(classifier(*batch), before, atol=1e-6)
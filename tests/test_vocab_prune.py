@@ -0,0 +1,63 @@
+# tests/test_vocab_prune.py
+
+import numpy as np
+import pytest
+import torch
+
+from src.infer.vocab_prune import EMBEDDING_KEY, PrunedTokenizer, wrap_tokenizer
+from src.model.model import load_classifier, pack_checkpoint
+
+from conftest import NUM_CLASSES
+
+KEPT_WORDS = ["tin", "tức", "mật_khẩu", "ngân_hàng"]
+
+
+def _vocab_ids(tokenizer):
+    kept = [0, 1, 2, 3] + tokenizer.convert_tokens_to_ids(KEPT_WORDS)
+    return np.asarray(sorted(kept), dtype=np.int64)
+
+
+def test_remap_keeps_specials_and_sends_unseen_to_unk(tiny_tokenizer):
+    pruned = PrunedTokenizer(tiny_tokenizer, _vocab_ids(tiny_tokenizer))
+
+    ids = pruned("tin mật_khẩu bạn")["input_ids"]
+    assert ids == [0, 4, 6, 3, 2]  # <s> tin mật_khẩu <unk> </s>
+    assert len(pruned) == 8
+    assert pruned.pad_token_id == tiny_tokenizer.pad_token_id
+
+
+def test_remap_containers(tiny_tokenizer):
+    pruned = PrunedTokenizer(tiny_tokenizer, _vocab_ids(tiny_tokenizer))
+    full = tiny_tokenizer(["tin tức bạn", "ngân_hàng"], padding=True, return_tensors="pt")["input_ids"]
+
+    as_tensor = pruned.remap(full)
+    assert isinstance(as_tensor, torch.Tensor)
+    assert as_tensor.tolist() == pruned.remap(full.tolist())
+    assert as_tensor.tolist() == pruned.remap(full.numpy()).tolist()
+
+
+def test_pruned_checkpoint_parity(classifier, tiny_tokenizer, tiny_model_dir, tmp_path):
+    vocab_ids = _vocab_ids(tiny_tokenizer)
+    state_dict = dict(classifier.state_dict())
+    state_dict[EMBEDDING_KEY] = state_dict[EMBEDDING_KEY][torch.from_numpy(vocab_ids)].clone()
+    path = tmp_path / "pruned.pt"
+    torch.save(
+        pack_checkpoint(state_dict, {"vocab_size": len(vocab_ids)}, torch.from_numpy(vocab_ids)),
+        path,
+    )
+
+    with pytest.raises(ValueError, match="pruned vocabulary"):
+        load_classifier(path, tiny_model_dir, NUM_CLASSES)
+
+    pruned_model = load_classifier(path, tiny_model_dir, NUM_CLASSES, allow_pruned_vocab=True)
+    pruned_tokenizer = wrap_tokenizer(tiny_tokenizer, path)
+    assert isinstance(pruned_tokenizer, PrunedTokenizer)
+
+    texts = ["tin tức mật_khẩu", "ngân_hàng tin"]
+    full = tiny_tokenizer(texts, padding=True, return_tensors="pt")
+    remapped = pruned_tokenizer(texts, padding=True, return_tensors="pt")
+    with torch.no_grad():
+        assert torch.equal(
+            pruned_model(remapped["input_ids"], remapped["attention_mask"]),
+            classifier(full["input_ids"], full["attention_mask"]),
+        )
@@ -1,5 +1,7 @@
 # web/backend/app.py
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,17 +10,32 @@ from pathlib import Path
 
 from web.backend.routes.predict import router as predict_router
 from web.backend.routes.feedback import router as feedback_router
+from web.backend.routes.health import router as health_router
+from web.backend.models.news_inferencer import NewsInferencerWrapper
+from src.utils.memory import process_memory
+from configs.config_web import PRELOAD_MODEL
 import mimetypes
 mimetypes.add_type("application/javascript", ".js")
 
 # 🔥 ROOT CHUẨN
 BASE_DIR = Path(__file__).resolve().parents[1]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Production workers load the (mmap'ed) model before taking traffic
+    if PRELOAD_MODEL:
+        NewsInferencerWrapper.get_instance()
+        print(f"[Worker] model loaded, memory: {process_memory()}")
+    yield
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Fake News Detection API",
         description="API nhận diện tin giả sử dụng AI",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
 
     # =========================
@@ -51,6 +68,7 @@ def create_app() -> FastAPI:
     # =========================
     app.include_router(predict_router, prefix="/api", tags=["Prediction"])
     app.include_router(feedback_router, prefix="/api", tags=["Feedback"])
+    app.include_router(health_router, prefix="/api", tags=["Health"])
 
     # =========================
     # FRONTEND ENTRY
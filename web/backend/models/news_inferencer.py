@@ -1,4 +1,6 @@
 # backend/models/news_inferencer.py
+import threading
+
 from src.infer.infer import NewsInferencer
 
 
@@ -8,12 +10,19 @@ class NewsInferencerWrapper:
     """
 
     _instance = None
+    _lock = threading.Lock()
 
     @classmethod
     def get_instance(cls):
+        # Nhiều worker của executor có thể gọi lần đầu cùng lúc
         if cls._instance is None:
-            cls._instance = NewsInferencer()
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = NewsInferencer()
         return cls._instance
 
     def infer(self, news_input: dict) -> dict:
         return self.get_instance().infer(news_input)
+
+    def infer_batch(self, news_inputs: list) -> list:
+        return self.get_instance().infer_batch(news_inputs)
@@ -0,0 +1,16 @@
+#routes/health.py
+
+from fastapi import APIRouter
+
+from src.utils.memory import process_memory
+
+router = APIRouter()
+
+
+@router.get(
+    "/health/memory",
+    summary="Bộ nhớ của worker",
+    description="RSS, bộ nhớ riêng và bộ nhớ chia sẻ (trọng số mmap) của process đang trả lời"
+)
+def memory_usage():
+    return process_memory()
@@ -3,6 +3,7 @@
 from fastapi import APIRouter, HTTPException
 from web.backend.schemas import NewsInput, UIResponse
 from web.backend.services.infer_service import InferService
+from web.backend.services.batch_scheduler import SchedulerFullError
 from web.backend.services.result_mapper import map_result_to_ui
 
 router = APIRouter()
@@ -17,11 +18,11 @@ infer_service = InferService()
     summary="Đánh giá tin tức",
     description="Nhận nội dung tin tức và trả về kết quả phân loại tin giả"
 )
-def predict(news: NewsInput):
+async def predict(news: NewsInput):
     """
     Controller layer:
     - Nhận dữ liệu từ frontend
-    - Gọi infer_service
+    - Gọi infer_service (chạy trên executor riêng, không chặn event loop)
     - Mapping kết quả sang UI format
     """
 
@@ -30,7 +31,7 @@ def predict(news: NewsInput):
         input_data = news.model_dump()
 
         # 2. Gọi mô hình AI (raw model output)
-        raw_model_output = infer_service.run_infer(input_data)
+        raw_model_output = await infer_service.run_infer_async(input_data)
 
         # 3. Mapping sang UI response (đúng contract frontend)
         ui_response = map_result_to_ui(raw_model_output)
@@ -39,9 +40,24 @@ def predict(news: NewsInput):
 
         return ui_response
 
+    except SchedulerFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry"
+        )
+
     except Exception as e:
         # Không expose lỗi nội bộ ra frontend
         raise HTTPException(
             status_code=500,
             detail="Internal error during prediction"
         )
+
+
+@router.get(
+    "/predict/stats",
+    summary="Thống kê micro-batching",
+    description="Số request, số batch và phân bố batch size thực tế của /predict"
+)
+def predict_stats():
+    return infer_service.stats()
@@ -0,0 +1,186 @@
+# web/backend/services/batch_scheduler.py
+
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List
+
+
+class SchedulerFullError(RuntimeError):
+    """
+    Raised when the request queue is at capacity (caller should answer 503).
+    """
+
+
+class MicroBatchScheduler:
+    """
+    Coalesce concurrent single-item requests into batched model calls.
+
+    A background thread takes the first pending request, then keeps
+    collecting until `max_batch_size` items are gathered or `max_wait_ms`
+    has elapsed, and runs them through `batch_fn` in one call.
+    Every caller receives its own result through a Future.
+
+    When an `executor` is given, batches run on it instead of on the
+    collector thread. At most `max_concurrent_batches` batches are in flight;
+    while all of them are busy new requests keep queueing, so the next
+    batch simply grows bigger.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10,
+        max_queue_size: int = 256,
+        executor: Executor = None,
+        max_concurrent_batches: int = 1,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._executor = executor
+        self._slots = threading.Semaphore(
+            max_concurrent_batches if executor is not None else 1
+        )
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # -------- counters --------
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._num_requests = 0
+        self._num_rejected = 0
+        self._num_errors = 0
+
+    # =====================================================
+    # ----------------- PUBLIC API ------------------------
+    # =====================================================
+    def submit(self, item: Any) -> Future:
+        """
+        Enqueue one item and return a Future resolved with its result.
+        """
+        self._ensure_started()
+
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            with self._stats_lock:
+                self._num_rejected += 1
+            raise SchedulerFullError("Inference queue is full")
+
+        return future
+
+    def infer(self, item: Any, timeout: float = None) -> Any:
+        """
+        Blocking helper: submit one item and wait for its result.
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the batch sizes actually achieved.
+        """
+        with self._stats_lock:
+            num_batches = sum(self._batch_sizes.values())
+            batched_items = sum(size * n for size, n in self._batch_sizes.items())
+            return {
+                "num_requests": self._num_requests,
+                "num_batches": num_batches,
+                "num_rejected": self._num_rejected,
+                "num_errors": self._num_errors,
+                "avg_batch_size": batched_items / num_batches if num_batches else 0.0,
+                "max_batch_size_seen": max(self._batch_sizes, default=0),
+                "batch_size_histogram": {
+                    str(size): n for size, n in sorted(self._batch_sizes.items())
+                },
+                "queue_depth": self._queue.qsize(),
+                "config": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait * 1000.0,
+                    "max_queue_size": self._queue.maxsize,
+                },
+            }
+
+    # =====================================================
+    # ----------------- WORKER ----------------------------
+    # =====================================================
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="micro-batch-scheduler", daemon=True
+                )
+                self._thread.start()
+
+    def _collect_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            # Wait for a free worker before forming the next batch
+            self._slots.acquire()
+            batch = self._collect_batch()
+
+            if self._executor is None:
+                self._execute_and_release(batch)
+            else:
+                self._executor.submit(self._execute_and_release, batch)
+
+    def _execute_and_release(self, batch: list):
+        try:
+            self._execute(batch)
+        finally:
+            self._slots.release()
+
+    def _execute(self, batch: list):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._num_requests += len(batch)
+
+        try:
+            results = list(self.batch_fn(items))
+            if len(results) != len(items):
+                raise ValueError(
+                    f"batch_fn returned {len(results)} results for {len(items)} items"
+                )
+        except Exception:
+            # One bad item must not fail its neighbours (and no future may be
+            # left pending): retry one by one
+            self._execute_one_by_one(items, futures)
+            return
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _execute_one_by_one(self, items: list, futures: List[Future]):
+        for item, future in zip(items, futures):
+            try:
+                future.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                with self._stats_lock:
+                    self._num_errors += 1
+                future.set_exception(e)
@@ -0,0 +1,31 @@
+# web/backend/services/infer_executor.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from configs.config_web import TORCH_NUM_THREADS, INFER_EXECUTOR_WORKERS
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_infer_executor() -> ThreadPoolExecutor:
+    """
+    Process-wide executor reserved for CPU-bound inference.
+
+    Keeping model work off the event loop (and off Starlette's default
+    threadpool) lets light routes such as `/`, `/result` and static files
+    answer quickly while inference is saturated.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                torch.set_num_threads(TORCH_NUM_THREADS)
+                _executor = ThreadPoolExecutor(
+                    max_workers=INFER_EXECUTOR_WORKERS,
+                    thread_name_prefix="infer",
+                )
+    return _executor
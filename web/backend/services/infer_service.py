@@ -1,5 +1,15 @@
+import asyncio
 from typing import Dict
 from web.backend.models.news_inferencer import NewsInferencerWrapper
+from web.backend.services.batch_scheduler import MicroBatchScheduler
+from web.backend.services.infer_executor import get_infer_executor
+from configs.config_web import (
+    MICRO_BATCH_ENABLED,
+    MICRO_BATCH_MAX_WAIT_MS,
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_MAX_QUEUE,
+    INFER_EXECUTOR_WORKERS,
+)
 
 
 class InferService:
@@ -9,6 +19,19 @@ class InferService:
 
     def __init__(self):
         self.inferencer = NewsInferencerWrapper()
+        self.executor = get_infer_executor()
+
+        # Gộp các request đồng thời thành 1 batch forward
+        self.scheduler = None
+        if MICRO_BATCH_ENABLED:
+            self.scheduler = MicroBatchScheduler(
+                batch_fn=self.inferencer.infer_batch,
+                max_batch_size=MICRO_BATCH_MAX_SIZE,
+                max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+                max_queue_size=MICRO_BATCH_MAX_QUEUE,
+                executor=self.executor,
+                max_concurrent_batches=INFER_EXECUTOR_WORKERS,
+            )
 
     def run_infer(self, news_input: Dict) -> Dict:
         """
@@ -20,8 +43,35 @@ class InferService:
 
         print("news_input:\n",news_input)
 
-        result = self.inferencer.infer(news_input)
+        if self.scheduler is not None:
+            result = self.scheduler.infer(news_input)
+        else:
+            result = self.inferencer.infer(news_input)
+
+        return self._validate(result)
+
+    async def run_infer_async(self, news_input: Dict) -> Dict:
+        """
+        Giống run_infer nhưng không chặn event loop:
+        phần tính toán (tách từ + forward) chạy trên executor riêng
+        """
 
+        if not isinstance(news_input, dict):
+            raise ValueError("news_input must be a dictionary")
+
+        print("news_input:\n",news_input)
+
+        if self.scheduler is not None:
+            result = await asyncio.wrap_future(self.scheduler.submit(news_input))
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor, self.inferencer.infer, news_input
+            )
+
+        return self._validate(result)
+
+    def _validate(self, result: Dict) -> Dict:
         # Validate tối thiểu output model
         if not isinstance(result, dict):
             raise RuntimeError("Model output is not a dictionary")
@@ -32,3 +82,18 @@ class InferService:
         print(result)
 
         return result
+
+    def stats(self) -> Dict:
+        """
+        Thống kê batch size thực tế của scheduler và prediction cache
+        """
+        stats = {"micro_batching": self.scheduler is not None}
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats())
+
+        # Không ép load mô hình chỉ để lấy thống kê
+        model = NewsInferencerWrapper._instance
+        if model is not None and model.cache is not None:
+            stats["prediction_cache"] = model.cache.stats()
+
+        return stats